@@ -259,24 +259,163 @@
 
 
 
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Query
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from PIL import Image
-import io
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from contextlib import asynccontextmanager
+import asyncio
+import json
 import os
-import re
-from typing import Optional, List
-import uvicorn
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, List
 from dotenv import load_dotenv
-import pandas as pd
 load_dotenv()
 
-# Import the updated detector
-from src.clip_color_detector import ClipColorDetector
-from src.color_match_agent import ColorMatchAgent
+# Heavy modules (langchain/openai, pandas, PIL/numpy, requests) are imported
+# on first use, see get_detector() / get_agent() and the helper getters;
+# `python fastapi_app.py --profile-imports`
+# shows what module import costs.
+from src.batch_detection import (
+    MAX_BATCH_BYTES,
+    MAX_BATCH_CONCURRENCY,
+    check_cancelled,
+    collect_batch_items,
+    stream_batch,
+)
+from src.dataset_store import DatasetStore
+from src.image_cache import HotImageCache, http_date, is_not_modified, parse_range
+from src.image_index import ImageIndex
+from src.openai_limiter import RateLimitExhausted, get_shared_limiter
+from src.thumbnails import DEFAULT_THUMBNAIL_DIR, THUMBNAIL_SIZES
+
+# --- LAZY COMPONENTS ---
+# Built on first use (or by the startup warm-up), never at import time:
+# workers start fast and a missing OPENAI_API_KEY cannot crash them
+# before /health answers.
+_components: Dict[str, Any] = {}
+_component_errors: Dict[str, str] = {}
+_components_lock = threading.Lock()
+_started_at = time.monotonic()
+
+# Backend used when a request does not pick one ("gpt", "local" or "clip");
+# the local backends need no OPENAI_API_KEY
+DETECTOR_BACKEND = os.getenv("DETECTOR_BACKEND", "gpt")
+
+def _build_detector():
+    from src.clip_color_detector import ClipColorDetector
+    from src.detection_cache import DEFAULT_DETECTION_CACHE_PATH, DetectionCache
+
+    return ClipColorDetector(
+        default_backend=DETECTOR_BACKEND,
+        cache=DetectionCache(os.getenv("DETECTION_CACHE_PATH", DEFAULT_DETECTION_CACHE_PATH)),
+    )
+
+def _build_agent():
+    from src.color_match_agent import ColorMatchAgent
+    from src.verdict_cache import DEFAULT_VERDICT_CACHE_PATH, VerdictCache
+
+    return ColorMatchAgent(
+        openai_api_key=os.getenv("OPENAI_API_KEY"),
+        cache=VerdictCache(os.getenv("VERDICT_CACHE_PATH", DEFAULT_VERDICT_CACHE_PATH)),
+    )
+
+_COMPONENT_BUILDERS: Dict[str, Callable[[], Any]] = {
+    "detector": _build_detector,
+    "agent": _build_agent,
+}
+
+def _component(name: str) -> Any:
+    """Build a component once; answer 503 while it cannot be built."""
+    component = _components.get(name)
+    if component is not None:
+        return component
+    with _components_lock:
+        if name not in _components:
+            started = time.perf_counter()
+            try:
+                _components[name] = _COMPONENT_BUILDERS[name]()
+            except Exception as exc:
+                _component_errors[name] = f"{type(exc).__name__}: {exc}"
+                raise HTTPException(
+                    status_code=503, detail=f"{name} unavailable: {exc}"
+                ) from exc
+            _component_errors.pop(name, None)
+            print(f"[INFO] {name} ready in {time.perf_counter() - started:.2f}s")
+        return _components[name]
+
+def get_detector():
+    return _component("detector")
+
+def get_agent():
+    return _component("agent")
+
+async def aget_detector():
+    # First use imports langchain/openai: keep that off the event loop
+    return _components.get("detector") or await asyncio.to_thread(get_detector)
+
+async def aget_agent():
+    return _components.get("agent") or await asyncio.to_thread(get_agent)
+
+# Helpers needing PIL/numpy/requests, built on first use like the
+# components above but not part of readiness
+_helpers: Dict[str, Any] = {}
+_helpers_lock = threading.Lock()
+
+def _helper(name: str, build: Callable[[], Any]) -> Any:
+    helper = _helpers.get(name)
+    if helper is None:
+        with _helpers_lock:
+            helper = _helpers.get(name)
+            if helper is None:
+                helper = _helpers[name] = build()
+    return helper
+
+def get_thumbnail_store():
+    # WebP thumbnails, built once per (image hash, size) and kept on disk
+    from src.thumbnails import ThumbnailStore
+
+    return _helper(
+        "thumbnail_store",
+        lambda: ThumbnailStore(os.getenv("THUMBNAIL_DIR", DEFAULT_THUMBNAIL_DIR)),
+    )
+
+def get_batch_downloader():
+    # Shared keep-alive downloader for URL items of batch requests
+    # (no body memo: a long-lived server must not serve stale images). URLs
+    # come from clients, so private, loopback and link-local targets are refused
+    from src.image_downloader import ImageDownloader
+
+    return _helper(
+        "batch_downloader",
+        lambda: ImageDownloader(
+            max_workers=MAX_BATCH_CONCURRENCY, memo_bytes=0, public_only=True
+        ),
+    )
 
-app = FastAPI(title="Product Color Detection API (GPT Only)")
+def decode_image(data: bytes, max_edge: Optional[int] = None):
+    from src.vision_payload import decode_image as _decode
+
+    return _decode(data, max_edge=max_edge)
+
+def _warm_up() -> None:
+    for name in _COMPONENT_BUILDERS:
+        try:
+            _component(name)
+        except HTTPException:
+            print(f"[WARN] {_component_errors[name]}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Serve /health immediately; build the clients in the background
+    warm_up = None
+    if os.getenv("WARM_UP_ON_STARTUP", "1") != "0":
+        warm_up = asyncio.create_task(asyncio.to_thread(_warm_up))
+    yield
+    if warm_up is not None and not warm_up.done():
+        warm_up.cancel()
+
+app = FastAPI(title="Product Color Detection API", lifespan=lifespan)
 IMAGE_DIR = "data/images"
 
 # Allow frontend calls (Streamlit etc.)
@@ -288,56 +427,80 @@ app.add_middleware(
 )
 
 OUTPUT_CSV_PATH = "data/hf_products_with_verdict.csv"
-COLOR_COLUMN_CANDIDATES = ["baseColour", "base_colour", "color", "colour"]
-NAME_COLUMN_CANDIDATES = ["productDisplayName", "product_name", "name", "title"]
 
-def sanitize_id(raw: str) -> str:
-    """Sanitize ID for filename matching."""
-    safe = re.sub(r"[^A-Za-z0-9_-]+", "_", str(raw))
-    return safe or "unknown"
+# Indexed SQLite copy of the output CSV, reloaded when the file changes
+dataset_store = DatasetStore(OUTPUT_CSV_PATH)
+
+# Filename index of saved images: O(1) lookups, refreshed when the directory changes
+image_index = ImageIndex(IMAGE_DIR)
+image_index.refresh(force=True)
 
 def get_image_path(product_id: str, index: Optional[int] = None) -> Optional[str]:
     """Find image path for a product ID."""
-    safe_id = sanitize_id(product_id)
-    
-    if index is not None:
-        expected_name = f"{index:05d}_{safe_id}.jpg"
-        path = os.path.join(IMAGE_DIR, expected_name)
-        if os.path.exists(path):
-            return path
-        
-        for ext in [".jpg", ".jpeg", ".png"]:
-            path = os.path.join(IMAGE_DIR, f"{index:05d}_{safe_id}{ext}")
-            if os.path.exists(path):
-                return path
-        
-        prefix = f"{index:05d}_"
-        if os.path.exists(IMAGE_DIR):
-            for fname in os.listdir(IMAGE_DIR):
-                if fname.startswith(prefix) and fname.lower().endswith((".jpg", ".jpeg", ".png")):
-                    return os.path.join(IMAGE_DIR, fname)
-    
-    if os.path.exists(IMAGE_DIR):
-        for fname in os.listdir(IMAGE_DIR):
-            if safe_id in fname and fname.lower().endswith((".jpg", ".jpeg", ".png")):
-                return os.path.join(IMAGE_DIR, fname)
-    
-    return None
+    return image_index.lookup(product_id, index)
 
-# --- INSTANTIATE COMPONENTS ---
-# Updated: No device arg, no enable_fallback arg needed
-detector = ClipColorDetector() 
+# Hot product images kept in memory (bytes bound, LRU)
+image_cache = HotImageCache(max_bytes=int(os.getenv("IMAGE_CACHE_BYTES", str(64 * 1024 ** 2))))
+# Images can be replaced by a pipeline re-run, so clients revalidate hourly
+IMAGE_CACHE_CONTROL = "public, max-age=3600"
 
-agent = ColorMatchAgent(
-    openai_api_key=os.getenv("OPENAI_API_KEY"),
-)
+# Thumbnails of an unchanged image never change; revalidate with the ETag after that
+THUMBNAIL_CACHE_CONTROL = "public, max-age=604800, stale-while-revalidate=86400"
+
+# Response header reporting whether detection was served from the cache
+DETECTION_CACHE_HEADER = "X-Detection-Cache"
+# Response header with the image bytes uploaded to GPT Vision (0 if none)
+VISION_BYTES_HEADER = "X-Vision-Bytes-Sent"
+
+def vision_bytes_sent(result: dict, cache_status: str) -> str:
+    payload = result.get("payload") or {}
+    return str(payload.get("bytes_sent", 0) if cache_status != "hit" else 0)
 
 @app.get("/health")
 def health():
-    return {"status": "ok", "mode": "gpt-vision-only"}
+    """Liveness: the process answers (no component is built or checked)."""
+    return {"status": "ok", "backend": DETECTOR_BACKEND}
+
+@app.get("/ready")
+def ready(response: Response):
+    """
+    Readiness: 200 once the detector and agent are built, 503 while they
+    are pending (warm-up) or cannot be built (e.g. no OPENAI_API_KEY).
+    """
+    components = {
+        name: "ready"
+        if name in _components
+        else ("error" if name in _component_errors else "pending")
+        for name in _COMPONENT_BUILDERS
+    }
+    is_ready = all(state == "ready" for state in components.values())
+    if not is_ready:
+        response.status_code = 503
+    return {
+        "status": "ready" if is_ready else "not ready",
+        "components": components,
+        "errors": dict(_component_errors),
+        "uptime_seconds": round(time.monotonic() - _started_at, 1),
+    }
+
+@app.exception_handler(RateLimitExhausted)
+def rate_limited(request, exc: RateLimitExhausted):
+    # Surface throttling instead of answering with a false "Mismatch"
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, int(round(exc.retry_after))))},
+    )
+
+@app.get("/rate-limit")
+def rate_limit_stats():
+    """Shared OpenAI limiter state (queue depth, effective rates, 429 count)."""
+    return get_shared_limiter().stats()
 
 @app.get("/image/{product_id}")
-def get_product_image(product_id: str, index: Optional[int] = Query(None)):
+def get_product_image(
+    request: Request, product_id: str, index: Optional[int] = Query(None)
+):
     img_path = get_image_path(product_id, index)
     
     if img_path is None or not os.path.exists(img_path):
@@ -348,73 +511,359 @@ def get_product_image(product_id: str, index: Optional[int] = Query(None)):
     
     ext = os.path.splitext(img_path)[1].lower()
     media_type = "image/jpeg" if ext in [".jpg", ".jpeg"] else "image/png"
-    
-    return FileResponse(img_path, media_type=media_type)
 
-@app.get("/dataset")
-def get_dataset():
-    if not os.path.exists(OUTPUT_CSV_PATH):
+    mtime = os.path.getmtime(img_path)
+    headers = {
+        "Last-Modified": http_date(mtime),
+        "Cache-Control": IMAGE_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+
+    # Known ETag: a revalidation is answered without reading the file
+    etag = image_cache.validator(img_path)
+    body = None
+    if etag is None:
+        body, etag = image_cache.read(img_path)
+    headers["ETag"] = etag
+    if is_not_modified(request.headers, etag, mtime):
+        image_cache.record(not_modified=True)
+        return Response(status_code=304, headers=headers)
+    if body is None:
+        body, headers["ETag"] = image_cache.read(img_path)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and if_range and if_range not in (headers["ETag"], headers["Last-Modified"]):
+        # The client's partial copy is outdated: send the whole image
+        range_header = None
+    try:
+        byte_range = parse_range(range_header, len(body))
+    except ValueError:
+        return Response(
+            status_code=416, headers={**headers, "Content-Range": f"bytes */{len(body)}"}
+        )
+    if byte_range is not None:
+        start, end = byte_range
+        image_cache.record(partial=True)
+        return Response(
+            content=body[start:end + 1],
+            status_code=206,
+            media_type=media_type,
+            headers={**headers, "Content-Range": f"bytes {start}-{end}/{len(body)}"},
+        )
+
+    return Response(content=body, media_type=media_type, headers=headers)
+
+@app.get("/image-cache/stats")
+def image_cache_stats():
+    """In-memory image cache: entries, bytes, hit rate, 304 and 206 counts."""
+    return image_cache.stats()
+
+@app.get("/thumbnail/{product_id}")
+def get_product_thumbnail(
+    request: Request,
+    product_id: str,
+    index: Optional[int] = Query(None),
+    size: Optional[int] = Query(
+        None, ge=1, description=f"Longest edge; snapped to one of {list(THUMBNAIL_SIZES)}"
+    ),
+):
+    """WebP thumbnail of a product image (generated on first request)."""
+    img_path = get_image_path(product_id, index)
+
+    if img_path is None or not os.path.exists(img_path):
         raise HTTPException(
             status_code=404,
-            detail=f"Output CSV not found at: {OUTPUT_CSV_PATH}",
+            detail=f"Image not found for product ID: {product_id}",
         )
 
-    df = pd.read_csv(OUTPUT_CSV_PATH)
+    try:
+        thumb_path, version = get_thumbnail_store().get(img_path, size)
+    except OSError as e:
+        raise HTTPException(status_code=422, detail=f"Could not read image: {e}")
 
-    if df.empty:
+    mtime = os.path.getmtime(thumb_path)
+    headers = {
+        "ETag": f'"{version}"',
+        "Last-Modified": http_date(mtime),
+        "Cache-Control": THUMBNAIL_CACHE_CONTROL,
+    }
+    if is_not_modified(request.headers, headers["ETag"], mtime):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(thumb_path, media_type="image/webp", headers=headers)
+
+@app.get("/thumbnail-stats")
+def thumbnail_stats():
+    """Thumbnails built and served since startup."""
+    return get_thumbnail_store().stats()
+
+def _load_dataset_store() -> DatasetStore:
+    """Refresh the store from the output CSV and validate it."""
+    if not dataset_store.refresh():
+        raise HTTPException(
+            status_code=404,
+            detail=f"Output CSV not found at: {OUTPUT_CSV_PATH}",
+        )
+
+    if dataset_store.row_count == 0:
         raise HTTPException(
             status_code=400,
             detail="Dataset is empty.",
         )
 
-    color_col = next(
-        (c for c in COLOR_COLUMN_CANDIDATES if c in df.columns),
-        None,
-    )
-    if color_col is None:
+    if dataset_store.color_column is None:
         raise HTTPException(
             status_code=400,
             detail="Could not find a color column.",
         )
+    return dataset_store
+
+def _dataset_filters(
+    store: DatasetStore,
+    verdict: Optional[str],
+    article_type: Optional[str],
+    color: Optional[str],
+    detected_color: Optional[str],
+) -> dict:
+    return {
+        "Verdict": verdict,
+        "articleType": article_type,
+        store.color_column: color,
+        "detected_color": detected_color,
+    }
 
-    name_col = next(
-        (c for c in NAME_COLUMN_CANDIDATES if c in df.columns),
-        None,
-    )
+def _split_columns(raw: Optional[str]) -> List[str]:
+    return [c.strip() for c in raw.split(",") if c.strip()] if raw else []
+
+def _not_modified(request: Request, etag: str) -> Optional[Response]:
+    # Same If-None-Match rules (lists, W/, *) as the image endpoints
+    mtime = os.path.getmtime(OUTPUT_CSV_PATH)
+    if is_not_modified(request.headers, etag, mtime):
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
 
-    records = df.where(pd.notnull(df), None).to_dict(orient="records")
+@app.get("/dataset")
+def get_dataset(
+    request: Request,
+    response: Response,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(
+        None, ge=1, le=1000, description="Page size (default: every row from offset)"
+    ),
+    verdict: Optional[str] = Query(None),
+    article_type: Optional[str] = Query(None),
+    color: Optional[str] = Query(None, description="Expected (catalog) color"),
+    detected_color: Optional[str] = Query(None),
+    columns: Optional[str] = Query(None, description="Comma-separated columns to return"),
+):
+    store = _load_dataset_store()
+    filters = _dataset_filters(store, verdict, article_type, color, detected_color)
+    projection = _split_columns(columns)
+
+    etag = store.etag("rows", filters, projection, offset, limit)
+    not_modified = _not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
 
+    try:
+        page = store.query(filters, columns=projection, offset=offset, limit=limit)
+    except KeyError as exc:
+        raise HTTPException(status_code=400, detail=f"Unknown column: {exc.args[0]}")
+
+    response.headers["ETag"] = etag
     return {
-        "rows": records,
-        "color_column": color_col,
-        "name_column": name_col,
+        **page,
+        "color_column": store.color_column,
+        "name_column": store.name_column,
     }
 
+@app.get("/dataset/counts")
+def get_dataset_counts(
+    request: Request,
+    response: Response,
+    group_by: str = Query("Verdict", description="Comma-separated columns to count by"),
+    verdict: Optional[str] = Query(None),
+    article_type: Optional[str] = Query(None),
+    color: Optional[str] = Query(None, description="Expected (catalog) color"),
+    detected_color: Optional[str] = Query(None),
+):
+    store = _load_dataset_store()
+    filters = _dataset_filters(store, verdict, article_type, color, detected_color)
+    group_columns = _split_columns(group_by)
+
+    etag = store.etag("counts", filters, group_columns)
+    not_modified = _not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+
+    try:
+        counts = store.counts(filters, group_by=group_columns)
+    except KeyError as exc:
+        raise HTTPException(status_code=400, detail=f"Unknown column: {exc.args[0]}")
+
+    response.headers["ETag"] = etag
+    return counts
+
 @app.post("/detect-color")
 async def detect_color(
+    response: Response,
     file: UploadFile = File(...),
     top_k: int = Form(3),
     confidence_threshold: float = Form(0.25),
+    backend: Optional[str] = Form(None),
 ):
+    detector = await aget_detector()
     img_bytes = await file.read()
-    image = Image.open(io.BytesIO(img_bytes)).convert("RGB")
+    # Decoding is CPU work: keep it off the event loop
+    image = await asyncio.to_thread(
+        decode_image, img_bytes, max_edge=detector.preprocessor.max_edge
+    )
 
     # Call detector (arguments ignored by GPT impl but passed for safety)
-    result = detector.detect_color(
-        image=image,
-        candidate_colors=None,
-        top_k=top_k,
-        confidence_threshold=confidence_threshold,
-    )
+    try:
+        result, cache_status = await detector.adetect_color_with_status(
+            image=image,
+            candidate_colors=None,
+            top_k=top_k,
+            backend=backend,
+            source_bytes=img_bytes,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
 
+    response.headers[DETECTION_CACHE_HEADER] = cache_status
+    response.headers[VISION_BYTES_HEADER] = vision_bytes_sent(result, cache_status)
     return result
 
+def _process_batch_item(item: dict, backend: Optional[str], top_k: int, fused: bool) -> dict:
+    """Detect (and match, if an expected color is given) one batch item."""
+    data = item.get("data")
+    if data is None:
+        check_cancelled(item)
+        data = get_batch_downloader().fetch_bytes(item["url"])
+        if data is None:
+            raise ValueError(f"Could not download image: {item['url']}")
+    detector = get_detector()
+    image = decode_image(data, max_edge=detector.preprocessor.max_edge)
+    expected_color = item.get("expected_color")
+
+    det, verdict = None, None
+    check_cancelled(item)
+    if fused and expected_color:
+        det, cache_status = detector.detect_and_match_with_status(
+            image=image, expected_color=expected_color, source_bytes=data
+        )
+        verdict = det.get("verdict")
+        if det.get("fallback_model") == "error":
+            # Fused call failed: detect plainly before asking the agent
+            det = None
+    if det is None:
+        check_cancelled(item)
+        det, cache_status = detector.detect_color_with_status(
+            image=image, top_k=top_k, backend=backend, source_bytes=data
+        )
+    if verdict is None and expected_color and det.get("fallback_model") != "error":
+        check_cancelled(item)
+        verdict = get_agent().get_verdict(expected_color, det["detected_color"])
+
+    result = {"detection": det, "cache": cache_status}
+    if expected_color:
+        result["expected_color"] = expected_color
+        result["verdict"] = verdict
+    return result
+
+# Batch uploads are read in chunks of this size against MAX_BATCH_BYTES
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+async def _read_uploads(uploads: List[UploadFile], limit: int = MAX_BATCH_BYTES) -> List[bytes]:
+    """Read upload bodies in chunks; 413 as soon as their total passes `limit`."""
+    bodies, total = [], 0
+    for upload in uploads:
+        chunks = []
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            total += len(chunk)
+            if total > limit:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Batch exceeds the limit of {limit} bytes of images.",
+                )
+            chunks.append(chunk)
+        bodies.append(b"".join(chunks))
+    return bodies
+
+@app.post("/detect-color/batch")
+async def detect_color_batch(
+    files: Optional[List[UploadFile]] = File(None),
+    archive: Optional[UploadFile] = File(None, description="Zip file of images"),
+    urls: Optional[str] = Form(
+        None, description='JSON list of URLs or {"url", "expected_color", "id"} objects'
+    ),
+    expected_colors: Optional[str] = Form(
+        None, description="JSON list (upload order) or object (file name -> color)"
+    ),
+    backend: Optional[str] = Form(None),
+    top_k: int = Form(3),
+    fused: bool = Form(False),
+    concurrency: int = Form(8),
+    deadline_seconds: float = Form(60.0),
+):
+    """
+    Detect many images in one request. Results stream back as NDJSON, one
+    line per image as it completes, followed by a summary line.
+    """
+    await aget_detector()
+    from src.clip_color_detector import DETECTOR_BACKENDS
+
+    if backend is not None and backend not in DETECTOR_BACKENDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown detector backend '{backend}'. "
+            f"Expected one of: {', '.join(DETECTOR_BACKENDS)}.",
+        )
+    if fused and backend not in (None, "gpt"):
+        raise HTTPException(status_code=400, detail="Fused mode requires the 'gpt' backend.")
+
+    uploads = list(files or [])
+    bodies = await _read_uploads(uploads + ([archive] if archive is not None else []))
+    try:
+        url_items = json.loads(urls) if urls else None
+        expected = json.loads(expected_colors) if expected_colors else None
+        items = collect_batch_items(
+            files=[
+                (f.filename or f"file_{n}", body)
+                for n, (f, body) in enumerate(zip(uploads, bodies))
+            ],
+            archive=bodies[-1] if archive is not None else None,
+            url_items=url_items,
+            expected_colors=expected,
+        )
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if any(item["expected_color"] for item in items):
+        # Only matching needs the agent: a detection-only batch works
+        # without it (e.g. local backend, no OPENAI_API_KEY)
+        await aget_agent()
+
+    return StreamingResponse(
+        stream_batch(
+            items,
+            lambda item: _process_batch_item(item, backend, top_k, fused),
+            concurrency=concurrency,
+            deadline_seconds=deadline_seconds,
+        ),
+        media_type="application/x-ndjson",
+    )
+
 @app.post("/match-color")
 async def match_color(
     expected_color: str = Form(...),
     detected_color: str = Form(...),
 ):
-    verdict = agent.get_verdict(expected_color, detected_color)
+    agent = await aget_agent()
+    verdict = await agent.aget_verdict(expected_color, detected_color)
     return {
         "expected_color": expected_color,
         "detected_color": detected_color,
@@ -423,34 +872,97 @@ async def match_color(
 
 @app.post("/detect-and-match")
 async def detect_and_match(
+    response: Response,
     file: UploadFile = File(...),
     expected_color: str = Form(...),
+    backend: Optional[str] = Form(None),
+    fused: bool = Form(False),
 ):
+    detector = await aget_detector()
     img_bytes = await file.read()
-    image = Image.open(io.BytesIO(img_bytes)).convert("RGB")
-
-    det = detector.detect_color(image=image)
-
-    verdict = agent.get_verdict(
-        expected_color=expected_color,
-        detected_color=det["detected_color"],
+    # Decoding is CPU work: keep it off the event loop
+    image = await asyncio.to_thread(
+        decode_image, img_bytes, max_edge=detector.preprocessor.max_edge
     )
 
+    if fused:
+        if backend not in (None, "gpt"):
+            raise HTTPException(status_code=400, detail="Fused mode requires the 'gpt' backend.")
+        # One GPT Vision call returns color, verdict and reason
+        try:
+            det, cache_status = await detector.adetect_and_match_with_status(
+                image=image, expected_color=expected_color, source_bytes=img_bytes
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        if det.get("fallback_model") != "error":
+            response.headers[DETECTION_CACHE_HEADER] = cache_status
+            response.headers[VISION_BYTES_HEADER] = vision_bytes_sent(det, cache_status)
+            verdict = det.get("verdict")
+            if verdict is None:
+                # Unparseable verdict: the agent judges the detected color
+                agent = await aget_agent()
+                verdict = await agent.aget_verdict(expected_color, det["detected_color"])
+            return {
+                "detection": det,
+                "expected_color": expected_color,
+                "verdict": verdict,
+                "mode": "fused",
+            }
+        # Fused call failed: there is no color to judge yet, fall back
+        # to plain detection and the agent below
+
+    try:
+        det, cache_status = await detector.adetect_color_with_status(
+            image=image, backend=backend, source_bytes=img_bytes
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    response.headers[DETECTION_CACHE_HEADER] = cache_status
+    response.headers[VISION_BYTES_HEADER] = vision_bytes_sent(det, cache_status)
+
+    verdict = None
+    if det.get("fallback_model") != "error":
+        agent = await aget_agent()
+        verdict = await agent.aget_verdict(
+            expected_color=expected_color,
+            detected_color=det["detected_color"],
+        )
+
     return {
         "detection": det,
         "expected_color": expected_color,
         "verdict": verdict,
+        "mode": "two-step",
     }
 
+@app.get("/")
+def home():
+    return {"message": "Server is running! Go to /docs to test the API."}
+
 if __name__ == "__main__":
-    uvicorn.run(
-        "fastapi_app:app",
-        host="0.0.0.0",
-        port=8020,
-        reload=True
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Product color detection API server.")
+    parser.add_argument(
+        "--profile-imports",
+        action="store_true",
+        help="Print an import-time profile of this module (python -X importtime) and exit.",
     )
+    parser.add_argument("--top", type=int, default=20, help="Rows per profile table.")
+    cli_args = parser.parse_args()
 
+    if cli_args.profile_imports:
+        from src.import_profile import print_import_report
+
+        print_import_report("fastapi_app", top=cli_args.top)
+    else:
+        import uvicorn
+
+        uvicorn.run(
+            "fastapi_app:app",
+            host="0.0.0.0",
+            port=8020,
+            reload=True
+        )
 
-@app.get("/")
-def home():
-    return {"message": "Server is running! Go to /docs to test the API."}
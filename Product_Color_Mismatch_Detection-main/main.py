@@ -69,16 +69,29 @@
 
 
 import argparse
+import os
+import sys
+from typing import List, Optional
 
 from src.config_loader import load_settings
-from src.clip_color_detector import ClipColorDetector
-from src.color_match_agent import ColorMatchAgent
+from src.clip_color_detector import DETECTOR_BACKENDS, ClipColorDetector
+from src.clip_embedding_detector import ClipEmbeddingDetector
+from src.detection_cache import DEFAULT_DETECTION_CACHE_PATH, DetectionCache
+from src.delta import DeltaBaseline
+from src.detector_cascade import CascadeConfig, DetectorCascade
+from src.color_match_agent import DEFAULT_VERDICT_BATCH_SIZE, ColorMatchAgent
 from src.hf_pipeline import process_hf_dataset
+from src.openai_limiter import configure_shared_limiter
+from src.perceptual_verdict import PerceptualVerdictEngine
+from src.reverdict import reverdict_csv
+from src.verdict_cache import DEFAULT_VERDICT_CACHE_PATH, VerdictCache
+from src.vision_payload import VISION_DETAILS, VisionPreprocessor
 
-def parse_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(
-        description="Product Color Mismatch Identification using GPT-Vision (No CLIP) on HF dataset."
-    )
+# Sub-commands; without one, "run" is assumed (backward compatible CLI).
+COMMANDS = ("run", "reverdict")
+
+
+def _add_run_arguments(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
         "--output-csv",
         type=str,
@@ -91,16 +104,296 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="Optional: maximum number of HF rows to process (for quick tests).",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Stream the HF dataset instead of downloading the whole split first.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume an interrupted run, skipping rows already written to --output-csv.",
+    )
+    parser.add_argument(
+        "--baseline",
+        type=str,
+        default=None,
+        help="Previous output CSV: unchanged rows (same id, image and catalog color) "
+        "reuse its results; only new or changed rows are processed.",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=100,
+        help="Rows per checkpoint (results are appended to the output CSV in chunks).",
+    )
+    parser.add_argument(
+        "--detect-workers",
+        type=int,
+        default=1,
+        help="Concurrent color detection calls (raise for the network-bound gpt backend).",
+    )
+    parser.add_argument(
+        "--save-workers",
+        type=int,
+        default=2,
+        help="Threads saving dataset images to disk.",
+    )
+    parser.add_argument(
+        "--openai-rpm",
+        type=float,
+        default=None,
+        help="OpenAI requests/minute budget shared by detection and verdicts (default: $OPENAI_RPM or 500).",
+    )
+    parser.add_argument(
+        "--openai-tpm",
+        type=float,
+        default=None,
+        help="OpenAI tokens/minute budget (default: $OPENAI_TPM or 200000).",
+    )
+    parser.add_argument(
+        "--fused",
+        action="store_true",
+        help="Detect color and decide the verdict in one GPT Vision call per product.",
+    )
+    parser.add_argument(
+        "--vision-max-edge",
+        type=int,
+        default=512,
+        help="Longest edge (px) of images uploaded to GPT Vision after cropping.",
+    )
+    parser.add_argument(
+        "--vision-max-bytes",
+        type=int,
+        default=150_000,
+        help="Byte budget per uploaded image (quality, then size, is reduced to fit).",
+    )
+    parser.add_argument(
+        "--vision-format",
+        type=str,
+        choices=["JPEG", "WEBP"],
+        default="JPEG",
+        help="Encoding of images uploaded to GPT Vision.",
+    )
+    parser.add_argument(
+        "--vision-detail",
+        type=str,
+        choices=VISION_DETAILS,
+        default="low",
+        help="OpenAI image detail level ('low' = flat 85 tokens per image).",
+    )
+    parser.add_argument(
+        "--detector-backend",
+        type=str,
+        choices=DETECTOR_BACKENDS,
+        default="gpt",
+        help=(
+            "Color detection backend: 'gpt' (GPT Vision), 'local' (NumPy, no network) "
+            "or 'clip' (local CLIP model, requires torch + transformers)."
+        ),
+    )
+    parser.add_argument(
+        "--cascade",
+        action="store_true",
+        help=(
+            "Try the cheapest detector first (local -> clip -> gpt) and escalate only on "
+            "low confidence; thresholds and budgets come from 'cascade' in config.yml."
+        ),
+    )
+    parser.add_argument(
+        "--clip-batch-size",
+        type=int,
+        default=16,
+        help=(
+            "Images per CLIP forward pass; the detect stage batches queued "
+            "images up to this size (clip backend only)."
+        ),
+    )
+    parser.add_argument(
+        "--torch-threads",
+        type=int,
+        default=None,
+        help="Optional: torch.set_num_threads value for the clip backend.",
+    )
+    parser.add_argument(
+        "--detection-cache",
+        type=str,
+        default=DEFAULT_DETECTION_CACHE_PATH,
+        help="SQLite file caching detection results by image content hash.",
+    )
+    parser.add_argument(
+        "--no-detection-cache",
+        action="store_true",
+        help="Disable the detection result cache.",
+    )
+    parser.add_argument(
+        "--perceptual-verdicts",
+        action="store_true",
+        help=(
+            "Decide verdicts by CIEDE2000 color distance and color family; only "
+            "unknown names and near-threshold pairs go to the LLM."
+        ),
+    )
+    parser.add_argument(
+        "--verdict-cache",
+        type=str,
+        default=DEFAULT_VERDICT_CACHE_PATH,
+        help="SQLite file used to memoize Match/Mismatch verdicts across runs.",
+    )
+    parser.add_argument(
+        "--no-verdict-cache",
+        action="store_true",
+        help="Disable the persistent verdict cache.",
+    )
 
-def main() -> None:
-    args = parse_args()
+
+def _add_reverdict_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--input-csv",
+        type=str,
+        required=True,
+        help="Existing output CSV (catalog color, detected_color, Verdict columns).",
+    )
+    parser.add_argument(
+        "--output-csv",
+        type=str,
+        default=None,
+        help="Where to write the re-verdicted CSV (default: replace --input-csv).",
+    )
+    parser.add_argument(
+        "--color-column",
+        type=str,
+        default=None,
+        help="Catalog color column (default: baseColour / base_colour / color / colour).",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_VERDICT_BATCH_SIZE,
+        help="Unique color pairs per batched LLM call.",
+    )
+    parser.add_argument(
+        "--perceptual-verdicts",
+        action="store_true",
+        help="Decide pairs by color distance first; only ambiguous pairs go to the LLM.",
+    )
+    parser.add_argument(
+        "--verdict-cache",
+        type=str,
+        default=DEFAULT_VERDICT_CACHE_PATH,
+        help="SQLite file used to memoize Match/Mismatch verdicts across runs.",
+    )
+    parser.add_argument(
+        "--no-verdict-cache",
+        action="store_true",
+        help="Disable the persistent verdict cache.",
+    )
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Product Color Mismatch Identification using GPT-Vision or local detectors on HF dataset."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    _add_run_arguments(
+        commands.add_parser(
+            "run", help="Detect colors and decide verdicts for the HF dataset (default)."
+        )
+    )
+    _add_reverdict_arguments(
+        commands.add_parser(
+            "reverdict",
+            help="Recompute the Verdict column of an existing output CSV (no detection).",
+        )
+    )
+
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] not in COMMANDS + ("-h", "--help"):
+        # `python main.py --output-csv ...` keeps working
+        argv.insert(0, "run")
+    return parser.parse_args(argv)
+
+
+def reverdict(args: argparse.Namespace) -> None:
+    settings = load_settings("config.yml")
+    if not settings.openai_api_key and not args.perceptual_verdicts:
+        raise SystemExit(
+            "[ERROR] reverdict needs an OpenAI API key (or --perceptual-verdicts)."
+        )
+    verdict_cache = None if args.no_verdict_cache else VerdictCache(args.verdict_cache)
+    color_agent = None
+    if settings.openai_api_key:
+        color_agent = ColorMatchAgent(
+            openai_api_key=settings.openai_api_key,
+            cache=verdict_cache,
+        )
+    else:
+        print("[INFO] No OpenAI API key: ambiguous pairs are decided by color distance alone.")
+    resolver = (
+        PerceptualVerdictEngine(agent=color_agent) if args.perceptual_verdicts else color_agent
+    )
+
+    reverdict_csv(
+        args.input_csv,
+        resolver,
+        output_csv=args.output_csv,
+        color_column=args.color_column,
+        batch_size=args.batch_size,
+    )
+
+    if args.perceptual_verdicts:
+        print(f"[INFO] Perceptual verdicts: {resolver.stats()}")
+    if verdict_cache is not None:
+        print(f"[INFO] Verdict cache stats: {verdict_cache.stats()}")
+
+
+def run(args: argparse.Namespace) -> None:
     settings = load_settings("config.yml")
+    if args.cascade and args.fused:
+        raise SystemExit("--cascade and --fused cannot be combined.")
+    if (
+        args.baseline
+        and args.resume
+        and os.path.abspath(args.baseline) == os.path.abspath(args.output_csv)
+    ):
+        raise SystemExit("--resume cannot use --output-csv as its own --baseline.")
+
+    # One RPM/TPM budget for every OpenAI call in this process
+    configure_shared_limiter(rpm=args.openai_rpm, tpm=args.openai_tpm)
 
     # Updated initialization: No device argument
-    clip_detector = ClipColorDetector() 
+    detection_cache = None if args.no_detection_cache else DetectionCache(args.detection_cache)
+    clip_detector = ClipColorDetector(
+        # The cascade picks the backend per call; GPT is optional there
+        default_backend="local" if args.cascade else args.detector_backend,
+        cache=detection_cache,
+        preprocessor=VisionPreprocessor(
+            max_edge=args.vision_max_edge,
+            max_bytes=args.vision_max_bytes,
+            image_format=args.vision_format,
+            detail=args.vision_detail,
+        ),
+        clip_detector=ClipEmbeddingDetector(
+            batch_size=args.clip_batch_size,
+            num_threads=args.torch_threads,
+        ),
+    )
     
-    color_agent = ColorMatchAgent(openai_api_key=settings.openai_api_key)
+    cascade = (
+        DetectorCascade(clip_detector, CascadeConfig.from_dict(settings.cascade))
+        if args.cascade
+        else None
+    )
+
+    verdict_cache = None if args.no_verdict_cache else VerdictCache(args.verdict_cache)
+    color_agent = ColorMatchAgent(
+        openai_api_key=settings.openai_api_key,
+        cache=verdict_cache,
+    )
+
+    verdict_engine = (
+        PerceptualVerdictEngine(agent=color_agent) if args.perceptual_verdicts else None
+    )
 
     process_hf_dataset(
         output_csv=args.output_csv,
@@ -108,7 +401,35 @@ def main() -> None:
         color_agent=color_agent,
         limit=args.limit,
         image_dir="data/images",
+        chunk_size=args.chunk_size,
+        resume=args.resume,
+        streaming=args.streaming,
+        save_workers=args.save_workers,
+        detect_workers=args.detect_workers,
+        fused=args.fused,
+        cascade=cascade,
+        verdict_engine=verdict_engine,
+        detect_batch_size=args.clip_batch_size,
+        # Read before the run replaces the output (it may be the same file)
+        baseline=DeltaBaseline(args.baseline) if args.baseline else None,
     )
 
+    if cascade is not None:
+        print(f"[INFO] Detector cascade stats: {cascade.stats()}")
+    print(f"[INFO] GPT Vision payload stats: {clip_detector.payload_stats()}")
+    if detection_cache is not None:
+        print(f"[INFO] Detection cache stats: {detection_cache.stats()}")
+    if verdict_cache is not None:
+        print(f"[INFO] Verdict cache stats: {verdict_cache.stats()}")
+
+
+def main() -> None:
+    args = parse_args()
+    if args.command == "reverdict":
+        reverdict(args)
+    else:
+        run(args)
+
+
 if __name__ == "__main__":
     main()
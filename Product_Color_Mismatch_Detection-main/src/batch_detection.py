@@ -0,0 +1,234 @@
+import asyncio
+import io
+import json
+import os
+import threading
+import time
+import zipfile
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+
+# Upper bounds protecting the server from oversized batches.
+MAX_BATCH_ITEMS = 500
+MAX_ZIP_MEMBER_BYTES = 25 * 1024 * 1024
+MAX_BATCH_BYTES = 200 * 1024 * 1024
+MAX_BATCH_CONCURRENCY = 32
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp")
+
+
+class BatchCancelled(Exception):
+    """Raised by :func:`check_cancelled` once an item's batch is over."""
+
+
+def check_cancelled(item: Dict[str, Any]) -> None:
+    """
+    Stop a work item whose batch hit its deadline or lost its client.
+
+    `process_item` functions call this before every network request, so
+    threads still running after a timeout do not spend download or
+    OpenAI budget on results nobody will receive.
+
+    Raises
+    ------
+    BatchCancelled
+        If the item's batch has been cancelled.
+    """
+    cancelled = item.get("cancelled")
+    if cancelled is not None and cancelled.is_set():
+        raise BatchCancelled(f"Batch item {item.get('index')} cancelled.")
+
+
+def _expected_for(
+    expected_colors: Union[Dict[str, str], List[str], None],
+    position: int,
+    name: str,
+) -> Optional[str]:
+    """Expected color for an item, from a positional list or a name mapping."""
+    if isinstance(expected_colors, dict):
+        value = expected_colors.get(name, expected_colors.get(os.path.basename(name)))
+    elif isinstance(expected_colors, list) and position < len(expected_colors):
+        value = expected_colors[position]
+    else:
+        value = None
+    return str(value).strip() if value not in (None, "") else None
+
+
+def collect_batch_items(
+    files: Sequence[Tuple[str, bytes]] = (),
+    archive: Optional[bytes] = None,
+    url_items: Optional[List[Any]] = None,
+    expected_colors: Union[Dict[str, str], List[str], None] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Normalize the three batch input forms into one list of work items.
+
+    Parameters
+    ----------
+    files : sequence of (name, bytes)
+        Uploaded image files.
+    archive : bytes, optional
+        A zip file of images (non-image members are skipped).
+    url_items : list, optional
+        URLs, or objects ``{"url", "expected_color", "id"}``.
+    expected_colors : list or dict, optional
+        Expected colors for uploaded/zipped images: a list aligned with
+        the order of the images, or a mapping of file name -> color.
+
+    Returns
+    -------
+    list[dict]
+        Items with ``index``, ``name``, ``expected_color`` and either
+        ``data`` (image bytes) or ``url``.
+
+    Raises
+    ------
+    ValueError
+        If the input is malformed or exceeds the batch limits (item count,
+        per-member size, or ``MAX_BATCH_BYTES`` of image data in total).
+    """
+    items: List[Dict[str, Any]] = []
+    total_bytes = sum(len(data) for _, data in files)
+    if total_bytes > MAX_BATCH_BYTES:
+        raise ValueError(f"Batch exceeds the limit of {MAX_BATCH_BYTES} bytes of images.")
+
+    def _add(item: Dict[str, Any]) -> None:
+        if len(items) >= MAX_BATCH_ITEMS:
+            raise ValueError(f"Batch exceeds the limit of {MAX_BATCH_ITEMS} images.")
+        item["index"] = len(items)
+        items.append(item)
+
+    uploads: List[Tuple[str, bytes]] = list(files)
+    if archive is not None:
+        try:
+            with zipfile.ZipFile(io.BytesIO(archive)) as zf:
+                for info in zf.infolist():
+                    if info.is_dir() or not info.filename.lower().endswith(IMAGE_EXTENSIONS):
+                        continue
+                    if info.file_size > MAX_ZIP_MEMBER_BYTES:
+                        raise ValueError(f"Zip member too large: {info.filename}")
+                    # Declared sizes are checked before anything is inflated
+                    total_bytes += info.file_size
+                    if total_bytes > MAX_BATCH_BYTES:
+                        raise ValueError(
+                            f"Batch exceeds the limit of {MAX_BATCH_BYTES} bytes of images."
+                        )
+                    uploads.append((info.filename, zf.read(info)))
+        except zipfile.BadZipFile as exc:
+            raise ValueError(f"Invalid zip archive: {exc}") from exc
+
+    for position, (name, data) in enumerate(uploads):
+        _add(
+            {
+                "name": name,
+                "data": data,
+                "expected_color": _expected_for(expected_colors, position, name),
+            }
+        )
+
+    for entry in url_items or []:
+        if isinstance(entry, str):
+            entry = {"url": entry}
+        if not isinstance(entry, dict) or not entry.get("url"):
+            raise ValueError(f"Invalid URL item: {entry!r}")
+        expected = entry.get("expected_color")
+        _add(
+            {
+                "name": str(entry.get("id") or entry["url"]),
+                "url": str(entry["url"]),
+                "expected_color": str(expected).strip() if expected else None,
+            }
+        )
+
+    if not items:
+        raise ValueError("No images in the batch (send files, a zip archive or URLs).")
+    return items
+
+
+async def stream_batch(
+    items: List[Dict[str, Any]],
+    process_item: Callable[[Dict[str, Any]], Dict[str, Any]],
+    concurrency: int = 8,
+    deadline_seconds: float = 60.0,
+) -> AsyncIterator[str]:
+    """
+    Run `process_item` over `items` in worker threads and yield NDJSON lines.
+
+    At most `concurrency` items run at once. Each result line is emitted
+    as soon as its item finishes (completion order, tagged with
+    ``index``). Items not finished when the batch deadline expires are
+    reported with status "timeout". A final ``{"summary": ...}`` line
+    closes the stream.
+
+    Every item gets a ``cancelled`` event that is set at the deadline or
+    when the stream is closed early; `process_item` should call
+    :func:`check_cancelled` before network calls, since worker threads
+    cannot be interrupted.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max(1, min(concurrency, MAX_BATCH_CONCURRENCY)))
+    started = loop.time()
+    deadline = started + max(0.0, deadline_seconds)
+    cancelled = threading.Event()
+    for item in items:
+        item["cancelled"] = cancelled
+
+    async def _run(item: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            t0 = time.perf_counter()
+            line: Dict[str, Any] = {"index": item["index"], "name": item["name"]}
+            try:
+                line.update(await asyncio.to_thread(process_item, item))
+                line["status"] = "ok"
+            except Exception as exc:  # noqa: BLE001
+                line["status"] = "error"
+                line["error"] = str(exc)
+            line["elapsed_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+            return line
+
+    tasks = {asyncio.ensure_future(_run(item)): item for item in items}
+    pending = set(tasks)
+    counts = {"ok": 0, "error": 0, "timeout": 0}
+    try:
+        while pending:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                cancelled.set()
+                break
+            done, pending = await asyncio.wait(
+                pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                line = task.result()
+                counts[line["status"]] += 1
+                yield json.dumps(line, default=str) + "\n"
+
+        for task in pending:
+            task.cancel()
+            item = tasks[task]
+            counts["timeout"] += 1
+            yield json.dumps(
+                {
+                    "index": item["index"],
+                    "name": item["name"],
+                    "status": "timeout",
+                    "error": f"Batch deadline of {deadline_seconds}s exceeded.",
+                }
+            ) + "\n"
+        pending = set()
+
+        yield json.dumps(
+            {
+                "summary": {
+                    "items": len(items),
+                    **counts,
+                    "elapsed_ms": round((loop.time() - started) * 1000, 1),
+                }
+            }
+        ) + "\n"
+    finally:
+        # Deadline hit, client went away or the stream was closed early:
+        # threads still running stop at their next check_cancelled()
+        cancelled.set()
+        for task in pending:
+            task.cancel()
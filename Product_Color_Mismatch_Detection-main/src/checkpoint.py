@@ -0,0 +1,150 @@
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+
+def manifest_path_for(output_csv: str) -> str:
+    """Progress manifest stored next to the output CSV."""
+    return f"{output_csv}.progress.json"
+
+
+class RunCheckpoint:
+    """
+    Chunked, resumable CSV writer for the pipelines.
+
+    Result rows are appended to `output_csv` in chunks. After every chunk
+    a progress manifest records the next row index to process and the
+    byte size of the CSV at that point, so a crashed run can resume
+    exactly where the last durable chunk ended (any partially written
+    trailing rows are truncated away).
+    """
+
+    def __init__(
+        self,
+        output_csv: str,
+        columns: Sequence[str],
+        resume: bool = False,
+        source: Optional[str] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        output_csv : str
+            Final output CSV path (appended to while the run progresses).
+        columns : sequence of str
+            Output column order.
+        resume : bool
+            Continue a previous run if its manifest is found; otherwise
+            any existing output is replaced.
+        source : str, optional
+            Identifier of the input (CSV path or dataset name). A resume
+            against a different source is refused.
+        """
+        self.output_csv = output_csv
+        self.manifest_path = manifest_path_for(output_csv)
+        self.columns = list(columns)
+        self.source = source
+        self.next_index = 0
+        self.rows_written = 0
+        self.complete = False
+
+        out_dir = os.path.dirname(os.path.abspath(output_csv))
+        os.makedirs(out_dir, exist_ok=True)
+
+        manifest = self._read_manifest() if resume else None
+        if manifest is not None:
+            self._restore(manifest)
+        else:
+            for path in (self.output_csv, self.manifest_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    # -------------------------------------------------
+    # Internals
+    # -------------------------------------------------
+
+    def _read_manifest(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.manifest_path):
+            print(f"[INFO] No progress manifest at {self.manifest_path}; starting fresh.")
+            return None
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _restore(self, manifest: Dict[str, Any]) -> None:
+        if self.source is not None and manifest.get("source") not in (None, self.source):
+            raise ValueError(
+                f"Cannot resume: manifest belongs to source '{manifest.get('source')}', "
+                f"not '{self.source}'."
+            )
+        if manifest.get("columns") and manifest["columns"] != self.columns:
+            raise ValueError("Cannot resume: output columns differ from the previous run.")
+
+        self.next_index = int(manifest.get("next_index", 0))
+        self.rows_written = int(manifest.get("rows_written", 0))
+        self.complete = bool(manifest.get("complete", False))
+
+        # Drop rows appended after the last durable checkpoint
+        output_bytes = int(manifest.get("output_bytes", 0))
+        if os.path.exists(self.output_csv):
+            with open(self.output_csv, "r+b") as f:
+                f.truncate(output_bytes)
+        print(
+            f"[INFO] Resuming from row {self.next_index} "
+            f"({self.rows_written} rows already written)."
+        )
+
+    def _write_manifest(self) -> None:
+        output_bytes = (
+            os.path.getsize(self.output_csv) if os.path.exists(self.output_csv) else 0
+        )
+        manifest = {
+            "source": self.source,
+            "columns": self.columns,
+            "next_index": self.next_index,
+            "rows_written": self.rows_written,
+            "output_bytes": output_bytes,
+            "complete": self.complete,
+        }
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+
+    # -------------------------------------------------
+    # Public API
+    # -------------------------------------------------
+
+    def append(self, records: List[Dict[str, Any]], next_index: int) -> None:
+        """
+        Durably append a chunk of result rows.
+
+        Parameters
+        ----------
+        records : list[dict]
+            Result rows (keys matching `columns`).
+        next_index : int
+            Index of the first row NOT yet processed after this chunk.
+        """
+        if records:
+            write_header = not os.path.exists(self.output_csv) or (
+                os.path.getsize(self.output_csv) == 0
+            )
+            with open(self.output_csv, "a", encoding="utf-8", newline="") as f:
+                pd.DataFrame(records, columns=self.columns).to_csv(
+                    f, header=write_header, index=False
+                )
+                f.flush()
+                os.fsync(f.fileno())
+            self.rows_written += len(records)
+
+        self.next_index = next_index
+        self._write_manifest()
+
+    def finish(self) -> None:
+        """Mark the run as complete."""
+        self.complete = True
+        self._write_manifest()
@@ -238,15 +238,32 @@
 
 
 
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Sequence, Tuple, Any
+import asyncio
 import os
-import io
-import base64
 import json
+import threading
 
 # Removed torch and transformers imports
 from PIL import Image
 from .color_palette import COLOR_CANDIDATES
+from .local_color_detector import LocalColorDetector
+from .clip_embedding_detector import ClipEmbeddingDetector
+from .detection_cache import (
+    DetectionCache,
+    bytes_fingerprint,
+    image_fingerprint,
+    palette_version,
+)
+from .vision_payload import VisionPreprocessor
+from .verdicts import parse_verdict
+from .openai_limiter import (
+    OpenAIRateLimiter,
+    RateLimitExhausted,
+    estimate_tokens,
+    get_shared_limiter,
+)
+from .openai_http import shared_async_http_client, shared_http_client
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -254,10 +271,17 @@ load_dotenv()
 # GPT Vision
 from langchain_openai import ChatOpenAI
 
+# Selectable detection backends:
+#   "gpt"   - OpenAI GPT Vision (network, per-call cost)
+#   "local" - NumPy k-means in CIELAB on the local CPU (no network)
+#   "clip"  - local CLIP model (optional torch/transformers, no network)
+DETECTOR_BACKENDS = ("gpt", "local", "clip")
+
+
 class ClipColorDetector:
     """
-    Detects dominant color of an image using ONLY OpenAI GPT Vision.
-    (Formerly used CLIP, class name kept for compatibility).
+    Detects dominant color of an image using OpenAI GPT Vision, or one of
+    the local backends (NumPy k-means, CLIP) that need no network.
     """
 
     def __init__(
@@ -265,59 +289,261 @@ class ClipColorDetector:
         # device arg removed as it is not needed for API calls
         gpt_model_name: str = "gpt-4o-mini",
         openai_api_key: Optional[str] = None,
+        default_backend: str = "gpt",
+        local_detector: Optional[LocalColorDetector] = None,
+        clip_detector: Optional[ClipEmbeddingDetector] = None,
+        cache: Optional[DetectionCache] = None,
+        rate_limiter: Optional[OpenAIRateLimiter] = None,
+        preprocessor: Optional[VisionPreprocessor] = None,
     ) -> None:
         """
-        Initialize the GPT Vision client.
+        Initialize the GPT Vision client and the local detectors.
+
+        The OpenAI key is only required when the default backend is "gpt".
+        When a `cache` is given, results are looked up by image content
+        before any backend runs. GPT calls go through `rate_limiter`
+        (the process-wide shared limiter by default). Images are shrunk by
+        `preprocessor` (crop, downscale, compact encode) before upload.
         """
+        if default_backend not in DETECTOR_BACKENDS:
+            raise ValueError(
+                f"Unknown detector backend '{default_backend}'. "
+                f"Expected one of: {', '.join(DETECTOR_BACKENDS)}."
+            )
+        self.default_backend = default_backend
+        self.gpt_model_name = gpt_model_name
+        self.cache = cache
+        self.rate_limiter = rate_limiter or get_shared_limiter()
+        self.preprocessor = preprocessor or VisionPreprocessor()
+        self._payload_lock = threading.Lock()
+        self._payload_totals = {
+            "requests": 0,
+            "bytes_sent": 0,
+            "original_bytes": 0,
+            "image_tokens": 0,
+        }
+        self.local_detector = local_detector or LocalColorDetector()
+        # CLIP weights are only loaded on the first "clip" call
+        self.clip_detector = clip_detector or ClipEmbeddingDetector()
+
         if openai_api_key is None:
             openai_api_key = os.getenv("OPENAI_API_KEY")
 
-        if not openai_api_key:
+        if not openai_api_key and default_backend == "gpt":
             raise ValueError("OPENAI_API_KEY is required.")
 
-        self.llm = ChatOpenAI(
-            model=gpt_model_name,
-            api_key=openai_api_key,
-            temperature=0,
-            max_tokens=100
-        )
+        self.llm = None
+        if openai_api_key:
+            self.llm = ChatOpenAI(
+                model=gpt_model_name,
+                api_key=openai_api_key,
+                temperature=0,
+                max_tokens=100,
+                # 429s and retries are handled by the shared rate limiter
+                max_retries=0,
+                # Keep-alive pools shared with the verdict agent
+                http_client=shared_http_client(),
+                http_async_client=shared_async_http_client(),
+            )
 
     def detect_color(
         self,
         image: Image.Image,
         candidate_colors: Optional[List[str]] = None,
-        top_k: int = 3, # Kept for interface compatibility, though GPT returns one main color
+        top_k: int = 3, # Used by the local backend; GPT returns one main color
         confidence_threshold: float = 0.25, # Kept for compatibility, unused by GPT
         use_fallback_on_failure: bool = True, # Kept for compatibility
+        backend: Optional[str] = None,
+        source_bytes: Optional[bytes] = None,
     ) -> Dict[str, Any]:
         """
-        Detect color using GPT Vision.
+        Detect color using the selected backend ("gpt", "local" or "clip").
+
+        `backend` overrides the detector's default for this call only.
+        `source_bytes` (the original upload) lets the GPT backend send the
+        file unchanged when it is already small enough.
+        """
+        result, _ = self.detect_color_with_status(
+            image,
+            candidate_colors=candidate_colors,
+            top_k=top_k,
+            backend=backend,
+            source_bytes=source_bytes,
+        )
+        return result
+
+    @staticmethod
+    def _fingerprint(image: Image.Image, source_bytes: Optional[bytes]) -> str:
+        # The encoded bytes identify the picture regardless of decode scale
+        if source_bytes is not None:
+            return bytes_fingerprint(source_bytes)
+        return image_fingerprint(image)
+
+    def _cache_key(
+        self,
+        image: Image.Image,
+        backend: str,
+        candidate_colors: List[str],
+        top_k: int,
+        source_bytes: Optional[bytes] = None,
+    ) -> str:
+        if backend == "gpt":
+            # What GPT sees depends on the payload preprocessing; GPT
+            # returns a single color, so top_k does not change the result
+            model = f"{self.gpt_model_name}@{self.preprocessor.signature()}"
+        elif backend == "clip":
+            model = f"{self.clip_detector.model_name}:top{top_k}"
+        else:
+            # The local backends return `top_k` ranked alternatives
+            model = f"kmeans:top{top_k}"
+        return DetectionCache.make_key(
+            self._fingerprint(image, source_bytes),
+            backend,
+            model,
+            palette_version(candidate_colors),
+        )
+
+    def detect_color_with_status(
+        self,
+        image: Image.Image,
+        candidate_colors: Optional[List[str]] = None,
+        top_k: int = 3,
+        backend: Optional[str] = None,
+        source_bytes: Optional[bytes] = None,
+    ) -> Tuple[Dict[str, Any], str]:
+        """
+        Same as :meth:`detect_color`, also returning the detection cache
+        status: "hit", "miss" or "bypass" (no cache configured).
         """
+        candidate_colors, backend = self._resolve(candidate_colors, backend)
+        if self.cache is None:
+            return (
+                self._run_backend(image, candidate_colors, top_k, backend, source_bytes),
+                "bypass",
+            )
+
+        key = self._cache_key(image, backend, candidate_colors, top_k, source_bytes)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached, "hit"
+
+        result = self._run_backend(image, candidate_colors, top_k, backend, source_bytes)
+        if result.get("fallback_model") != "error":
+            self.cache.set(key, result)
+        return result, "miss"
+
+    def _resolve(
+        self, candidate_colors: Optional[List[str]], backend: Optional[str]
+    ) -> Tuple[List[str], str]:
+        """Apply the defaults and validate the backend name."""
         if candidate_colors is None:
             candidate_colors = COLOR_CANDIDATES
 
-        # Convert image to base64
-        buffered = io.BytesIO()
-        # Convert to RGB to ensure PNG save works (handles RGBA/P modes)
-        if image.mode != "RGB":
-            image = image.convert("RGB")
-        image.save(buffered, format="PNG")
-        b64_image = base64.b64encode(buffered.getvalue()).decode("utf-8")
+        backend = backend or self.default_backend
+        if backend not in DETECTOR_BACKENDS:
+            raise ValueError(
+                f"Unknown detector backend '{backend}'. "
+                f"Expected one of: {', '.join(DETECTOR_BACKENDS)}."
+            )
+        return candidate_colors, backend
 
-        prompt = f"""
-        You are a product color classifier.
-        Select the single closest color name for this product from this list:
-        {candidate_colors}
+    def _run_backend(
+        self,
+        image: Image.Image,
+        candidate_colors: List[str],
+        top_k: int,
+        backend: str,
+        source_bytes: Optional[bytes] = None,
+    ) -> Dict[str, Any]:
+        """Run one detection on the given backend, bypassing the cache."""
+        if backend == "local":
+            return self.local_detector.detect_color(
+                image, candidate_colors=candidate_colors, top_k=top_k
+            )
+        if backend == "clip":
+            return self.clip_detector.detect_color(
+                image, candidate_colors=candidate_colors, top_k=top_k
+            )
+        return self._detect_with_gpt(image, candidate_colors, source_bytes)
 
-        You MUST respond ONLY with valid JSON. Do not write markdown blocks (like ```json).
+    def detect_colors(
+        self,
+        images: List[Image.Image],
+        candidate_colors: Optional[List[str]] = None,
+        top_k: int = 3,
+        backend: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        source_bytes: Optional[Sequence[Optional[bytes]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Detect colors for many images. The "clip" backend runs them through
+        the vision tower in batches of `batch_size`; other backends loop.
+        `source_bytes` (aligned with `images`) are the original encoded
+        files, used for cache keys and GPT uploads.
+        """
+        backend = backend or self.default_backend
+        if source_bytes is None:
+            source_bytes = [None] * len(images)
+        if backend == "clip":
+            if candidate_colors is None:
+                candidate_colors = COLOR_CANDIDATES
+            if self.cache is None:
+                return self.clip_detector.detect_colors(
+                    images,
+                    candidate_colors=candidate_colors,
+                    top_k=top_k,
+                    batch_size=batch_size,
+                )
+
+            # Only send cache misses through the vision tower
+            keys = [
+                self._cache_key(img, backend, candidate_colors, top_k, data)
+                for img, data in zip(images, source_bytes)
+            ]
+            results: List[Optional[Dict[str, Any]]] = [self.cache.get(k) for k in keys]
+            missing = [i for i, r in enumerate(results) if r is None]
+            fresh = self.clip_detector.detect_colors(
+                [images[i] for i in missing],
+                candidate_colors=candidate_colors,
+                top_k=top_k,
+                batch_size=batch_size,
+            )
+            for i, result in zip(missing, fresh):
+                self.cache.set(keys[i], result)
+                results[i] = result
+            return results
+        return [
+            self.detect_color(
+                image,
+                candidate_colors=candidate_colors,
+                top_k=top_k,
+                backend=backend,
+                source_bytes=data,
+            )
+            for image, data in zip(images, source_bytes)
+        ]
 
-        JSON schema:
-        {{
-            "detected_color": "<one_of_candidate_list>",
-            "reason": "<short explanation>"
-        }}
+    # -------------------------------------------------
+    # GPT Vision
+    # -------------------------------------------------
+
+    def _build_vision_request(
+        self,
+        prompt: str,
+        image: Image.Image,
+        max_tokens: int,
+        source_bytes: Optional[bytes],
+    ) -> Tuple[list, Dict[str, Any], int]:
         """
+        Prepare the image and build the chat message for one Vision call.
 
+        Returns the message, the payload report and the token estimate
+        used by the rate limiter.
+        """
+        if self.llm is None:
+            raise ValueError("OPENAI_API_KEY is required for the 'gpt' backend.")
+
+        payload = self.preprocessor.prepare(image, source_bytes=source_bytes)
         msg = [
             (
                 "user",
@@ -325,52 +551,426 @@ class ClipColorDetector:
                     {"type": "text", "text": prompt},
                     {
                         "type": "image_url",
-                        "image_url": {"url": f"data:image/png;base64,{b64_image}"},
+                        "image_url": {"url": payload.pop("url"), "detail": payload["detail"]},
                     },
                 ],
             )
         ]
+        estimated = estimate_tokens(prompt, max_output_tokens=max_tokens) + payload["image_tokens"]
+        return msg, payload, estimated
+
+    def _parse_vision_response(self, message: Any, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Record the payload totals and parse the model's JSON answer."""
+        raw = message.content.strip()
+
+        with self._payload_lock:
+            totals = self._payload_totals
+            totals["requests"] += 1
+            totals["bytes_sent"] += payload["bytes_sent"]
+            totals["original_bytes"] += payload["original_bytes"] or 0
+            totals["image_tokens"] += payload["image_tokens"]
+
+        # Clean up markdown formatting if the model accidentally adds it
+        if raw.startswith("```json"):
+            raw = raw.replace("```json", "").replace("```", "")
+        elif raw.startswith("```"):
+            raw = raw.replace("```", "")
+
+        return json.loads(raw)
+
+    @staticmethod
+    def _usage_tokens(message: Any) -> Optional[int]:
+        return (message.usage_metadata or {}).get("total_tokens")
+
+    def _invoke_vision(
+        self,
+        prompt: str,
+        image: Image.Image,
+        max_tokens: int = 100,
+        source_bytes: Optional[bytes] = None,
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Send one prompt + image to GPT Vision and parse its JSON answer.
+
+        Returns the parsed answer and the payload report (bytes sent,
+        dimensions, billed image tokens).
+        """
+        msg, payload, estimated = self._build_vision_request(
+            prompt, image, max_tokens, source_bytes
+        )
+        message = self.rate_limiter.call(
+            lambda: self.llm.invoke(msg),
+            estimated_tokens=estimated,
+            usage=self._usage_tokens,
+        )
+        return self._parse_vision_response(message, payload), payload
+
+    async def _ainvoke_vision(
+        self,
+        prompt: str,
+        image: Image.Image,
+        max_tokens: int = 100,
+        source_bytes: Optional[bytes] = None,
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Async :meth:`_invoke_vision`: the image work runs in a worker
+        thread and the HTTP call is awaited, so the event loop never blocks.
+        """
+        msg, payload, estimated = await asyncio.to_thread(
+            self._build_vision_request, prompt, image, max_tokens, source_bytes
+        )
+        message = await self.rate_limiter.acall(
+            lambda: self.llm.ainvoke(msg),
+            estimated_tokens=estimated,
+            usage=self._usage_tokens,
+        )
+        return self._parse_vision_response(message, payload), payload
+
+    def payload_stats(self) -> Dict[str, int]:
+        """Totals over all GPT Vision requests: count, bytes sent, image tokens."""
+        with self._payload_lock:
+            return dict(self._payload_totals)
+
+    @staticmethod
+    def _match_candidate(detected_color: Any, candidate_colors: List[str]) -> Any:
+        """Snap the model's answer to the candidate spelling (case-insensitive)."""
+        if detected_color not in candidate_colors:
+            for c in candidate_colors:
+                if str(detected_color).lower() == c.lower():
+                    return c
+            # If still not found, keep the raw output
+        return detected_color
+
+    @staticmethod
+    def _error_result(exc: Exception) -> Dict[str, Any]:
+        return {
+            "detected_color": "unknown",
+            "detected_confidence": 0.0,
+            "top_candidates": [],
+            "fallback_model": "error",
+            "error": str(exc)
+        }
+
+    @staticmethod
+    def _detect_prompt(candidate_colors: List[str]) -> str:
+        return f"""
+        You are a product color classifier.
+        Select the single closest color name for this product from this list:
+        {candidate_colors}
+
+        You MUST respond ONLY with valid JSON. Do not write markdown blocks (like ```json).
+
+        JSON schema:
+        {{
+            "detected_color": "<one_of_candidate_list>",
+            "reason": "<short explanation>"
+        }}
+        """
+
+    def _detect_result(
+        self, parsed: Dict[str, Any], payload: Dict[str, Any], candidate_colors: List[str]
+    ) -> Dict[str, Any]:
+        detected_color = self._match_candidate(parsed.get("detected_color"), candidate_colors)
+        return {
+            "detected_color": detected_color,
+            "detected_confidence": 0.95, # GPT doesn't give confidence scores easily
+            "top_candidates": [(detected_color, 1.0)],
+            "fallback_model": "gpt-only",
+            "reason": parsed.get("reason", ""),
+            "payload": payload,
+        }
+
+    def _detect_with_gpt(
+        self,
+        image: Image.Image,
+        candidate_colors: List[str],
+        source_bytes: Optional[bytes] = None,
+    ) -> Dict[str, Any]:
+        """
+        Detect color using GPT Vision.
+        """
+        if self.llm is None:
+            raise ValueError("OPENAI_API_KEY is required for the 'gpt' backend.")
+
+        try:
+            parsed, payload = self._invoke_vision(
+                self._detect_prompt(candidate_colors), image, source_bytes=source_bytes
+            )
+            return self._detect_result(parsed, payload, candidate_colors)
+
+        except RateLimitExhausted:
+            # Never turn throttling into an "unknown" color (and a false Mismatch)
+            raise
+        except Exception as e:
+            print(f"GPT Vision Error: {e}")
+            return self._error_result(e)
+
+    async def _adetect_with_gpt(
+        self,
+        image: Image.Image,
+        candidate_colors: List[str],
+        source_bytes: Optional[bytes] = None,
+    ) -> Dict[str, Any]:
+        """Async :meth:`_detect_with_gpt`."""
+        if self.llm is None:
+            raise ValueError("OPENAI_API_KEY is required for the 'gpt' backend.")
 
         try:
-            raw = self.llm.invoke(msg).content.strip()
-            
-            # Clean up markdown formatting if the model accidentally adds it
-            if raw.startswith("```json"):
-                raw = raw.replace("```json", "").replace("```", "")
-            elif raw.startswith("```"):
-                raw = raw.replace("```", "")
-
-            parsed = json.loads(raw)
-            
-            detected_color = parsed.get("detected_color")
-            reason = parsed.get("reason", "")
-
-            # Validation: Ensure result is in the candidate list
-            if detected_color not in candidate_colors:
-                # Try case-insensitive matching
-                for c in candidate_colors:
-                    if str(detected_color).lower() == c.lower():
-                        detected_color = c
-                        break
-                else:
-                    # If still not found, defaults to 'unknown' or the first candidate? 
-                    # Let's keep the raw output but flag it.
-                    pass
-
-            return {
-                "detected_color": detected_color,
-                "detected_confidence": 0.95, # GPT doesn't give confidence scores easily
-                "top_candidates": [(detected_color, 1.0)],
-                "fallback_model": "gpt-only",
-                "reason": reason
-            }
+            parsed, payload = await self._ainvoke_vision(
+                self._detect_prompt(candidate_colors), image, source_bytes=source_bytes
+            )
+            return self._detect_result(parsed, payload, candidate_colors)
 
+        except RateLimitExhausted:
+            raise
         except Exception as e:
             print(f"GPT Vision Error: {e}")
-            return {
-                "detected_color": "unknown",
-                "detected_confidence": 0.0,
-                "top_candidates": [],
-                "fallback_model": "error",
-                "error": str(e)
-            }
+            return self._error_result(e)
+
+    @staticmethod
+    def _fused_prompt(expected_color: str, candidate_colors: List[str]) -> str:
+        return f"""
+        You are a product color classifier and ecommerce color matching expert.
+        1. Select the single closest color name for this product from this list:
+        {candidate_colors}
+        2. Decide whether a typical shopper would consider the product color the
+        SAME as the catalog color "{expected_color}" (for example, "sky blue" is a
+        shade of "blue", "navy" is also "blue", "off white" is "white").
+
+        You MUST respond ONLY with valid JSON. Do not write markdown blocks (like ```json).
+
+        JSON schema:
+        {{
+            "detected_color": "<one_of_candidate_list>",
+            "verdict": "Match" or "Mismatch",
+            "reason": "<short explanation>"
+        }}
+        """
+
+    def _fused_result(
+        self, parsed: Dict[str, Any], payload: Dict[str, Any], candidate_colors: List[str]
+    ) -> Dict[str, Any]:
+        detected_color = self._match_candidate(parsed.get("detected_color"), candidate_colors)
+        return {
+            "detected_color": detected_color,
+            "detected_confidence": 0.95,
+            "top_candidates": [(detected_color, 1.0)],
+            "fallback_model": "gpt-fused",
+            # None (unparseable) leaves the verdict to the agent
+            "verdict": parse_verdict(parsed.get("verdict", "")),
+            "reason": parsed.get("reason", ""),
+            "payload": payload,
+        }
+
+    def _fused_error(self, exc: Exception) -> Dict[str, Any]:
+        print(f"GPT Vision Error: {exc}")
+        result = self._error_result(exc)
+        result["verdict"] = None
+        return result
+
+    def _detect_and_match_with_gpt(
+        self,
+        image: Image.Image,
+        expected_color: str,
+        candidate_colors: List[str],
+        source_bytes: Optional[bytes] = None,
+    ) -> Dict[str, Any]:
+        """
+        Detect the color AND judge it against the catalog color in one
+        GPT Vision call.
+        """
+        if self.llm is None:
+            raise ValueError("OPENAI_API_KEY is required for the fused detect-and-match mode.")
+
+        try:
+            parsed, payload = self._invoke_vision(
+                self._fused_prompt(expected_color, candidate_colors),
+                image,
+                max_tokens=150,
+                source_bytes=source_bytes,
+            )
+            return self._fused_result(parsed, payload, candidate_colors)
+
+        except RateLimitExhausted:
+            raise
+        except Exception as e:
+            return self._fused_error(e)
+
+    async def _adetect_and_match_with_gpt(
+        self,
+        image: Image.Image,
+        expected_color: str,
+        candidate_colors: List[str],
+        source_bytes: Optional[bytes] = None,
+    ) -> Dict[str, Any]:
+        """Async :meth:`_detect_and_match_with_gpt`."""
+        if self.llm is None:
+            raise ValueError("OPENAI_API_KEY is required for the fused detect-and-match mode.")
+
+        try:
+            parsed, payload = await self._ainvoke_vision(
+                self._fused_prompt(expected_color, candidate_colors),
+                image,
+                max_tokens=150,
+                source_bytes=source_bytes,
+            )
+            return self._fused_result(parsed, payload, candidate_colors)
+
+        except RateLimitExhausted:
+            raise
+        except Exception as e:
+            return self._fused_error(e)
+
+    def _fused_cache_key(
+        self,
+        image: Image.Image,
+        expected_color: str,
+        candidate_colors: List[str],
+        source_bytes: Optional[bytes] = None,
+    ) -> str:
+        # Fused answers depend on the catalog color, so it is part of the key
+        return DetectionCache.make_key(
+            self._fingerprint(image, source_bytes),
+            f"gpt-fused:{expected_color.lower()}",
+            f"{self.gpt_model_name}@{self.preprocessor.signature()}",
+            palette_version(candidate_colors),
+        )
+
+    def detect_and_match_with_status(
+        self,
+        image: Image.Image,
+        expected_color: str,
+        candidate_colors: Optional[List[str]] = None,
+        source_bytes: Optional[bytes] = None,
+    ) -> Tuple[Dict[str, Any], str]:
+        """
+        Fused mode: detected color, verdict and reason from ONE GPT Vision
+        call (instead of :meth:`detect_color` followed by an agent call).
+
+        Returns the result (with an extra ``verdict`` key, None when the
+        call failed) and the detection cache status ("hit", "miss" or
+        "bypass").
+        """
+        if candidate_colors is None:
+            candidate_colors = COLOR_CANDIDATES
+        expected_color = str(expected_color).strip()
+
+        if self.cache is None:
+            return (
+                self._detect_and_match_with_gpt(
+                    image, expected_color, candidate_colors, source_bytes
+                ),
+                "bypass",
+            )
+
+        key = self._fused_cache_key(image, expected_color, candidate_colors, source_bytes)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached, "hit"
+
+        result = self._detect_and_match_with_gpt(
+            image, expected_color, candidate_colors, source_bytes
+        )
+        if result.get("fallback_model") != "error":
+            self.cache.set(key, result)
+        return result, "miss"
+
+    def detect_and_match(
+        self,
+        image: Image.Image,
+        expected_color: str,
+        candidate_colors: Optional[List[str]] = None,
+        source_bytes: Optional[bytes] = None,
+    ) -> Dict[str, Any]:
+        """Fused detect + verdict in a single GPT Vision call."""
+        result, _ = self.detect_and_match_with_status(
+            image, expected_color, candidate_colors=candidate_colors, source_bytes=source_bytes
+        )
+        return result
+
+    # -------------------------------------------------
+    # Async API (event-loop friendly, used by the FastAPI app)
+    # -------------------------------------------------
+
+    async def adetect_color_with_status(
+        self,
+        image: Image.Image,
+        candidate_colors: Optional[List[str]] = None,
+        top_k: int = 3,
+        backend: Optional[str] = None,
+        source_bytes: Optional[bytes] = None,
+    ) -> Tuple[Dict[str, Any], str]:
+        """
+        Async :meth:`detect_color_with_status`.
+
+        The GPT backend awaits the OpenAI call on the shared async HTTP
+        client; hashing, cache lookups, image preprocessing and the local
+        backends run in worker threads.
+        """
+        candidate_colors, backend = self._resolve(candidate_colors, backend)
+
+        key = None
+        if self.cache is not None:
+            key = await asyncio.to_thread(
+                self._cache_key, image, backend, candidate_colors, top_k, source_bytes
+            )
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                return cached, "hit"
+
+        if backend == "gpt":
+            result = await self._adetect_with_gpt(image, candidate_colors, source_bytes)
+        else:
+            result = await asyncio.to_thread(
+                self._run_backend, image, candidate_colors, top_k, backend, source_bytes
+            )
+
+        if key is None:
+            return result, "bypass"
+        if result.get("fallback_model") != "error":
+            await asyncio.to_thread(self.cache.set, key, result)
+        return result, "miss"
+
+    async def adetect_color(
+        self,
+        image: Image.Image,
+        candidate_colors: Optional[List[str]] = None,
+        top_k: int = 3,
+        backend: Optional[str] = None,
+        source_bytes: Optional[bytes] = None,
+    ) -> Dict[str, Any]:
+        """Async :meth:`detect_color`."""
+        result, _ = await self.adetect_color_with_status(
+            image, candidate_colors, top_k, backend, source_bytes
+        )
+        return result
+
+    async def adetect_and_match_with_status(
+        self,
+        image: Image.Image,
+        expected_color: str,
+        candidate_colors: Optional[List[str]] = None,
+        source_bytes: Optional[bytes] = None,
+    ) -> Tuple[Dict[str, Any], str]:
+        """Async :meth:`detect_and_match_with_status`."""
+        if candidate_colors is None:
+            candidate_colors = COLOR_CANDIDATES
+        expected_color = str(expected_color).strip()
+
+        key = None
+        if self.cache is not None:
+            key = await asyncio.to_thread(
+                self._fused_cache_key, image, expected_color, candidate_colors, source_bytes
+            )
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                return cached, "hit"
+
+        result = await self._adetect_and_match_with_gpt(
+            image, expected_color, candidate_colors, source_bytes
+        )
+        if key is None:
+            return result, "bypass"
+        if result.get("fallback_model") != "error":
+            await asyncio.to_thread(self.cache.set, key, result)
+        return result, "miss"
@@ -0,0 +1,248 @@
+import hashlib
+import importlib.util
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+from PIL import Image
+
+from .color_palette import COLOR_CANDIDATES
+
+
+DEFAULT_CLIP_MODEL = "openai/clip-vit-base-patch32"
+DEFAULT_CLIP_CACHE_DIR = "data/cache/clip"
+CLIP_PROMPT_TEMPLATE = "a product in {} color"
+
+
+def palette_hash(model_name: str, candidate_colors: Sequence[str]) -> str:
+    """Stable hash of model, prompt template and palette (text-embedding cache key)."""
+    payload = json.dumps(
+        {
+            "model": model_name,
+            "template": CLIP_PROMPT_TEMPLATE,
+            "colors": list(candidate_colors),
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _features(output):
+    """
+    Projected embeddings from ``get_text_features`` / ``get_image_features``.
+
+    transformers < 5 returns the tensor directly; newer versions return a
+    model output whose ``pooler_output`` holds the projection.
+    """
+    return getattr(output, "pooler_output", output)
+
+
+class ClipEmbeddingDetector:
+    """
+    Zero-API-cost color detector using a local CLIP model on CPU.
+
+    Text embeddings for the palette prompts are computed once per
+    (model, palette) and saved to disk next to the model cache, keyed by
+    :func:`palette_hash`. Images are classified in batches: the vision
+    tower runs on stacked tensors of ``batch_size`` images.
+
+    `torch` and `transformers` are optional dependencies and are imported
+    on first use.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_CLIP_MODEL,
+        device: str = "cpu",
+        batch_size: int = 16,
+        num_threads: Optional[int] = None,
+        cache_dir: str = DEFAULT_CLIP_CACHE_DIR,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        model_name : str
+            Hugging Face CLIP checkpoint.
+        device : str
+            Torch device ("cpu" or "cuda").
+        batch_size : int
+            Default number of images per vision-tower forward pass.
+        num_threads : int, optional
+            If given, passed to ``torch.set_num_threads`` on load.
+        cache_dir : str
+            Directory holding the saved text embeddings (one sub-directory
+            per model).
+        """
+        self.model_name = model_name
+        self.device = device
+        self.batch_size = max(1, batch_size)
+        self.num_threads = num_threads
+        self.cache_dir = os.path.join(cache_dir, model_name.replace("/", "__"))
+
+        self._torch = None
+        self.model = None
+        self.processor = None
+        self._text_embeddings: Dict[str, Any] = {}
+        # Guard the one-time model load and palette embedding so concurrent
+        # detection threads don't each build (and write) their own copy
+        self._load_lock = threading.Lock()
+        self._embeddings_lock = threading.Lock()
+
+    @staticmethod
+    def available() -> bool:
+        """Whether the optional torch/transformers packages are installed."""
+        return all(
+            importlib.util.find_spec(name) is not None for name in ("torch", "transformers")
+        )
+
+    # -------------------------------------------------
+    # Internals
+    # -------------------------------------------------
+
+    def _load(self) -> None:
+        """Import torch/transformers and load the model on first use."""
+        if self.model is not None:
+            return
+        with self._load_lock:
+            if self.model is None:
+                self._load_model()
+
+    def _load_model(self) -> None:
+        try:
+            import torch
+            from transformers import CLIPModel, CLIPProcessor
+        except ImportError as exc:
+            raise ImportError(
+                "The 'clip' backend requires the optional 'torch' and "
+                "'transformers' packages (pip install torch transformers)."
+            ) from exc
+
+        if self.num_threads:
+            torch.set_num_threads(self.num_threads)
+
+        model = CLIPModel.from_pretrained(self.model_name)
+        model.to(self.device)
+        model.eval()
+        self._torch = torch
+        self.processor = CLIPProcessor.from_pretrained(self.model_name)
+        # Published last: a non-None model means the load is complete
+        self.model = model
+
+    def _palette_embeddings(self, candidate_colors: Sequence[str]):
+        """Normalized text embeddings for the palette, loaded from or saved to disk."""
+        key = palette_hash(self.model_name, candidate_colors)
+        cached = self._text_embeddings.get(key)
+        if cached is not None:
+            return cached
+        with self._embeddings_lock:
+            cached = self._text_embeddings.get(key)
+            if cached is None:
+                cached = self._text_embeddings[key] = self._compute_palette_embeddings(
+                    key, candidate_colors
+                )
+        return cached
+
+    def _compute_palette_embeddings(self, key: str, candidate_colors: Sequence[str]):
+        torch = self._torch
+        path = os.path.join(self.cache_dir, f"text_embeddings_{key}.pt")
+        if os.path.exists(path):
+            embeddings = torch.load(path, map_location=self.device)
+        else:
+            prompts = [CLIP_PROMPT_TEMPLATE.format(c) for c in candidate_colors]
+            inputs = self.processor(text=prompts, return_tensors="pt", padding=True)
+            inputs = {k: v.to(self.device) for k, v in inputs.items()}
+            with torch.no_grad():
+                embeddings = _features(self.model.get_text_features(**inputs))
+            embeddings = embeddings / embeddings.norm(dim=-1, keepdim=True)
+
+            # Write then rename, so another process never loads a partial file
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            torch.save(embeddings.cpu(), tmp_path)
+            os.replace(tmp_path, path)
+            print(f"[INFO] Saved CLIP palette embeddings -> {path}")
+        return embeddings
+
+    # -------------------------------------------------
+    # Public API
+    # -------------------------------------------------
+
+    def detect_colors(
+        self,
+        images: Sequence[Image.Image],
+        candidate_colors: Optional[List[str]] = None,
+        top_k: int = 3,
+        batch_size: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Detect the dominant color of many images with batched CLIP inference.
+
+        Parameters
+        ----------
+        images : sequence of PIL.Image.Image
+            Product images.
+        candidate_colors : list[str], optional
+            Palette to choose from. Defaults to `COLOR_CANDIDATES`.
+        top_k : int
+            Number of ranked candidates per image.
+        batch_size : int, optional
+            Images per forward pass (defaults to the instance setting).
+
+        Returns
+        -------
+        list[dict]
+            One result per image, in input order.
+        """
+        if candidate_colors is None:
+            candidate_colors = COLOR_CANDIDATES
+        if not images:
+            return []
+
+        self._load()
+        torch = self._torch
+        text_embeddings = self._palette_embeddings(candidate_colors)
+        logit_scale = self.model.logit_scale.exp()
+        top_k = max(1, min(top_k, len(candidate_colors)))
+        batch_size = max(1, batch_size or self.batch_size)
+
+        results: List[Dict[str, Any]] = []
+        for start in range(0, len(images), batch_size):
+            batch = [
+                img if img.mode == "RGB" else img.convert("RGB")
+                for img in images[start:start + batch_size]
+            ]
+            inputs = self.processor(images=batch, return_tensors="pt")
+            pixel_values = inputs["pixel_values"].to(self.device)
+
+            with torch.no_grad():
+                image_embeddings = _features(
+                    self.model.get_image_features(pixel_values=pixel_values)
+                )
+                image_embeddings = image_embeddings / image_embeddings.norm(dim=-1, keepdim=True)
+                probs = (logit_scale * image_embeddings @ text_embeddings.T).softmax(dim=-1)
+                top_values, top_indices = probs.topk(top_k, dim=-1)
+
+            for values, indices in zip(top_values.tolist(), top_indices.tolist()):
+                top_candidates = [
+                    (candidate_colors[i], float(p)) for i, p in zip(indices, values)
+                ]
+                results.append(
+                    {
+                        "detected_color": top_candidates[0][0],
+                        "detected_confidence": top_candidates[0][1],
+                        "top_candidates": top_candidates,
+                        "fallback_model": "clip",
+                    }
+                )
+        return results
+
+    def detect_color(
+        self,
+        image: Image.Image,
+        candidate_colors: Optional[List[str]] = None,
+        top_k: int = 3,
+        **_: Any,
+    ) -> Dict[str, Any]:
+        """Detect the dominant color of a single image."""
+        return self.detect_colors([image], candidate_colors=candidate_colors, top_k=top_k)[0]
@@ -1,11 +1,26 @@
-from typing import Literal
+import asyncio
+import json
+from typing import Dict, List, Optional, Sequence, Tuple
 
 from langchain_openai import ChatOpenAI
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 
+from .openai_http import shared_async_http_client, shared_http_client
+from .openai_limiter import OpenAIRateLimiter, estimate_tokens, get_shared_limiter
+from .verdict_cache import VerdictCache, normalize_color
+from .verdicts import Verdict, parse_verdict
 
-Verdict = Literal["Match", "Mismatch"]
+
+# Number of (expected, detected) pairs packed into one batched LLM call.
+DEFAULT_VERDICT_BATCH_SIZE = 40
+
+# Bump whenever the verdict prompts change meaning, so cached verdicts
+# produced by the old prompts are not reused.
+VERDICT_PROMPT_VERSION = "v1"
+
+# Approximate size of the fixed verdict instructions (rate limiter budget).
+_PROMPT_TOKENS = 200
 
 
 class ColorMatchAgent:
@@ -20,7 +35,13 @@ class ColorMatchAgent:
     - "red" vs. "green" -> Mismatch
     """
 
-    def __init__(self, openai_api_key: str, model_name: str = "gpt-4o-mini") -> None:
+    def __init__(
+        self,
+        openai_api_key: str,
+        model_name: str = "gpt-4o-mini",
+        cache: Optional[VerdictCache] = None,
+        rate_limiter: Optional[OpenAIRateLimiter] = None,
+    ) -> None:
         """
         Initialize the agent.
 
@@ -30,15 +51,29 @@ class ColorMatchAgent:
             OpenAI API key.
         model_name : str
             Name of OpenAI chat model to use.
+        cache : VerdictCache, optional
+            Persistent verdict cache consulted before any LLM call.
+        rate_limiter : OpenAIRateLimiter, optional
+            RPM/TPM limiter for LLM calls. Defaults to the process-wide
+            shared limiter (also used by the color detector).
         """
+        self.model_name = model_name
+        self.cache = cache
+        self.rate_limiter = rate_limiter or get_shared_limiter()
         # ChatOpenAI will also read OPENAI_API_KEY from environment,
         # but we pass it explicitly for clarity.
         self.llm = ChatOpenAI(
             model=model_name,
             temperature=0,
             openai_api_key=openai_api_key,
+            # 429s and retries are handled by the shared rate limiter
+            max_retries=0,
+            # Keep-alive pools shared with the color detector
+            http_client=shared_http_client(),
+            http_async_client=shared_async_http_client(),
         )
         self._chain = self._build_chain()
+        self._batch_chain = self._build_batch_chain()
 
     def _build_chain(self):
         """Build the LangChain pipeline that returns "Match" or "Mismatch"""
@@ -63,6 +98,149 @@ Do not add any explanation or punctuation. Just return Match or Mismatch.
         parser = StrOutputParser()
         return template | self.llm | parser
 
+    def _build_batch_chain(self):
+        """Build the LangChain pipeline that judges many pairs in one call."""
+        template = ChatPromptTemplate.from_template(
+            """
+You are an ecommerce color matching expert.
+
+Below is a JSON array of color pairs. Each item has an "i" (index),
+the catalog (expected) color "expected" and the color "detected" by
+an image model.
+
+{pairs}
+
+For EACH pair decide whether a typical shopper would consider these the
+SAME color (for example, "sky blue" is a shade of "blue", "navy" is also
+"blue", "off white" is "white", "navy blue" is "dark blue", etc.).
+
+Respond ONLY with a JSON array with exactly one object per input pair,
+in the same order, using this schema:
+[{{"i": <index>, "verdict": "Match" or "Mismatch"}}]
+
+Do not write markdown blocks or any explanation.
+            """.strip()
+        )
+        parser = StrOutputParser()
+        return template | self.llm | parser
+
+    def _invoke_batch(self, pairs: Sequence[Tuple[str, str]]) -> List[Optional[Verdict]]:
+        """
+        Run one batched LLM call. Items whose verdict could not be parsed
+        come back as None.
+
+        Raises
+        ------
+        ValueError
+            If the output is not a JSON array with one verdict per pair.
+        """
+        payload = [
+            {"i": i, "expected": expected, "detected": detected}
+            for i, (expected, detected) in enumerate(pairs)
+        ]
+        pairs_json = json.dumps(payload)
+        raw = self.rate_limiter.call(
+            lambda: self._batch_chain.invoke({"pairs": pairs_json}),
+            # Instructions + pairs in, ~12 tokens per verdict object out
+            estimated_tokens=_PROMPT_TOKENS
+            + estimate_tokens(pairs_json, max_output_tokens=12 * len(pairs)),
+        ).strip()
+
+        # Clean up markdown formatting if the model accidentally adds it
+        if raw.startswith("```"):
+            raw = raw.replace("```json", "").replace("```", "").strip()
+
+        parsed = json.loads(raw)
+        if not isinstance(parsed, list) or len(parsed) != len(pairs):
+            raise ValueError(
+                f"Expected a JSON array of {len(pairs)} verdicts, got: {raw[:200]}"
+            )
+
+        verdicts: List[Optional[Verdict]] = [None] * len(pairs)
+        seen = set()
+        for pos, item in enumerate(parsed):
+            if isinstance(item, dict):
+                i = item.get("i", pos)
+                value = item.get("verdict", "")
+            else:
+                i, value = pos, item
+            if not isinstance(i, int) or not 0 <= i < len(pairs) or i in seen:
+                raise ValueError(f"Invalid or duplicate index in batch output: {item!r}")
+            seen.add(i)
+            verdicts[i] = parse_verdict(value)
+        return verdicts
+
+    def _resolve_batch(self, pairs: Sequence[Tuple[str, str]]) -> List[Optional[Verdict]]:
+        """Resolve a batch, splitting it in half and retrying on malformed output."""
+        if len(pairs) == 1:
+            expected, detected = pairs[0]
+            return [self._invoke_single(expected, detected)]
+        try:
+            return self._invoke_batch(pairs)
+        except (ValueError, TypeError) as exc:
+            print(f"[WARN] Malformed batch verdict output ({len(pairs)} pairs), splitting: {exc}")
+            mid = len(pairs) // 2
+            return self._resolve_batch(pairs[:mid]) + self._resolve_batch(pairs[mid:])
+
+    def get_verdicts(
+        self,
+        pairs: Sequence[Tuple[str, str]],
+        batch_size: int = DEFAULT_VERDICT_BATCH_SIZE,
+    ) -> List[Verdict]:
+        """
+        Determine verdicts for many (expected, detected) color pairs at once.
+
+        Pairs are de-duplicated and packed `batch_size` at a time into a
+        single structured prompt, so N products cost roughly
+        N / batch_size LLM calls instead of N.
+
+        Parameters
+        ----------
+        pairs : sequence of (str, str)
+            (expected_color, detected_color) pairs.
+        batch_size : int
+            Maximum number of pairs per LLM call.
+
+        Returns
+        -------
+        list[Verdict]
+            One "Match" / "Mismatch" per input pair, in input order.
+        """
+        # De-duplicate on the verdict cache key, so "Navy  Blue" and
+        # "navy blue" are one LLM item (sent in their first spelling)
+        keys = [
+            (normalize_color(expected), normalize_color(detected))
+            for expected, detected in pairs
+        ]
+        unique: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        for key, (expected, detected) in zip(keys, pairs):
+            unique.setdefault(key, (str(expected).strip(), str(detected).strip()))
+
+        resolved: Dict[Tuple[str, str], Verdict] = {}
+        if self.cache is not None:
+            for key, pair in unique.items():
+                cached = self.cache.get(*pair, self.model_name, VERDICT_PROMPT_VERSION)
+                if cached is not None:
+                    resolved[key] = cached
+        missing = [key for key in unique if key not in resolved]
+
+        batch_size = max(1, batch_size)
+        for start in range(0, len(missing), batch_size):
+            chunk = missing[start:start + batch_size]
+            chunk_verdicts = self._resolve_batch([unique[key] for key in chunk])
+            # Only verdicts the model actually gave are cached; unparseable
+            # output falls back to "Mismatch" for this call only
+            if self.cache is not None:
+                self.cache.set_many(
+                    [(*unique[key], v) for key, v in zip(chunk, chunk_verdicts) if v is not None],
+                    self.model_name,
+                    VERDICT_PROMPT_VERSION,
+                )
+            for key, verdict in zip(chunk, chunk_verdicts):
+                resolved[key] = verdict or "Mismatch"
+
+        return [resolved[key] for key in keys]
+
     def get_verdict(self, expected_color: str, detected_color: str) -> Verdict:
         """
         Determine whether the detected color matches the expected catalog color.
@@ -79,17 +257,77 @@ Do not add any explanation or punctuation. Just return Match or Mismatch.
         Verdict
             "Match" or "Mismatch".
         """
-        raw = self._chain.invoke(
-            {
-                "expected_color": expected_color.strip(),
-                "detected_color": detected_color.strip(),
-            }
+        expected_color = str(expected_color).strip()
+        detected_color = str(detected_color).strip()
+
+        cached = self._cached_verdict(expected_color, detected_color)
+        if cached is not None:
+            return cached
+
+        inputs, estimated = self._single_request(expected_color, detected_color)
+        raw = self.rate_limiter.call(
+            lambda: self._chain.invoke(inputs), estimated_tokens=estimated
+        )
+        return self._finish_verdict(expected_color, detected_color, raw)
+
+    async def aget_verdict(self, expected_color: str, detected_color: str) -> Verdict:
+        """
+        Async :meth:`get_verdict`: the LLM call is awaited on the shared
+        async HTTP client and cache I/O runs in a worker thread.
+        """
+        expected_color = str(expected_color).strip()
+        detected_color = str(detected_color).strip()
+
+        cached = await asyncio.to_thread(self._cached_verdict, expected_color, detected_color)
+        if cached is not None:
+            return cached
+
+        inputs, estimated = self._single_request(expected_color, detected_color)
+        raw = await self.rate_limiter.acall(
+            lambda: self._chain.ainvoke(inputs), estimated_tokens=estimated
+        )
+        return await asyncio.to_thread(
+            self._finish_verdict, expected_color, detected_color, raw
+        )
+
+    # -------------------------------------------------
+    # Single-pair steps shared by get_verdict / aget_verdict
+    # -------------------------------------------------
+
+    def _cached_verdict(self, expected_color: str, detected_color: str) -> Optional[Verdict]:
+        """Cached verdict for the pair, or None (miss or no cache)."""
+        if self.cache is None:
+            return None
+        return self.cache.get(
+            expected_color, detected_color, self.model_name, VERDICT_PROMPT_VERSION
+        )
+
+    @staticmethod
+    def _single_request(expected_color: str, detected_color: str) -> Tuple[Dict[str, str], int]:
+        """Chain inputs and the token reservation for one pair."""
+        inputs = {
+            "expected_color": expected_color.strip(),
+            "detected_color": detected_color.strip(),
+        }
+        estimated = _PROMPT_TOKENS + estimate_tokens(
+            expected_color + detected_color, max_output_tokens=5
+        )
+        return inputs, estimated
+
+    def _finish_verdict(self, expected_color: str, detected_color: str, raw: str) -> Verdict:
+        """Parse the model output; cache real verdicts, else fall back to "Mismatch"."""
+        verdict = parse_verdict(raw)
+        if self.cache is not None and verdict is not None:
+            self.cache.set(
+                expected_color, detected_color, self.model_name, VERDICT_PROMPT_VERSION, verdict
+            )
+        return verdict or "Mismatch"
+
+    def _invoke_single(self, expected_color: str, detected_color: str) -> Optional[Verdict]:
+        """Run the single-pair LLM chain (no caching); None if unparseable."""
+        inputs, estimated = self._single_request(expected_color, detected_color)
+        raw = self.rate_limiter.call(
+            lambda: self._chain.invoke(inputs), estimated_tokens=estimated
         )
-        # Normalize to exactly "Match" or "Mismatch".
-        normalized = raw.strip().lower()
-        if "match" in normalized and "mis" not in normalized:
-            return "Match"
-        if "mismatch" in normalized:
-            return "Mismatch"
-        # Fallback: be conservative and mark as mismatch
-        return "Mismatch"
+        # Exactly "Match" or "Mismatch", or None for anything else
+        return parse_verdict(raw)
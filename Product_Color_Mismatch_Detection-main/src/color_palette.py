@@ -60,3 +60,138 @@ COLOR_CANDIDATES = [
     "gold metallic",
     "multicolor",
 ]
+
+# Reference sRGB values for each candidate, used by the local (non-API)
+# detectors to map pixel clusters to names. "multicolor" has no single
+# reference and is decided from the cluster distribution instead; the
+# metallic variants are indistinguishable from their flat colors in pixel
+# statistics and are left to the vision model.
+COLOR_REFERENCE_RGB = {
+    # Neutrals
+    "black": (20, 20, 20),
+    "white": (250, 250, 250),
+    "off white": (242, 239, 230),
+    "cream": (240, 228, 200),
+    "ivory": (250, 246, 232),
+    "gray": (128, 128, 128),
+    "light gray": (190, 190, 190),
+    "dark gray": (80, 80, 80),
+    "charcoal": (54, 57, 62),
+    "silver": (192, 192, 196),
+    "beige": (215, 196, 160),
+    "tan": (196, 160, 116),
+    "brown": (120, 74, 40),
+    "dark brown": (72, 44, 26),
+    # Blues
+    "blue": (40, 80, 200),
+    "navy blue": (24, 32, 72),
+    "royal blue": (48, 72, 190),
+    "sky blue": (130, 196, 236),
+    "light blue": (170, 200, 230),
+    "teal": (0, 118, 118),
+    "turquoise": (56, 200, 200),
+    # Reds / Pinks
+    "red": (200, 30, 36),
+    "dark red": (130, 16, 20),
+    "burgundy": (110, 20, 42),
+    "maroon": (120, 30, 30),
+    "pink": (240, 160, 190),
+    "light pink": (248, 204, 216),
+    "hot pink": (236, 60, 150),
+    # Greens
+    "green": (40, 150, 60),
+    "dark green": (20, 80, 40),
+    "olive green": (110, 112, 50),
+    "mint green": (170, 230, 190),
+    "lime green": (150, 220, 50),
+    # Yellows / Oranges
+    "yellow": (250, 220, 40),
+    "mustard yellow": (210, 168, 40),
+    "gold": (212, 175, 55),
+    "orange": (240, 130, 30),
+    "burnt orange": (200, 90, 30),
+    # Purples
+    "purple": (110, 50, 150),
+    "lavender": (190, 170, 220),
+    "violet": (140, 70, 190),
+    # Other / metallic
+    "rose gold": (200, 140, 130),
+}
+
+# Extra catalog vocabulary (e.g. the `baseColour` values of the fashion
+# dataset) with approximate sRGB references, used by the perceptual
+# verdict engine alongside `COLOR_REFERENCE_RGB`.
+CATALOG_COLOR_RGB = {
+    "gray melange": (150, 150, 150),
+    "steel": (113, 121, 126),
+    "khaki": (195, 176, 145),
+    "nude": (227, 188, 154),
+    "skin": (232, 190, 172),
+    "taupe": (145, 130, 115),
+    "camel": (193, 154, 107),
+    "coffee brown": (111, 78, 55),
+    "mushroom brown": (160, 140, 120),
+    "rust": (183, 65, 14),
+    "copper": (184, 115, 51),
+    "bronze": (205, 127, 50),
+    "denim": (21, 96, 189),
+    "turquoise blue": (0, 170, 200),
+    "wine": (114, 47, 55),
+    "rose": (230, 120, 140),
+    "magenta": (200, 30, 140),
+    "peach": (255, 203, 164),
+    "coral": (255, 127, 80),
+    "fluorescent green": (100, 255, 80),
+    "sea green": (46, 139, 87),
+    "lemon": (255, 244, 79),
+    "mauve": (190, 130, 170),
+    "lilac": (200, 162, 200),
+}
+
+# Alternative spellings mapped to a canonical name ("grey" is always
+# normalized to "gray" first).
+COLOR_ALIASES = {
+    "navy": "navy blue",
+    "olive": "olive green",
+    "mustard": "mustard yellow",
+    "multi": "multicolor",
+    "multi color": "multicolor",
+    "multicolour": "multicolor",
+    "offwhite": "off white",
+}
+
+# Color family of every named color. Two names of the same family (e.g.
+# "navy blue" and "blue", "charcoal" and "gray") describe the same catalog
+# color for a shopper even when they are far apart perceptually.
+COLOR_FAMILIES = {
+    color: family
+    for family, members in {
+        "black": ["black"],
+        "white": ["white", "off white", "cream", "ivory"],
+        "gray": [
+            "gray", "light gray", "dark gray", "charcoal", "gray melange", "steel",
+            "silver", "silver metallic",
+        ],
+        "beige": ["beige", "tan", "khaki", "nude", "skin", "taupe", "camel"],
+        "brown": [
+            "brown", "dark brown", "coffee brown", "mushroom brown", "rust", "copper",
+            "bronze",
+        ],
+        "blue": [
+            "blue", "navy blue", "royal blue", "sky blue", "light blue", "turquoise blue",
+            "denim",
+        ],
+        "teal": ["teal", "turquoise"],
+        "red": ["red", "dark red", "burgundy", "maroon", "wine"],
+        "pink": ["pink", "light pink", "hot pink", "rose", "magenta", "rose gold"],
+        "green": [
+            "green", "dark green", "olive green", "mint green", "lime green",
+            "fluorescent green", "sea green",
+        ],
+        "yellow": ["yellow", "mustard yellow", "gold", "gold metallic", "lemon"],
+        "orange": ["orange", "burnt orange", "peach", "coral"],
+        "purple": ["purple", "lavender", "violet", "mauve", "lilac"],
+        "multicolor": ["multicolor"],
+    }.items()
+    for color in members
+}
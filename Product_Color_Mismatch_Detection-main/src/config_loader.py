@@ -59,7 +59,7 @@
 
 
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any, Dict
 import os
 import yaml
@@ -68,6 +68,8 @@ import yaml
 class Settings:
     """Configuration settings loaded from config.yml."""
     openai_api_key: str
+    # Raw 'cascade' section (see src.detector_cascade.CascadeConfig)
+    cascade: Dict[str, Any] = field(default_factory=dict)
 
 def load_settings(config_path: str = "config.yml") -> Settings:
     """
@@ -78,7 +80,7 @@ def load_settings(config_path: str = "config.yml") -> Settings:
         return Settings(openai_api_key=os.getenv("OPENAI_API_KEY", ""))
 
     with open(config_path, "r", encoding="utf-8") as f:
-        raw: Dict[str, Any] = yaml.safe_load(f)
+        raw: Dict[str, Any] = yaml.safe_load(f) or {}
 
     api_key = raw.get("openai_api_key", "")
     
@@ -86,4 +88,4 @@ def load_settings(config_path: str = "config.yml") -> Settings:
     if api_key:
         os.environ["OPENAI_API_KEY"] = api_key
 
-    return Settings(openai_api_key=api_key)
+    return Settings(openai_api_key=api_key, cascade=raw.get("cascade") or {})
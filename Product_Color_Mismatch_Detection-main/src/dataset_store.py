@@ -0,0 +1,243 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+
+COLOR_COLUMN_CANDIDATES = ["baseColour", "base_colour", "color", "colour"]
+NAME_COLUMN_CANDIDATES = ["productDisplayName", "product_name", "name", "title"]
+
+# Columns that get a SQLite index (when present) because the API filters on them.
+INDEXED_COLUMNS = ["Verdict", "articleType", "detected_color"] + COLOR_COLUMN_CANDIDATES
+
+# Hidden column preserving the CSV row position (used for ordering / image lookups).
+ROW_COLUMN = "_row"
+
+_TABLE = "products"
+# Rebuilds load into this table first, so a failed load keeps the old data.
+_STAGING_TABLE = "products_staging"
+
+
+def _quote(column: str) -> str:
+    """Quote a column name as a SQLite identifier."""
+    return '"' + column.replace('"', '""') + '"'
+
+
+class DatasetStore:
+    """
+    SQLite-backed, indexed copy of the pipeline output CSV.
+
+    The CSV is loaded once (in chunks) into an SQLite table with indexes
+    on the filterable columns, and reloaded only when the file's mtime or
+    size changes. Queries page, filter and project in SQL so a request
+    only materializes the rows it returns.
+    """
+
+    def __init__(
+        self,
+        csv_path: str,
+        db_path: str = ":memory:",
+        chunk_size: int = 50_000,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        csv_path : str
+            Pipeline output CSV.
+        db_path : str
+            SQLite database file (":memory:" keeps it in process memory).
+        chunk_size : int
+            Rows per chunk when loading the CSV.
+        """
+        self.csv_path = csv_path
+        self.chunk_size = chunk_size
+
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._file_state: Optional[tuple] = None
+        self.columns: List[str] = []
+        self.row_count = 0
+        self.color_column: Optional[str] = None
+        self.name_column: Optional[str] = None
+
+    # -------------------------------------------------
+    # Internals
+    # -------------------------------------------------
+
+    def _load(self) -> None:
+        """
+        (Re)build the table from the CSV. Caller holds the lock.
+
+        Rows are loaded into a staging table that replaces the live one
+        only once the whole file was read, so a failed load (e.g. the CSV
+        is still being written) leaves the previous data queryable.
+        """
+        # Imported here: the API only pays for pandas once a dataset is served
+        import pandas as pd
+
+        conn = self._conn
+        conn.execute(f"DROP TABLE IF EXISTS {_STAGING_TABLE}")
+        columns: List[str] = []
+        offset = 0
+        try:
+            for chunk in pd.read_csv(self.csv_path, chunksize=self.chunk_size):
+                if not columns:
+                    columns = list(chunk.columns)
+                chunk.insert(0, ROW_COLUMN, range(offset, offset + len(chunk)))
+                offset += len(chunk)
+                chunk.to_sql(_STAGING_TABLE, conn, if_exists="append", index=False)
+
+            if not columns:
+                # Header only (or empty file): keep an empty table with the header
+                columns = list(pd.read_csv(self.csv_path, nrows=0).columns)
+                pd.DataFrame(columns=[ROW_COLUMN] + columns).to_sql(
+                    _STAGING_TABLE, conn, if_exists="append", index=False
+                )
+        except Exception:
+            conn.execute(f"DROP TABLE IF EXISTS {_STAGING_TABLE}")
+            conn.commit()
+            raise
+
+        # Swap in one transaction (dropping the old table drops its indexes)
+        conn.execute(f"DROP TABLE IF EXISTS {_TABLE}")
+        conn.execute(f"ALTER TABLE {_STAGING_TABLE} RENAME TO {_TABLE}")
+
+        conn.execute(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS idx_products_row ON {_TABLE} ({ROW_COLUMN})"
+        )
+        for column in INDEXED_COLUMNS:
+            if column in columns:
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {_quote('idx_products_' + column)} "
+                    f"ON {_TABLE} ({_quote(column)})"
+                )
+        conn.commit()
+
+        self.columns = columns
+        self.row_count = offset
+        self.color_column = next((c for c in COLOR_COLUMN_CANDIDATES if c in columns), None)
+        self.name_column = next((c for c in NAME_COLUMN_CANDIDATES if c in columns), None)
+        print(f"[INFO] Loaded {offset} rows from {self.csv_path} into the dataset store.")
+
+    def _where(self, filters: Dict[str, Optional[str]]) -> tuple:
+        clauses, params = [], []
+        for column, value in filters.items():
+            if value is None:
+                continue
+            if column not in self.columns:
+                raise KeyError(column)
+            clauses.append(f"{_quote(column)} = ?")
+            params.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    # -------------------------------------------------
+    # Public API
+    # -------------------------------------------------
+
+    def refresh(self) -> bool:
+        """
+        Reload if the CSV changed since the last load.
+
+        Returns False if the CSV does not exist.
+        """
+        try:
+            st = os.stat(self.csv_path)
+        except FileNotFoundError:
+            return False
+        state = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            if state != self._file_state:
+                try:
+                    self._load()
+                except Exception as exc:  # noqa: BLE001
+                    if self._file_state is None:
+                        raise
+                    # Keep serving the last good load; retried on the next request
+                    print(f"[WARN] Reloading {self.csv_path} failed, keeping old data: {exc}")
+                    return True
+                self._file_state = state
+        return True
+
+    @property
+    def version(self) -> str:
+        """Identifier of the loaded file state (changes when the CSV changes)."""
+        mtime, size = self._file_state or (0, 0)
+        return f"{mtime:x}-{size:x}"
+
+    def etag(self, *parts: Any) -> str:
+        """Strong ETag for a response derived from the current data and `parts`."""
+        payload = json.dumps([self.version, *parts], sort_keys=True, default=str)
+        return '"' + hashlib.sha1(payload.encode("utf-8")).hexdigest() + '"'
+
+    def query(
+        self,
+        filters: Dict[str, Optional[str]],
+        columns: Optional[Sequence[str]] = None,
+        offset: int = 0,
+        limit: Optional[int] = 100,
+    ) -> Dict[str, Any]:
+        """
+        One page of rows matching `filters` (column -> exact value);
+        every row from `offset` on when `limit` is None.
+
+        Raises
+        ------
+        KeyError
+            If a filter or projected column does not exist.
+        """
+        selected = list(columns) if columns else list(self.columns)
+        for column in selected:
+            if column not in self.columns and column != ROW_COLUMN:
+                raise KeyError(column)
+
+        with self._lock:
+            where, params = self._where(filters)
+            total = self._conn.execute(
+                f"SELECT COUNT(*) FROM {_TABLE}{where}", params
+            ).fetchone()[0]
+            cursor = self._conn.execute(
+                f"SELECT {', '.join(_quote(c) for c in selected)} FROM {_TABLE}{where} "
+                f"ORDER BY {ROW_COLUMN} LIMIT ? OFFSET ?",
+                params + [-1 if limit is None else limit, offset],
+            )
+            rows = [dict(zip(selected, values)) for values in cursor.fetchall()]
+
+        return {"total": total, "offset": offset, "limit": limit, "rows": rows}
+
+    def counts(self, filters: Dict[str, Optional[str]], group_by: Sequence[str]) -> Dict[str, Any]:
+        """
+        Row counts matching `filters`, overall and per value of each
+        `group_by` column (no rows are returned).
+        """
+        for column in group_by:
+            if column not in self.columns:
+                raise KeyError(column)
+
+        with self._lock:
+            where, params = self._where(filters)
+            total = self._conn.execute(
+                f"SELECT COUNT(*) FROM {_TABLE}{where}", params
+            ).fetchone()[0]
+            groups: Dict[str, Dict[str, int]] = {}
+            for column in group_by:
+                quoted = _quote(column)
+                cursor = self._conn.execute(
+                    f"SELECT {quoted}, COUNT(*) FROM {_TABLE}{where} "
+                    f"GROUP BY {quoted} ORDER BY COUNT(*) DESC",
+                    params,
+                )
+                groups[column] = {
+                    ("null" if value is None else str(value)): count
+                    for value, count in cursor.fetchall()
+                }
+        return {"total": total, "counts": groups}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,129 @@
+import hashlib
+import os
+import threading
+from typing import Any, Dict, Optional, Sequence
+
+import pandas as pd
+
+
+# Output column identifying a row's inputs (id, image content, expected color).
+FINGERPRINT_COLUMN = "row_fingerprint"
+
+# Result columns carried over from the baseline for unchanged rows.
+RESULT_COLUMNS = (
+    "detected_color",
+    "detected_confidence",
+    "Verdict",
+    "detection_tier",
+    "detection_ms",
+)
+
+# detected_color values older runs wrote for failed detections.
+_FAILED_DETECTIONS = {"", "unknown", "error", "nan", "none"}
+
+
+def bytes_digest(data: bytes) -> str:
+    """Content hash of an encoded image."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def row_fingerprint(row_id: str, image_hash: Optional[str], expected_color: Any) -> str:
+    """
+    Fingerprint of everything a row's result depends on.
+
+    Two rows with the same id, image content and (case/whitespace
+    normalized) expected color get the same fingerprint, so the previous
+    detection and verdict can be reused.
+    """
+    color = "" if expected_color is None else " ".join(str(expected_color).lower().split())
+    payload = "\x1f".join([str(row_id), image_hash or "", color])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class DeltaBaseline:
+    """
+    Results of a previous run, indexed by :data:`FINGERPRINT_COLUMN`.
+
+    The pipelines fingerprint every current row, reuse the baseline
+    result when the fingerprint is known and only detect / verdict new or
+    changed rows; reused and fresh rows are merged into the new output.
+    Rows whose baseline detection failed (no detected color, or an error
+    marker such as "unknown") are always processed again.
+    """
+
+    def __init__(self, previous_csv: str) -> None:
+        """
+        Parameters
+        ----------
+        previous_csv : str
+            Output CSV of an earlier run (read fully here, so it may be
+            the same path the new run writes to).
+
+        Raises
+        ------
+        FileNotFoundError
+            If `previous_csv` does not exist.
+        """
+        if not os.path.exists(previous_csv):
+            raise FileNotFoundError(f"Baseline output not found: {previous_csv}")
+        self.previous_csv = previous_csv
+        self.reused = 0
+        self.processed = 0
+
+        self._lock = threading.Lock()
+        self._results: Dict[str, Dict[str, Any]] = {}
+
+        df = pd.read_csv(previous_csv)
+        self.baseline_rows = len(df)
+        if FINGERPRINT_COLUMN not in df.columns:
+            print(
+                f"[INFO] Baseline {previous_csv} has no '{FINGERPRINT_COLUMN}' column; "
+                "every row will be processed."
+            )
+            return
+
+        columns = [c for c in RESULT_COLUMNS if c in df.columns]
+        # A baseline without detections has nothing to reuse
+        detected = df.get("detected_color", pd.Series(None, index=df.index, dtype=object))
+        failed = detected.isna() | detected.astype(str).str.strip().str.lower().isin(
+            _FAILED_DETECTIONS
+        )
+        usable = df[df[FINGERPRINT_COLUMN].notna() & ~failed]
+        usable = usable.drop_duplicates(FINGERPRINT_COLUMN, keep="last")
+        for fingerprint, values in zip(
+            usable[FINGERPRINT_COLUMN], usable[columns].to_dict("records")
+        ):
+            self._results[fingerprint] = {
+                k: (None if pd.isna(v) else v) for k, v in values.items()
+            }
+        print(
+            f"[INFO] Baseline {previous_csv}: {len(self._results)} reusable results "
+            f"out of {self.baseline_rows} rows."
+        )
+
+    def lookup(self, fingerprint: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Previous result columns for an unchanged row, or None (process it)."""
+        result = self._results.get(fingerprint) if fingerprint else None
+        with self._lock:
+            if result is None:
+                self.processed += 1
+            else:
+                self.reused += 1
+        return dict(result) if result is not None else None
+
+    def apply(
+        self, record: Dict[str, Any], result: Dict[str, Any], columns: Sequence[str]
+    ) -> None:
+        """Copy reused result values into an output record (known columns only)."""
+        for key in RESULT_COLUMNS:
+            if key in columns and key in result:
+                record[key] = result[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Baseline size and how many rows were reused vs. processed."""
+        with self._lock:
+            return {
+                "baseline_rows": self.baseline_rows,
+                "reused": self.reused,
+                "processed": self.processed,
+            }
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence
+
+from PIL import Image
+
+
+DEFAULT_DETECTION_CACHE_PATH = "data/cache/detections.sqlite"
+
+# Bump when the stored result format or detection prompts change meaning.
+DETECTION_CACHE_VERSION = "v1"
+
+# Access-time updates for cache hits are buffered and written in one
+# transaction once this many are pending (or on the next insert / close).
+_TOUCH_FLUSH_SIZE = 256
+
+
+def image_fingerprint(image: Image.Image) -> str:
+    """
+    Content hash of the decoded pixels (mode, size and raw bytes).
+
+    Two uploads of the same picture hash identically regardless of file
+    name or container metadata.
+    """
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"{image.mode}:{image.size[0]}x{image.size[1]}:".encode("ascii"))
+    h.update(image.tobytes())
+    return h.hexdigest()
+
+
+def bytes_fingerprint(data: bytes) -> str:
+    """
+    Content hash of the encoded image file.
+
+    Preferred over :func:`image_fingerprint` when the original bytes are
+    known: it does not depend on how (or at what scale) a caller decoded
+    them, so the API and the pipelines share entries.
+    """
+    return "b" + hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+def palette_version(candidate_colors: Sequence[str]) -> str:
+    """Short hash identifying a candidate palette."""
+    payload = json.dumps(list(candidate_colors)).encode("utf-8")
+    return hashlib.sha1(payload).hexdigest()[:12]
+
+
+class DetectionCache:
+    """
+    Content-addressed cache of color detection results.
+
+    Entries are keyed by the image fingerprint plus backend, model and
+    palette version, stored in a local SQLite file and evicted
+    least-recently-used once more than ``max_entries`` are stored.
+    Hits only read; their access times are buffered and written in
+    batches, so a warm cache does not commit on every lookup.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_DETECTION_CACHE_PATH,
+        max_entries: int = 100_000,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        path : str
+            SQLite file path (parent directories are created).
+            Use ":memory:" for a non-persistent cache.
+        max_entries : int
+            Size bound; the least recently used entries beyond it are evicted.
+        """
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        # key -> last access time not yet written to the database
+        self._touched: Dict[str, float] = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS detections (
+                key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_detections_access ON detections (last_access)"
+        )
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM detections").fetchone()[0]
+
+    @staticmethod
+    def make_key(fingerprint: str, backend: str, model: str, palette: str) -> str:
+        return f"{DETECTION_CACHE_VERSION}:{backend}:{model}:{palette}:{fingerprint}"
+
+    def _flush_touches(self) -> None:
+        """Write buffered access times. Caller holds the lock and commits."""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE detections SET last_access = ? WHERE key = ?",
+                [(ts, key) for key, ts in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for `key`, or None on a miss."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM detections WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._touched[key] = time.time()
+            if len(self._touched) >= _TOUCH_FLUSH_SIZE:
+                self._flush_touches()
+                self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, result: Dict[str, Any]) -> None:
+        """Store a result, evicting the least recently used entries if needed."""
+        payload = json.dumps(result, default=str)
+        with self._lock:
+            # Eviction below orders by last_access, so it must be current
+            self._flush_touches()
+            self._touched.pop(key, None)
+            existed = self._conn.execute(
+                "SELECT 1 FROM detections WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO detections (key, result, last_access) VALUES (?, ?, ?)",
+                (key, payload, time.time()),
+            )
+            if not existed:
+                self._count += 1
+            if self._count > self.max_entries:
+                # Evict down to 90% so eviction is not paid on every insert
+                target = int(self.max_entries * 0.9)
+                self._conn.execute(
+                    "DELETE FROM detections WHERE key IN ("
+                    "SELECT key FROM detections ORDER BY last_access ASC LIMIT ?)",
+                    (self._count - target,),
+                )
+                self._count = target
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and the number of stored entries."""
+        return {"hits": self.hits, "misses": self.misses, "entries": self._count}
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_touches()
+            self._conn.commit()
+            self._conn.close()
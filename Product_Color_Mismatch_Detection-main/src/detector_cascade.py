@@ -0,0 +1,324 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from PIL import Image
+
+from .clip_color_detector import DETECTOR_BACKENDS, ClipColorDetector
+from .clip_embedding_detector import ClipEmbeddingDetector
+
+
+# Cheapest first: local pixel statistics, local embedding model, GPT Vision.
+DEFAULT_TIERS = ("local", "clip", "gpt")
+
+# Minimum confidence for a tier's answer to be accepted without escalating.
+DEFAULT_THRESHOLDS = {"local": 0.55, "clip": 0.45}
+
+# Record fields that name a product category (first one present wins).
+CATEGORY_FIELDS = ("articleType", "subCategory", "category", "product_type")
+
+# Weight of the newest call in a tier's moving-average latency.
+_LATENCY_SMOOTHING = 0.2
+
+
+@dataclass
+class TierBudget:
+    """
+    Spending limits for one cascade tier.
+
+    Attributes
+    ----------
+    max_latency_ms : float, optional
+        The tier is skipped while its moving-average latency exceeds this.
+    cost_per_call : float
+        Estimated cost of one uncached call (e.g. USD).
+    max_cost : float, optional
+        The tier is skipped once the run's spend on it would exceed this.
+    """
+
+    max_latency_ms: Optional[float] = None
+    cost_per_call: float = 0.0
+    max_cost: Optional[float] = None
+
+
+@dataclass
+class CascadeConfig:
+    """
+    Tier order, acceptance thresholds and budgets of a :class:`DetectorCascade`.
+
+    Built from the ``cascade`` section of ``config.yml``::
+
+        cascade:
+          tiers: [local, clip, gpt]
+          thresholds: {local: 0.55, clip: 0.45}
+          category_thresholds:
+            Sarees: {local: 0.8}
+          budgets:
+            clip: {max_latency_ms: 1500}
+            gpt: {cost_per_call: 0.0003, max_cost: 10.0}
+    """
+
+    tiers: List[str] = field(default_factory=lambda: list(DEFAULT_TIERS))
+    thresholds: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_THRESHOLDS))
+    category_thresholds: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    budgets: Dict[str, TierBudget] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, raw: Optional[Dict[str, Any]]) -> "CascadeConfig":
+        """
+        Parse a config mapping (missing keys keep their defaults).
+
+        Raises
+        ------
+        ValueError
+            If a tier name is not a detector backend.
+        """
+        raw = raw or {}
+        config = cls()
+        if raw.get("tiers"):
+            config.tiers = [str(t) for t in raw["tiers"]]
+        for tier in config.tiers:
+            if tier not in DETECTOR_BACKENDS:
+                raise ValueError(
+                    f"Unknown cascade tier '{tier}'. "
+                    f"Expected one of: {', '.join(DETECTOR_BACKENDS)}."
+                )
+        config.thresholds.update(
+            {str(k): float(v) for k, v in (raw.get("thresholds") or {}).items()}
+        )
+        config.category_thresholds = {
+            str(category).lower(): {str(k): float(v) for k, v in (values or {}).items()}
+            for category, values in (raw.get("category_thresholds") or {}).items()
+        }
+        config.budgets = {
+            str(tier): TierBudget(**(values or {}))
+            for tier, values in (raw.get("budgets") or {}).items()
+        }
+        return config
+
+    def threshold(self, tier: str, category: Optional[str]) -> float:
+        """Acceptance threshold of `tier`, overridden per category if configured."""
+        if category:
+            override = self.category_thresholds.get(str(category).lower(), {})
+            if tier in override:
+                return override[tier]
+        return self.thresholds.get(tier, 0.0)
+
+
+def category_of(record: Dict[str, Any]) -> Optional[str]:
+    """Category of a dataset row / example (see :data:`CATEGORY_FIELDS`)."""
+    for key in CATEGORY_FIELDS:
+        value = record.get(key)
+        if value is not None and str(value).strip() and str(value) != "nan":
+            return str(value).strip()
+    return None
+
+
+class DetectorCascade:
+    """
+    Cost- and latency-aware router in front of :class:`ClipColorDetector`.
+
+    Tiers are tried cheapest first. A tier's answer is accepted when its
+    confidence reaches the (per-category) threshold; otherwise the next
+    tier runs. The last tier's answer is always accepted. Tiers that are
+    not installed (CLIP without torch/transformers) or not configured
+    (GPT without an API key) are left out, and a tier over its latency or
+    cost budget is skipped as long as a cheaper tier already answered.
+
+    Every result carries ``tier`` (the backend that answered),
+    ``tier_ms`` (its latency), ``elapsed_ms`` (whole cascade) and
+    ``cascade`` (one entry per tier tried).
+    """
+
+    def __init__(
+        self,
+        detector: ClipColorDetector,
+        config: Optional[CascadeConfig] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        detector : ClipColorDetector
+            Detector providing the backends (and the detection cache).
+        config : CascadeConfig, optional
+            Tier order, thresholds and budgets. Defaults to
+            :class:`CascadeConfig` defaults.
+        """
+        self.detector = detector
+        self.config = config or CascadeConfig()
+
+        self.tiers: List[str] = []
+        for tier in self.config.tiers:
+            if tier == "clip" and not ClipEmbeddingDetector.available():
+                print("[INFO] Cascade: 'clip' tier disabled (torch/transformers not installed).")
+                continue
+            if tier == "gpt" and detector.llm is None:
+                print("[INFO] Cascade: 'gpt' tier disabled (no OPENAI_API_KEY).")
+                continue
+            self.tiers.append(tier)
+        if not self.tiers:
+            raise ValueError("No cascade tier is available.")
+
+        self._lock = threading.Lock()
+        self._stats = {
+            tier: {"calls": 0, "accepted": 0, "skipped": 0, "errors": 0, "mean_ms": 0.0, "spent": 0.0}
+            for tier in self.tiers
+        }
+
+    # -------------------------------------------------
+    # Internals
+    # -------------------------------------------------
+
+    def _over_budget(self, tier: str) -> bool:
+        budget = self.config.budgets.get(tier)
+        if budget is None:
+            return False
+        with self._lock:
+            stats = self._stats[tier]
+            if (
+                budget.max_latency_ms is not None
+                and stats["calls"]
+                and stats["mean_ms"] > budget.max_latency_ms
+            ):
+                return True
+            return (
+                budget.max_cost is not None
+                and stats["spent"] + budget.cost_per_call > budget.max_cost
+            )
+
+    def _record(self, tier: str, elapsed_ms: float, cache_status: str) -> None:
+        budget = self.config.budgets.get(tier)
+        with self._lock:
+            stats = self._stats[tier]
+            stats["calls"] += 1
+            if cache_status != "hit":
+                # Cached answers cost nothing and say nothing about latency
+                if budget is not None:
+                    stats["spent"] += budget.cost_per_call
+                stats["mean_ms"] = (
+                    elapsed_ms
+                    if stats["mean_ms"] == 0.0
+                    else (1 - _LATENCY_SMOOTHING) * stats["mean_ms"]
+                    + _LATENCY_SMOOTHING * elapsed_ms
+                )
+
+    # -------------------------------------------------
+    # Public API
+    # -------------------------------------------------
+
+    def detect_color(
+        self,
+        image: Image.Image,
+        category: Optional[str] = None,
+        candidate_colors: Optional[Sequence[str]] = None,
+        top_k: int = 3,
+        source_bytes: Optional[bytes] = None,
+    ) -> Dict[str, Any]:
+        """
+        Detect the color with the cheapest tier that is confident enough.
+
+        Parameters
+        ----------
+        image : PIL.Image.Image
+            Product image.
+        category : str, optional
+            Product category selecting per-category thresholds.
+        candidate_colors : list[str], optional
+            Palette to choose from.
+        top_k : int
+            Number of ranked candidates to return.
+        source_bytes : bytes, optional
+            Original encoded image (lets the GPT tier skip re-encoding).
+
+        Returns
+        -------
+        dict
+            The accepted tier's result plus ``tier``, ``tier_ms``,
+            ``elapsed_ms`` and ``cascade``.
+
+        Raises
+        ------
+        Exception
+            Whatever the last tier raised, when no earlier tier produced
+            an answer. Earlier tiers that raise are recorded in
+            ``cascade`` and the next tier is tried.
+        """
+        started = time.perf_counter()
+        attempts: List[Dict[str, Any]] = []
+        answer: Optional[Dict[str, Any]] = None
+        answered_by: Optional[str] = None
+
+        for position, tier in enumerate(self.tiers):
+            last = position == len(self.tiers) - 1
+            if answer is not None and self._over_budget(tier):
+                with self._lock:
+                    self._stats[tier]["skipped"] += 1
+                attempts.append({"tier": tier, "skipped": "budget"})
+                continue
+
+            t0 = time.perf_counter()
+            try:
+                result, cache_status = self.detector.detect_color_with_status(
+                    image,
+                    candidate_colors=list(candidate_colors) if candidate_colors else None,
+                    top_k=top_k,
+                    backend=tier,
+                    source_bytes=source_bytes,
+                )
+            except Exception as exc:  # noqa: BLE001
+                # A broken tier escalates like an unconfident one; only
+                # the last tier failing with nothing to fall back on raises
+                elapsed_ms = (time.perf_counter() - t0) * 1000
+                with self._lock:
+                    self._stats[tier]["calls"] += 1
+                    self._stats[tier]["errors"] += 1
+                attempts.append(
+                    {"tier": tier, "error": str(exc), "elapsed_ms": round(elapsed_ms, 1)}
+                )
+                print(f"[WARN] Cascade: '{tier}' tier failed: {exc}")
+                if last and answer is None:
+                    raise
+                continue
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+            self._record(tier, elapsed_ms, cache_status)
+
+            confidence = float(result.get("detected_confidence") or 0.0)
+            threshold = self.config.threshold(tier, category)
+            attempts.append(
+                {
+                    "tier": tier,
+                    "detected_color": result.get("detected_color"),
+                    "detected_confidence": confidence,
+                    "threshold": threshold,
+                    "elapsed_ms": round(elapsed_ms, 1),
+                    "cache": cache_status,
+                }
+            )
+            if result.get("fallback_model") == "error":
+                continue
+
+            answer, answered_by = dict(result), tier
+            answer["tier_ms"] = round(elapsed_ms, 1)
+            if last or confidence >= threshold:
+                break
+
+        if answer is None:
+            # Every tier failed: surface the last error result
+            answer, answered_by = dict(result), tier
+            answer["tier_ms"] = attempts[-1].get("elapsed_ms")
+
+        with self._lock:
+            self._stats[answered_by]["accepted"] += 1
+        answer["tier"] = answered_by
+        answer["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        answer["cascade"] = attempts
+        return answer
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per tier: calls, accepted answers, budget skips, errors, mean latency (ms), spend."""
+        with self._lock:
+            return {
+                tier: {**values, "mean_ms": round(values["mean_ms"], 1)}
+                for tier, values in self._stats.items()
+            }
@@ -2,15 +2,21 @@ from __future__ import annotations
 
 import os
 import re
-from typing import Optional, List
+from typing import Optional, List, Tuple
 
-import pandas as pd
 from datasets import load_dataset
 from PIL import Image
 from tqdm import tqdm
 
+from .checkpoint import RunCheckpoint
 from .clip_color_detector import ClipColorDetector
-from .color_match_agent import ColorMatchAgent, Verdict
+from .color_match_agent import DEFAULT_VERDICT_BATCH_SIZE, ColorMatchAgent, Verdict
+from .delta import FINGERPRINT_COLUMN, DeltaBaseline, row_fingerprint
+from .detection_cache import image_fingerprint
+from .detector_cascade import DetectorCascade, category_of
+from .perceptual_verdict import PerceptualVerdictEngine
+from .openai_limiter import get_shared_limiter
+from .staged_executor import Stage, StagedExecutor
 
 
 def _pick_color_key(example_keys: List[str]) -> str:
@@ -51,6 +57,17 @@ def _get_row_identifier(example: dict, idx: int) -> str:
     return safe or str(idx)
 
 
+def _streaming_total(ds, split: str, limit: Optional[int]) -> Optional[int]:
+    """Best-effort row count for progress reporting of a streamed split."""
+    total = None
+    splits = getattr(getattr(ds, "info", None), "splits", None)
+    if splits and split in splits:
+        total = splits[split].num_examples or None
+    if limit is not None:
+        total = limit if total is None else min(total, limit)
+    return total
+
+
 def process_hf_dataset(
     output_csv: str,
     clip_detector: ClipColorDetector,
@@ -59,6 +76,18 @@ def process_hf_dataset(
     split: str = "train",
     limit: Optional[int] = None,
     image_dir: str = "data/images",
+    verdict_batch_size: int = DEFAULT_VERDICT_BATCH_SIZE,
+    chunk_size: int = 100,
+    resume: bool = False,
+    streaming: bool = False,
+    save_workers: int = 2,
+    detect_workers: int = 1,
+    queue_size: int = 32,
+    fused: bool = False,
+    cascade: Optional[DetectorCascade] = None,
+    verdict_engine: Optional[PerceptualVerdictEngine] = None,
+    baseline: Optional[DeltaBaseline] = None,
+    detect_batch_size: Optional[int] = None,
 ) -> None:
     """
     Process the Hugging Face dataset to detect colors and create a Match/Mismatch verdict.
@@ -71,7 +100,41 @@ def process_hf_dataset(
     For each example:
       - Saves the image into `image_dir`.
       - Uses CLIP to detect color.
-      - Uses LangChain agent to decide Match/Mismatch vs expected color.
+      - Uses LangChain agent to decide Match/Mismatch vs expected color
+        (batched: many products per LLM call).
+
+    Results are appended to `output_csv` every `chunk_size` rows with a
+    progress manifest, so an interrupted run can continue with
+    ``resume=True``.
+
+    With ``streaming=True`` the split is read through the iterable dataset
+    API: examples (and their images) are fetched and decoded one at a
+    time, so results start immediately and memory stays flat regardless
+    of dataset size.
+
+    With ``fused=True`` the detector returns the color and the verdict
+    from one GPT Vision call per product (see
+    :meth:`ClipColorDetector.detect_and_match`); the agent is then only
+    used when the model's verdict could not be parsed, and products
+    whose fused call failed are detected again without a verdict first.
+    Products whose detection fails are written as "Mismatch" with no
+    detected color, without asking the agent.
+
+    With a `cascade`, each image goes to the cheapest confident detector
+    tier (per-category thresholds use the example's category) and the
+    output gains ``detection_tier`` / ``detection_ms`` columns.
+
+    Every output row carries a ``row_fingerprint`` (id, image pixel hash,
+    expected color). With a `baseline` (the output of a previous run),
+    rows whose fingerprint is unchanged reuse their previous detection and
+    verdict; only new or changed rows are detected, so a refresh costs
+    time proportional to the delta.
+
+    Examples flow through a :class:`StagedExecutor` (image saving and
+    color detection run in separate worker pools connected by bounded
+    queues), so dataset iteration, disk writes and model calls overlap.
+    With the "clip" backend, the detect stage takes queued examples in
+    micro-batches and runs them through the vision tower together.
 
     Parameters
     ----------
@@ -89,45 +152,125 @@ def process_hf_dataset(
         Optional limit on number of rows to process.
     image_dir : str
         Directory where images will be saved.
+    verdict_batch_size : int
+        Number of (expected, detected) pairs per batched verdict call.
+    chunk_size : int
+        Rows per durable checkpoint.
+    resume : bool
+        Skip rows already completed by a previous run of the same dataset.
+    streaming : bool
+        Iterate the dataset lazily instead of downloading the whole split.
+    save_workers : int
+        Threads saving images to `image_dir`.
+    detect_workers : int
+        Concurrent color detection calls.
+    queue_size : int
+        Capacity of each inter-stage queue (backpressure).
+    fused : bool
+        Single-call detect-and-match mode instead of detect, then verdict.
+    cascade : DetectorCascade, optional
+        Cost-aware tier router used for detection instead of `clip_detector`.
+    verdict_engine : PerceptualVerdictEngine, optional
+        Decides verdicts by color distance, deferring only ambiguous pairs
+        to its agent (instead of sending every pair to `color_agent`).
+    baseline : DeltaBaseline, optional
+        Previous output whose results are reused for unchanged rows.
+    detect_batch_size : int, optional
+        Images per batched CLIP forward pass when the detector's default
+        backend is "clip" (defaults to the CLIP detector's batch size).
     """
-    print(f"[INFO] Loading Hugging Face dataset: {hf_name} (split='{split}')")
-    ds = load_dataset(hf_name, split=split)
+    if fused and cascade is not None:
+        raise ValueError("Fused mode and a detector cascade cannot be combined.")
 
-    # Apply row limit at the dataset level if requested
-    if limit is not None:
-        ds = ds.select(range(min(limit, len(ds))))
-        print(f"[INFO] Limited to first {len(ds)} examples.")
+    if streaming:
+        print(f"[INFO] Streaming Hugging Face dataset: {hf_name} (split='{split}')")
+        ds = load_dataset(hf_name, split=split, streaming=True)
+        total = _streaming_total(ds, split, limit)
+        if limit is not None:
+            ds = ds.take(limit)
+            print(f"[INFO] Limited to first {limit} examples.")
+        if ds.features is not None:
+            example_keys = list(ds.features.keys())
+        else:
+            # Schema unknown until the first example arrives
+            example_keys = list(next(iter(ds)).keys())
+    else:
+        print(f"[INFO] Loading Hugging Face dataset: {hf_name} (split='{split}')")
+        ds = load_dataset(hf_name, split=split)
+
+        # Apply row limit at the dataset level if requested
+        if limit is not None:
+            ds = ds.select(range(min(limit, len(ds))))
+            print(f"[INFO] Limited to first {len(ds)} examples.")
+        total = len(ds)
+        example_keys = list(ds.features.keys())
 
     # Determine which key to use as the expected color
-    example_keys = list(ds.features.keys())
     color_key = _pick_color_key(example_keys)
 
     if "image" not in example_keys:
         raise ValueError("Dataset must contain an 'image' column (PIL images).")
 
-    # Separate metadata (non-image) into a DataFrame
-    meta_ds = ds.remove_columns(["image"])
-    meta_df = meta_ds.to_pandas().copy()
+    # Output = metadata (non-image) columns + results
+    meta_columns = [k for k in example_keys if k != "image"]
+    columns = meta_columns + ["detected_color", "detected_confidence", "Verdict"]
+    if cascade is not None:
+        columns += ["detection_tier", "detection_ms"]
+    columns.append(FINGERPRINT_COLUMN)
+    checkpoint = RunCheckpoint(
+        output_csv, columns=columns, resume=resume, source=f"{hf_name}:{split}"
+    )
+    if checkpoint.complete:
+        print(f"[INFO] Run already complete: {output_csv}")
+        return
+    start_index = checkpoint.next_index
 
     # Ensure image directory exists
     os.makedirs(image_dir, exist_ok=True)
 
-    detected_colors: List[Optional[str]] = []
-    detected_confidences: List[Optional[float]] = []
-    verdicts: List[Verdict] = []
+    # Results of the current chunk; verdicts not already decided by the
+    # fused call are resolved per chunk
+    chunk_records: List[dict] = []
+    pending_pairs: List[Tuple[int, str, str]] = []
 
-    for idx, example in tqdm(
-        enumerate(ds),
-        total=len(ds),
-        desc="Processing HF products",
-    ):
-        expected_color = str(example.get(color_key, "")).strip()
+    def _flush(next_index: int) -> None:
+        if pending_pairs:
+            # LangChain agent for verdicts, many pairs per LLM call
+            # (or the perceptual engine, which asks it only for ambiguous pairs)
+            verdicts: List[Verdict] = (verdict_engine or color_agent).get_verdicts(
+                [(expected, detected) for _, expected, detected in pending_pairs],
+                batch_size=verdict_batch_size,
+            )
+            for (pos, _, _), verdict in zip(pending_pairs, verdicts):
+                chunk_records[pos]["Verdict"] = verdict
+        checkpoint.append(chunk_records, next_index=next_index)
+        chunk_records.clear()
+        pending_pairs.clear()
+
+    if not start_index:
+        remaining = ds
+    elif streaming:
+        remaining = ds.skip(start_index)
+    else:
+        remaining = ds.select(range(start_index, len(ds)))
+
+    def _save(task: dict) -> dict:
+        idx, example = task["idx"], task["example"]
         image: Image.Image = example["image"]
 
         # Save image locally
         row_id = _get_row_identifier(example, idx)
         img_filename = f"{idx:05d}_{row_id}.jpg"
         img_path = os.path.join(image_dir, img_filename)
+
+        task["fingerprint"] = row_fingerprint(
+            row_id, image_fingerprint(image), example.get(color_key)
+        )
+        if baseline is not None:
+            task["reused"] = baseline.lookup(task["fingerprint"])
+            if task["reused"] is not None and os.path.exists(img_path):
+                # Unchanged row, image already on disk
+                return task
         try:
             image.save(img_path)
             if idx < 5:
@@ -135,27 +278,111 @@ def process_hf_dataset(
         except Exception as exc:  # noqa: BLE001
             if idx < 5:
                 print(f"[DEBUG] Failed to save HF image for row {idx}: {exc}")
+        return task
 
-        # CLIP color detection
-        clip_result = clip_detector.detect_color(image=image)
-        detected_color = clip_result["detected_color"]
-        detected_confidence = float(clip_result["detected_confidence"])
+    def _detect(task: dict) -> dict:
+        example = task["example"]
+        if task.get("reused") is not None:
+            # Unchanged since the baseline run: nothing to detect
+            task["detection"] = None
+        elif fused:
+            # Color + verdict from a single vision call
+            task["detection"] = clip_detector.detect_and_match(
+                image=example["image"],
+                expected_color=str(example.get(color_key, "")).strip(),
+            )
+            if task["detection"].get("fallback_model") == "error":
+                # Fused call failed: detect plainly, the agent decides later
+                task["detection"] = clip_detector.detect_color(image=example["image"])
+        elif cascade is not None:
+            # Cheapest tier that is confident enough for this category
+            task["detection"] = cascade.detect_color(
+                image=example["image"], category=category_of(example)
+            )
+        else:
+            # CLIP color detection
+            task["detection"] = clip_detector.detect_color(image=example["image"])
+        return task
 
-        # LangChain agent for verdict
-        verdict: Verdict = color_agent.get_verdict(
-            expected_color=expected_color,
-            detected_color=detected_color,
+    def _detect_batch(batch: List[dict]) -> List[dict]:
+        todo = [task for task in batch if task.get("reused") is None]
+        for task in batch:
+            task["detection"] = None
+        # CLIP color detection, one forward pass per micro-batch
+        results = clip_detector.detect_colors(
+            [task["example"]["image"] for task in todo], batch_size=detect_batch_size
         )
+        for task, result in zip(todo, results):
+            task["detection"] = result
+        return batch
+
+    if not fused and cascade is None and clip_detector.default_backend == "clip":
+        detect_batch_size = detect_batch_size or clip_detector.clip_detector.batch_size
+        detect_stage = Stage(
+            "detect", _detect_batch, workers=detect_workers, batch_size=detect_batch_size
+        )
+    else:
+        detect_stage = Stage("detect", _detect, workers=detect_workers)
+
+    executor = StagedExecutor(
+        [
+            Stage("save", _save, workers=save_workers),
+            detect_stage,
+        ],
+        queue_size=queue_size,
+    )
+    tasks = (
+        {"idx": idx, "example": example}
+        for idx, example in enumerate(remaining, start=start_index)
+    )
+
+    idx = start_index - 1
+    for task in tqdm(
+        executor.run(tasks),
+        total=total,
+        initial=start_index,
+        desc="Processing HF products",
+    ):
+        idx, example = task["idx"], task["example"]
+        expected_color = str(example.get(color_key, "")).strip()
+        clip_result = task["detection"]
+
+        record = {key: example.get(key) for key in meta_columns}
+        if clip_result is None:
+            record["Verdict"] = None
+            baseline.apply(record, task["reused"], columns)
+        elif clip_result.get("fallback_model") == "error":
+            # Detection failed: there is no color to judge (re-run later)
+            record["detected_color"] = None
+            record["detected_confidence"] = None
+            record["Verdict"] = "Mismatch"
+        else:
+            record["detected_color"] = clip_result["detected_color"]
+            record["detected_confidence"] = float(clip_result["detected_confidence"])
+            record["Verdict"] = clip_result.get("verdict")
+            if cascade is not None:
+                record["detection_tier"] = clip_result["tier"]
+                record["detection_ms"] = clip_result["elapsed_ms"]
+        record[FINGERPRINT_COLUMN] = task["fingerprint"]
+        chunk_records.append(record)
+        if record["Verdict"] is None:
+            pending_pairs.append(
+                (len(chunk_records) - 1, expected_color, record["detected_color"])
+            )
 
-        detected_colors.append(detected_color)
-        detected_confidences.append(detected_confidence)
-        verdicts.append(verdict)
+        if len(chunk_records) >= chunk_size:
+            _flush(next_index=idx + 1)
 
-    meta_df["detected_color"] = detected_colors
-    meta_df["detected_confidence"] = detected_confidences
-    meta_df["Verdict"] = verdicts
+    _flush(next_index=idx + 1)
+    checkpoint.finish()
+    executor.print_stats()
+    if cascade is not None:
+        print(f"[INFO] Detector cascade: {cascade.stats()}")
+    if verdict_engine is not None:
+        print(f"[INFO] Perceptual verdicts: {verdict_engine.stats()}")
+    if baseline is not None:
+        print(f"[INFO] Incremental run: {baseline.stats()}")
+    print(f"[INFO] OpenAI rate limiter: {get_shared_limiter().stats()}")
 
-    # Save final CSV
-    meta_df.to_csv(output_csv, index=False)
     print(f"[INFO] Saved output with 'Verdict' column to: {output_csv}")
     print(f"[INFO] Images saved under: {os.path.abspath(image_dir)}")
@@ -0,0 +1,237 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+DEFAULT_HTTP_CACHE_DIR = "data/cache/http"
+
+_DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+# Access-time updates for cache hits are buffered and written in one
+# transaction once this many are pending (or on the next store / close).
+_TOUCH_FLUSH_SIZE = 256
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a URL used as the cache / deduplication key.
+
+    Lower-cases the scheme and host, drops default ports and the fragment,
+    and sorts the query parameters, so trivially different spellings of
+    the same image share one entry. The original URL is still what gets
+    requested.
+    """
+    parts = urlsplit(str(url).strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port is not None and str(parts.port) != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+class HttpImageCache:
+    """
+    On-disk HTTP cache for downloaded image bodies.
+
+    Bodies are stored as files under ``cache_dir`` with their ``ETag`` /
+    ``Last-Modified`` validators in an SQLite index, keyed by the
+    normalized URL. Cached entries are revalidated with a conditional GET
+    (a 304 costs a round trip, not a transfer). Total body size is capped
+    at ``max_bytes``; the least recently used entries are evicted.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_HTTP_CACHE_DIR,
+        max_bytes: int = 2 * 1024 ** 3,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        cache_dir : str
+            Directory holding the bodies and ``index.sqlite``.
+        max_bytes : int
+            Size bound for the stored bodies.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max(1, max_bytes)
+        self.stored = 0
+        self.evictions = 0
+
+        self._body_dir = os.path.join(cache_dir, "bodies")
+        os.makedirs(self._body_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._touched: Dict[str, float] = {}
+        self._conn = sqlite3.connect(
+            os.path.join(cache_dir, "index.sqlite"), check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                file TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_access ON responses (last_access)"
+        )
+        self._conn.commit()
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+
+    # -------------------------------------------------
+    # Internals
+    # -------------------------------------------------
+
+    def _path(self, file: str) -> str:
+        return os.path.join(self._body_dir, file)
+
+    def _flush_touches(self) -> None:
+        """Write buffered access times. Caller holds the lock and commits."""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE responses SET last_access = ? WHERE key = ?",
+                [(ts, key) for key, ts in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _evict(self) -> None:
+        """Drop LRU entries down to 90% of the cap. Caller holds the lock."""
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute(
+            "SELECT key, file, size FROM responses ORDER BY last_access ASC"
+        )
+        doomed = []
+        for key, file, size in rows:
+            if self._total_bytes <= target:
+                break
+            doomed.append((key, file))
+            self._total_bytes -= size
+        for key, file in doomed:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            try:
+                os.remove(self._path(file))
+            except FileNotFoundError:
+                pass
+        self.evictions += len(doomed)
+
+    # -------------------------------------------------
+    # Public API
+    # -------------------------------------------------
+
+    def validators(self, key: str) -> Dict[str, str]:
+        """Conditional request headers for a cached entry (empty on a miss)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return {}
+        headers = {}
+        if row[0]:
+            headers["If-None-Match"] = row[0]
+        if row[1]:
+            headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def read(self, key: str) -> Optional[bytes]:
+        """Cached body for `key` (marking it recently used), or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT file FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._touched[key] = time.time()
+            if len(self._touched) >= _TOUCH_FLUSH_SIZE:
+                self._flush_touches()
+                self._conn.commit()
+        try:
+            with open(self._path(row[0]), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            self.discard(key)
+            return None
+
+    def store(
+        self,
+        key: str,
+        body: bytes,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        """Write a body and its validators, evicting LRU entries over the cap."""
+        if len(body) > self.max_bytes:
+            return
+        file = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        tmp_path = self._path(f"{file}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(body)
+        os.replace(tmp_path, self._path(file))
+
+        with self._lock:
+            # Eviction below orders by last_access, so it must be current
+            self._flush_touches()
+            self._touched.pop(key, None)
+            row = self._conn.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self._total_bytes -= row[0]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, file, etag, last_modified, size, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, file, etag, last_modified, len(body), time.time()),
+            )
+            self._total_bytes += len(body)
+            self.stored += 1
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def discard(self, key: str) -> None:
+        """Forget an entry (e.g. its body file disappeared)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT file, size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            self._touched.pop(key, None)
+            if row is None:
+                return
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn.commit()
+            self._total_bytes -= row[1]
+        try:
+            os.remove(self._path(row[0]))
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Stored entries, total bytes and write/eviction counters."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return {
+                "entries": entries,
+                "bytes": self._total_bytes,
+                "stored": self.stored,
+                "evictions": self.evictions,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_touches()
+            self._conn.commit()
+            self._conn.close()
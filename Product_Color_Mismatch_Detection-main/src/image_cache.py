@@ -0,0 +1,190 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+
+
+# How many content hashes are remembered for files not held in memory.
+_MAX_ETAGS = 100_000
+
+
+def content_etag(body: bytes) -> str:
+    """Strong ETag (quoted) derived from the content hash."""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def http_date(timestamp: float) -> str:
+    """RFC 7231 date, as used by ``Last-Modified``."""
+    return formatdate(timestamp, usegmt=True)
+
+
+def is_not_modified(headers: Any, etag: str, mtime: float) -> bool:
+    """
+    Whether a GET with these request headers should get a 304.
+
+    ``If-None-Match`` wins over ``If-Modified-Since`` (RFC 7232 §6).
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [t.strip() for t in if_none_match.split(",")]
+        # Weak comparison: W/"x" matches "x"
+        return "*" in tags or etag in {t[2:] if t.startswith("W/") else t for t in tags}
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= since
+    return False
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) of a single-range ``Range`` header.
+
+    Returns None when the whole body should be sent (no header, a unit
+    other than bytes, or several ranges).
+
+    Raises
+    ------
+    ValueError
+        If the range cannot be satisfied (answer with 416).
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    if not (first.isdigit() or not first) or not (last.isdigit() or not last):
+        raise ValueError(f"Unsatisfiable range '{header}'.")
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last or 0)
+        if length <= 0 or size == 0:
+            raise ValueError(f"Unsatisfiable range '{header}'.")
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError(f"Unsatisfiable range '{header}'.")
+    return start, min(end, size - 1)
+
+
+class HotImageCache:
+    """
+    Byte-bounded in-memory LRU of image file bodies.
+
+    Entries are keyed by (path, mtime, size), so a rewritten file is
+    never served stale. Every body that is read gets a strong ETag from
+    its content hash; the hashes are remembered even after the body is
+    evicted, so conditional requests for cold images are answered
+    without touching the file.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 ** 2,
+        max_entry_bytes: Optional[int] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        max_bytes : int
+            Total size bound for the cached bodies.
+        max_entry_bytes : int, optional
+            Larger files are served but not cached. Defaults to
+            ``max_bytes // 8``.
+        """
+        self.max_bytes = max(0, max_bytes)
+        self.max_entry_bytes = (
+            max_entry_bytes if max_entry_bytes is not None else self.max_bytes // 8
+        )
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.not_modified = 0
+        self.partial = 0
+
+        self._lock = threading.Lock()
+        self._bodies: "OrderedDict[Tuple[str, int, int], Tuple[bytes, str]]" = OrderedDict()
+        self._etags: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+        self._bytes = 0
+
+    # -------------------------------------------------
+    # Internals
+    # -------------------------------------------------
+
+    @staticmethod
+    def _key(path: str) -> Tuple[str, int, int]:
+        st = os.stat(path)
+        return path, st.st_mtime_ns, st.st_size
+
+    def _remember_etag(self, key: Tuple[str, int, int], etag: str) -> None:
+        """Caller holds the lock."""
+        self._etags[key] = etag
+        self._etags.move_to_end(key)
+        while len(self._etags) > _MAX_ETAGS:
+            self._etags.popitem(last=False)
+
+    # -------------------------------------------------
+    # Public API
+    # -------------------------------------------------
+
+    def validator(self, path: str) -> Optional[str]:
+        """Known ETag of the file's current version, without reading it."""
+        key = self._key(path)
+        with self._lock:
+            return self._etags.get(key)
+
+    def read(self, path: str) -> Tuple[bytes, str]:
+        """Body and ETag of a file, from memory when it is hot."""
+        key = self._key(path)
+        with self._lock:
+            entry = self._bodies.get(key)
+            if entry is not None:
+                self._bodies.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        with open(path, "rb") as f:
+            body = f.read()
+        etag = content_etag(body)
+
+        with self._lock:
+            self._remember_etag(key, etag)
+            if len(body) <= self.max_entry_bytes and key not in self._bodies:
+                self._bodies[key] = (body, etag)
+                self._bytes += len(body)
+                while self._bytes > self.max_bytes:
+                    _, (old_body, _) = self._bodies.popitem(last=False)
+                    self._bytes -= len(old_body)
+                    self.evictions += 1
+        return body, etag
+
+    def record(self, not_modified: bool = False, partial: bool = False) -> None:
+        """Count a 304 or 206 answer."""
+        with self._lock:
+            self.not_modified += int(not_modified)
+            self.partial += int(partial)
+
+    def stats(self) -> Dict[str, Any]:
+        """Entries, bytes, hit rate and 304/206 counts."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._bodies),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "not_modified": self.not_modified,
+                "partial": self.partial,
+            }
@@ -0,0 +1,441 @@
+import ipaddress
+import random
+import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from io import BytesIO
+from typing import Dict, Optional
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from PIL import Image
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, RequestException, Timeout
+
+from .http_cache import HttpImageCache, normalize_url
+
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/122.0 Safari/537.36"
+    ),
+    "Accept": "image/avif,image/webp,image/apng,image/*,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+# HTTP statuses worth retrying: throttling and transient server errors.
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+ALLOWED_URL_SCHEMES = ("http", "https")
+
+
+def check_public_url(url: str) -> None:
+    """
+    Reject URLs that could reach the server's own network.
+
+    Only http(s) URLs whose host resolves exclusively to public addresses
+    pass. Used for user-supplied URLs (see ``ImageDownloader(public_only=True)``).
+
+    Raises
+    ------
+    ValueError
+        For another scheme, a missing or unresolvable host, or a host
+        resolving to a private, loopback, link-local or otherwise
+        non-public address.
+    """
+    parts = urlsplit(url)
+    if parts.scheme.lower() not in ALLOWED_URL_SCHEMES:
+        raise ValueError(
+            f"Unsupported URL scheme '{parts.scheme}'. "
+            f"Expected one of: {', '.join(ALLOWED_URL_SCHEMES)}."
+        )
+    host = parts.hostname
+    if not host:
+        raise ValueError(f"URL has no host: {url}")
+    try:
+        infos = socket.getaddrinfo(host, parts.port, proto=socket.IPPROTO_TCP)
+    except socket.gaierror as exc:
+        raise ValueError(f"Cannot resolve host '{host}': {exc}") from exc
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split("%")[0])
+        if address.version == 6 and address.ipv4_mapped is not None:
+            address = address.ipv4_mapped
+        if not address.is_global or address.is_multicast:
+            raise ValueError(f"URL host '{host}' resolves to a non-public address ({address}).")
+
+
+class _RateLimiter:
+    """
+    Global requests-per-second limiter shared by all download workers.
+
+    Spaces request start times at least ``1 / rate`` seconds apart.
+    A rate of ``None`` (or <= 0) disables limiting.
+    """
+
+    def __init__(self, rate: Optional[float]) -> None:
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def acquire(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class ImageDownloader:
+    """
+    Thread-safe, connection-pooled image downloader.
+
+    Callers download from their own threads (e.g. a pipeline stage), all
+    sharing one keep-alive ``requests.Session``. Requests per host are
+    bounded by ``per_host_limit``; an optional global ``rate_limit``
+    (requests/second) spaces requests out. Failed attempts are retried
+    with exponential backoff and full jitter.
+
+    Concurrent requests for the same (normalized) URL share one download.
+    Recently downloaded bodies are remembered in memory (``memo_bytes``),
+    so a URL repeated across rows is fetched once. With an ``http_cache``,
+    bodies are kept on disk and revalidated with ``ETag`` /
+    ``Last-Modified``; an entry validated less than ``revalidate_after``
+    seconds ago is served without any request.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 16,
+        per_host_limit: int = 8,
+        rate_limit: Optional[float] = None,
+        timeout: int = 30,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        http_cache: Optional[HttpImageCache] = None,
+        revalidate_after: float = 600.0,
+        memo_bytes: int = 64 * 1024 ** 2,
+        public_only: bool = False,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        max_workers : int
+            Size of the HTTP connection pool: the number of concurrent
+            callers whose keep-alive connections are reused.
+        per_host_limit : int
+            Maximum simultaneous requests to any single host.
+        rate_limit : float, optional
+            Global request rate in requests/second. ``None`` disables it.
+        timeout : int
+            Request timeout in seconds.
+        max_retries : int
+            Maximum attempts per URL.
+        backoff_base : float
+            Base delay (seconds) for exponential backoff.
+        backoff_max : float
+            Upper bound (seconds) for a single backoff delay.
+        http_cache : HttpImageCache, optional
+            Disk cache of response bodies (None = always download).
+        revalidate_after : float
+            Seconds a revalidated cache entry is trusted without a new request.
+        memo_bytes : int
+            Without an ``http_cache``, recently downloaded bodies up to this
+            many bytes are kept in memory so repeated URLs are not refetched.
+        public_only : bool
+            Refuse URLs, and redirects, that fail :func:`check_public_url`
+            (for servers fetching user-supplied URLs). The refusal is
+            raised as ValueError instead of returning None.
+        """
+        self.max_workers = max(1, max_workers)
+        self.per_host_limit = max(1, per_host_limit)
+        self.timeout = timeout
+        self.max_retries = max(1, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(
+            pool_connections=self.max_workers,
+            pool_maxsize=self.max_workers,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.public_only = public_only
+        if public_only:
+            # Runs on every response, before requests follows a redirect
+            self.session.hooks["response"].append(self._check_redirect)
+
+        self._rate_limiter = _RateLimiter(rate_limit)
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_lock = threading.Lock()
+
+        self.http_cache = http_cache
+        self.revalidate_after = revalidate_after
+        # Guards the in-flight map, validation times, memo and counters
+        self._dedup_lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+        self._validated_at: Dict[str, float] = {}
+        self.memo_bytes = memo_bytes
+        self._memo: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memo_size = 0
+        self._counts = {"downloaded": 0, "revalidated": 0, "fresh": 0, "deduplicated": 0}
+
+    # -------------------------------------------------
+    # Internals
+    # -------------------------------------------------
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc.lower()
+        with self._host_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_slots[host] = slot
+            return slot
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Delay before the next attempt: ``Retry-After`` or full-jitter exponential."""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+    @staticmethod
+    def _check_redirect(resp: requests.Response, *args, **kwargs) -> None:
+        if resp.is_redirect:
+            check_public_url(urljoin(resp.url, resp.headers["Location"]))
+
+    def _get(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        debug: bool,
+        idx: int,
+        img_idx: int,
+    ) -> Optional[requests.Response]:
+        """GET one URL, retrying transient failures. None if all attempts fail."""
+        if self.public_only:
+            check_public_url(url)
+        last_error: Optional[Exception] = None
+        slot = self._host_slot(url)
+
+        for attempt in range(1, self.max_retries + 1):
+            retry_after: Optional[str] = None
+            try:
+                if debug and idx < 5:
+                    print(
+                        f"[DEBUG] Row {idx} img {img_idx} try {attempt}/{self.max_retries} "
+                        f"-> {url[:100]}..."
+                    )
+
+                self._rate_limiter.acquire()
+                with slot:
+                    resp = self.session.get(url, headers=headers, timeout=self.timeout)
+
+                if debug and idx < 5:
+                    print(
+                        f"[DEBUG] Row {idx} img {img_idx} HTTP {resp.status_code} "
+                        f"(attempt {attempt})"
+                    )
+
+                if resp.status_code in RETRYABLE_STATUSES:
+                    retry_after = resp.headers.get("Retry-After")
+                    raise requests.HTTPError(
+                        f"retryable HTTP {resp.status_code}", response=resp
+                    )
+
+                resp.raise_for_status()
+                return resp
+
+            except (Timeout, ConnectionError) as exc:
+                last_error = exc
+                if debug and idx < 5:
+                    print(
+                        f"[DEBUG] Row {idx} img {img_idx} timeout/conn error on attempt "
+                        f"{attempt}: {exc}"
+                    )
+
+            except RequestException as exc:
+                last_error = exc
+                status = getattr(exc.response, "status_code", None)
+                if debug and idx < 5:
+                    print(
+                        f"[DEBUG] Row {idx} img {img_idx} HTTP error on attempt "
+                        f"{attempt}: {exc}"
+                    )
+                # Permanent HTTP error like 404 – no point retrying
+                if status not in RETRYABLE_STATUSES:
+                    break
+
+            if attempt < self.max_retries:
+                time.sleep(self._backoff(attempt, retry_after))
+
+        if debug and idx < 5:
+            print(
+                f"[DEBUG] Row {idx} img {img_idx} failed after {self.max_retries} attempts: "
+                f"{last_error}"
+            )
+        return None
+
+    def _count(self, outcome: str) -> None:
+        with self._dedup_lock:
+            self._counts[outcome] += 1
+
+    def _remember(self, key: str, body: bytes) -> None:
+        """Keep a body in the in-memory LRU memo (no disk cache configured)."""
+        if len(body) > self.memo_bytes:
+            return
+        with self._dedup_lock:
+            self._memo[key] = body
+            self._memo_size += len(body)
+            while self._memo_size > self.memo_bytes:
+                _, old = self._memo.popitem(last=False)
+                self._memo_size -= len(old)
+
+    def _fetch_cached(
+        self, url: str, key: str, debug: bool, idx: int, img_idx: int
+    ) -> Optional[bytes]:
+        """Body of `url` via the disk cache (conditional GET) or the network."""
+        cache = self.http_cache
+        if cache is None:
+            with self._dedup_lock:
+                body = self._memo.get(key)
+                if body is not None:
+                    self._memo.move_to_end(key)
+                    self._counts["deduplicated"] += 1
+                    return body
+            resp = self._get(url, None, debug, idx, img_idx)
+            if resp is None:
+                return None
+            self._count("downloaded")
+            self._remember(key, resp.content)
+            return resp.content
+
+        with self._dedup_lock:
+            validated_at = self._validated_at.get(key)
+        if validated_at is not None and time.monotonic() - validated_at < self.revalidate_after:
+            body = cache.read(key)
+            if body is not None:
+                self._count("fresh")
+                return body
+
+        resp = self._get(url, cache.validators(key), debug, idx, img_idx)
+        if resp is not None and resp.status_code == 304:
+            body = cache.read(key)
+            if body is not None:
+                if debug and idx < 5:
+                    print(f"[DEBUG] Row {idx} img {img_idx} not modified, served from cache")
+                with self._dedup_lock:
+                    self._counts["revalidated"] += 1
+                    self._validated_at[key] = time.monotonic()
+                return body
+            # Body vanished from disk: fetch it unconditionally
+            resp = self._get(url, None, debug, idx, img_idx)
+        if resp is None:
+            return None
+
+        cache.store(
+            key,
+            resp.content,
+            etag=resp.headers.get("ETag"),
+            last_modified=resp.headers.get("Last-Modified"),
+        )
+        with self._dedup_lock:
+            self._counts["downloaded"] += 1
+            self._validated_at[key] = time.monotonic()
+        return resp.content
+
+    # -------------------------------------------------
+    # Public API
+    # -------------------------------------------------
+
+    def fetch_bytes(
+        self,
+        url: str,
+        debug: bool = False,
+        idx: int = -1,
+        img_idx: int = -1,
+    ) -> Optional[bytes]:
+        """
+        Download the raw body of a single URL, retrying transient failures.
+
+        Identical URLs requested concurrently are downloaded once; with an
+        ``http_cache`` the body may come from disk after revalidation.
+
+        Returns
+        -------
+        bytes or None
+            Response body, or None if all attempts fail.
+        """
+        key = normalize_url(url)
+        with self._dedup_lock:
+            shared = self._in_flight.get(key)
+            if shared is None:
+                future: Future = Future()
+                self._in_flight[key] = future
+            else:
+                self._counts["deduplicated"] += 1
+        if shared is not None:
+            return shared.result()
+
+        content: Optional[bytes] = None
+        try:
+            content = self._fetch_cached(url, key, debug, idx, img_idx)
+        finally:
+            with self._dedup_lock:
+                del self._in_flight[key]
+            future.set_result(content)
+        return content
+
+    def stats(self) -> Dict[str, int]:
+        """How URLs were served: downloaded, revalidated (304), fresh from disk, deduplicated."""
+        with self._dedup_lock:
+            return dict(self._counts)
+
+    def fetch(
+        self,
+        url: str,
+        debug: bool = False,
+        idx: int = -1,
+        img_idx: int = -1,
+    ) -> Optional[Image.Image]:
+        """
+        Download and decode a single image.
+
+        Returns
+        -------
+        PIL.Image.Image or None
+            Decoded RGB image, or None if download or decoding fails.
+        """
+        content = self.fetch_bytes(url, debug=debug, idx=idx, img_idx=img_idx)
+        if content is None:
+            return None
+        try:
+            return Image.open(BytesIO(content)).convert("RGB")
+        except Exception as exc:  # noqa: BLE001
+            if debug and idx < 5:
+                print(f"[DEBUG] Row {idx} img {img_idx} decode error: {exc}")
+            return None
+
+    def close(self) -> None:
+        """Close pooled connections."""
+        self.session.close()
+
+    def __enter__(self) -> "ImageDownloader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,164 @@
+import os
+import re
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+# Saved image names:
+#   HF pipeline:  {row:05d}_{id}.jpg
+#   CSV pipeline: {row:05d}_{id}_img{j}.jpg
+_IMAGE_NAME_RE = re.compile(r"^(\d+)_(.+?)(?:_img(\d+))?$")
+
+
+def sanitize_id(raw: str) -> str:
+    """Sanitize ID for filename matching."""
+    safe = re.sub(r"[^A-Za-z0-9_-]+", "_", str(raw))
+    return safe or "unknown"
+
+
+def _parse_name(fname: str) -> Optional[Tuple[Optional[int], str, tuple]]:
+    """(row index, product id, preference rank) for an image file name."""
+    stem, ext = os.path.splitext(fname)
+    ext = ext.lower()
+    if ext not in IMAGE_EXTENSIONS:
+        return None
+    match = _IMAGE_NAME_RE.match(stem)
+    if match is None:
+        return None, stem, (0, IMAGE_EXTENSIONS.index(ext), fname)
+    row, product_id, img_num = match.groups()
+    # Prefer the first image of a row, then .jpg over .jpeg over .png
+    rank = (int(img_num or 0), IMAGE_EXTENSIONS.index(ext), fname)
+    return int(row), product_id, rank
+
+
+class ImageIndex:
+    """
+    In-memory index of saved product images.
+
+    Maps (row index, product id), row index and product id to file names,
+    so lookups never scan the directory. The index is refreshed lazily:
+    at most every ``refresh_interval`` seconds the directory mtime is
+    checked, and only when it changed are added/removed files applied.
+    """
+
+    def __init__(self, image_dir: str, refresh_interval: float = 1.0) -> None:
+        """
+        Parameters
+        ----------
+        image_dir : str
+            Directory the pipelines save images into.
+        refresh_interval : float
+            Minimum seconds between directory mtime checks.
+        """
+        self.image_dir = image_dir
+        self.refresh_interval = refresh_interval
+
+        self._lock = threading.Lock()
+        self._names: Dict[str, Tuple[Optional[int], str, tuple]] = {}
+        # key -> {file name: rank}; the best-ranked name wins
+        self._by_row_id: Dict[Tuple[int, str], Dict[str, tuple]] = {}
+        self._by_row: Dict[int, Dict[str, tuple]] = {}
+        self._by_id: Dict[str, Dict[str, tuple]] = {}
+        self._dir_mtime: Optional[int] = None
+        self._checked_at = 0.0
+
+    # -------------------------------------------------
+    # Internals
+    # -------------------------------------------------
+
+    @staticmethod
+    def _add(table: dict, key, fname: str, rank: tuple) -> None:
+        table.setdefault(key, {})[fname] = rank
+
+    @staticmethod
+    def _remove(table: dict, key, fname: str) -> None:
+        entries = table.get(key)
+        if entries is None:
+            return
+        entries.pop(fname, None)
+        if not entries:
+            del table[key]
+
+    def _index_name(self, fname: str) -> None:
+        parsed = _parse_name(fname)
+        if parsed is None:
+            return
+        row, product_id, rank = parsed
+        self._names[fname] = parsed
+        # Rows rank before ids so the earliest row wins an id lookup
+        self._add(self._by_id, product_id, fname, ((row if row is not None else -1),) + rank)
+        if row is not None:
+            self._add(self._by_row_id, (row, product_id), fname, rank)
+            self._add(self._by_row, row, fname, rank)
+
+    def _unindex_name(self, fname: str) -> None:
+        parsed = self._names.pop(fname, None)
+        if parsed is None:
+            return
+        row, product_id, _ = parsed
+        self._remove(self._by_id, product_id, fname)
+        if row is not None:
+            self._remove(self._by_row_id, (row, product_id), fname)
+            self._remove(self._by_row, row, fname)
+
+    def _best(self, entries: Optional[Dict[str, tuple]]) -> Optional[str]:
+        if not entries:
+            return None
+        fname = min(entries, key=entries.get)
+        return os.path.join(self.image_dir, fname)
+
+    # -------------------------------------------------
+    # Public API
+    # -------------------------------------------------
+
+    def refresh(self, force: bool = False) -> None:
+        """Apply directory changes if its mtime moved (or `force`)."""
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._checked_at < self.refresh_interval:
+                return
+            self._checked_at = now
+
+            try:
+                mtime = os.stat(self.image_dir).st_mtime_ns
+            except FileNotFoundError:
+                for fname in list(self._names):
+                    self._unindex_name(fname)
+                self._dir_mtime = None
+                return
+            if not force and mtime == self._dir_mtime:
+                return
+
+            with os.scandir(self.image_dir) as entries:
+                current = {e.name for e in entries if e.is_file()}
+            known = set(self._names)
+            for fname in known - current:
+                self._unindex_name(fname)
+            for fname in current - known:
+                self._index_name(fname)
+            self._dir_mtime = mtime
+
+    def lookup(self, product_id: str, index: Optional[int] = None) -> Optional[str]:
+        """
+        Path of the image for a product, or None.
+
+        With a row `index`, the file saved for that (row, id) wins, then any
+        file of that row; otherwise (or if none) the first file for the id.
+        """
+        self.refresh()
+        safe_id = sanitize_id(product_id)
+        with self._lock:
+            if index is not None:
+                path = self._best(self._by_row_id.get((index, safe_id))) or self._best(
+                    self._by_row.get(index)
+                )
+                if path is not None:
+                    return path
+            return self._best(self._by_id.get(safe_id))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._names)
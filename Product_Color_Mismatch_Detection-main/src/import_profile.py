@@ -0,0 +1,82 @@
+import os
+import re
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional
+
+
+# "import time:  self [us] | cumulative | imported package"
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)")
+
+
+def profile_imports(module: str, env: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    Import `module` in a fresh interpreter under ``python -X importtime``.
+
+    Parameters
+    ----------
+    module : str
+        Module to import (e.g. "fastapi_app").
+    env : dict, optional
+        Extra environment variables for the child process.
+
+    Returns
+    -------
+    dict
+        ``total_ms`` (cumulative time of `module` itself), ``modules`` (one
+        entry per imported module: name, depth, self_ms, cumulative_ms),
+        ``direct`` (the modules `module` imports itself) and ``returncode``.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env={**os.environ, **(env or {})},
+        capture_output=True,
+        text=True,
+    )
+    modules: List[Dict[str, Any]] = []
+    direct: List[Dict[str, Any]] = []
+    children: List[Dict[str, Any]] = []
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        entry = {
+            "name": name,
+            "depth": len(indent) // 2,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+        }
+        modules.append(entry)
+        # Children are reported before their parent
+        if entry["depth"] == 1:
+            children.append(entry)
+        elif entry["depth"] == 0:
+            if name == module:
+                direct = children
+            children = []
+    total = next((m["cumulative_ms"] for m in modules if m["name"] == module), None)
+    return {
+        "total_ms": total,
+        "modules": modules,
+        "direct": direct,
+        "returncode": proc.returncode,
+    }
+
+
+def print_import_report(module: str, top: int = 20) -> Dict[str, Any]:
+    """Profile `module` and print the slowest top-level imports and modules."""
+    profile = profile_imports(module)
+    if profile["returncode"] != 0 or profile["total_ms"] is None:
+        print(f"[ERROR] Importing '{module}' failed (exit code {profile['returncode']}).")
+        return profile
+
+    print(f"[INFO] import {module}: {profile['total_ms']:.0f} ms")
+    print(f"\nSlowest direct imports of {module} (cumulative):")
+    for m in sorted(profile["direct"], key=lambda m: m["cumulative_ms"], reverse=True)[:top]:
+        print(f"  {m['cumulative_ms']:9.1f} ms  {m['name']}")
+
+    print("\nSlowest modules (self time):")
+    for m in sorted(profile["modules"], key=lambda m: m["self_ms"], reverse=True)[:top]:
+        print(f"  {m['self_ms']:9.1f} ms  {m['name']}")
+    return profile
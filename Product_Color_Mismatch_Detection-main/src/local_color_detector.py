@@ -0,0 +1,318 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from .color_palette import COLOR_CANDIDATES, COLOR_REFERENCE_RGB
+
+
+# -------------------------------------------------
+# Color space helpers
+# -------------------------------------------------
+
+# sRGB (D65) -> XYZ
+_RGB_TO_XYZ = np.array(
+    [
+        [0.4124564, 0.3575761, 0.1804375],
+        [0.2126729, 0.7151522, 0.0721750],
+        [0.0193339, 0.1191920, 0.9503041],
+    ]
+)
+_D65_WHITE = np.array([0.95047, 1.0, 1.08883])
+
+
+def srgb_to_lab(rgb: np.ndarray) -> np.ndarray:
+    """
+    Convert sRGB values (0-255, shape ``(..., 3)``) to CIELAB (D65).
+
+    Fully vectorized; works on a single color or a whole pixel array.
+    """
+    c = np.asarray(rgb, dtype=np.float64) / 255.0
+    linear = np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+    xyz = linear @ _RGB_TO_XYZ.T / _D65_WHITE
+
+    eps = 216 / 24389
+    kappa = 24389 / 27
+    f = np.where(xyz > eps, np.cbrt(xyz), (kappa * xyz + 16) / 116)
+
+    lab = np.empty_like(f)
+    lab[..., 0] = 116 * f[..., 1] - 16
+    lab[..., 1] = 500 * (f[..., 0] - f[..., 1])
+    lab[..., 2] = 200 * (f[..., 1] - f[..., 2])
+    return lab
+
+
+def ciede2000(lab1: np.ndarray, lab2: np.ndarray) -> np.ndarray:
+    """
+    CIEDE2000 color difference between Lab arrays (broadcasting, ``(..., 3)``).
+
+    Vectorized implementation of Sharma, Wu & Dalal (2005).
+    """
+    lab1 = np.asarray(lab1, dtype=np.float64)
+    lab2 = np.asarray(lab2, dtype=np.float64)
+    L1, a1, b1 = lab1[..., 0], lab1[..., 1], lab1[..., 2]
+    L2, a2, b2 = lab2[..., 0], lab2[..., 1], lab2[..., 2]
+
+    C1 = np.hypot(a1, b1)
+    C2 = np.hypot(a2, b2)
+    C_bar7 = ((C1 + C2) / 2) ** 7
+    G = 0.5 * (1 - np.sqrt(C_bar7 / (C_bar7 + 25.0 ** 7)))
+    a1p = (1 + G) * a1
+    a2p = (1 + G) * a2
+    C1p = np.hypot(a1p, b1)
+    C2p = np.hypot(a2p, b2)
+    h1p = np.degrees(np.arctan2(b1, a1p)) % 360
+    h2p = np.degrees(np.arctan2(b2, a2p)) % 360
+
+    dLp = L2 - L1
+    dCp = C2p - C1p
+    chroma_zero = (C1p * C2p) == 0
+    dhp = h2p - h1p
+    dhp = np.where(dhp > 180, dhp - 360, dhp)
+    dhp = np.where(dhp < -180, dhp + 360, dhp)
+    dhp = np.where(chroma_zero, 0.0, dhp)
+    dHp = 2 * np.sqrt(C1p * C2p) * np.sin(np.radians(dhp) / 2)
+
+    Lp_bar = (L1 + L2) / 2
+    Cp_bar = (C1p + C2p) / 2
+    hp_sum = h1p + h2p
+    hp_bar = np.where(
+        np.abs(h1p - h2p) > 180,
+        np.where(hp_sum < 360, (hp_sum + 360) / 2, (hp_sum - 360) / 2),
+        hp_sum / 2,
+    )
+    hp_bar = np.where(chroma_zero, hp_sum, hp_bar)
+
+    T = (
+        1
+        - 0.17 * np.cos(np.radians(hp_bar - 30))
+        + 0.24 * np.cos(np.radians(2 * hp_bar))
+        + 0.32 * np.cos(np.radians(3 * hp_bar + 6))
+        - 0.20 * np.cos(np.radians(4 * hp_bar - 63))
+    )
+    d_theta = 30 * np.exp(-(((hp_bar - 275) / 25) ** 2))
+    Cp_bar7 = Cp_bar ** 7
+    R_C = 2 * np.sqrt(Cp_bar7 / (Cp_bar7 + 25.0 ** 7))
+    S_L = 1 + (0.015 * (Lp_bar - 50) ** 2) / np.sqrt(20 + (Lp_bar - 50) ** 2)
+    S_C = 1 + 0.045 * Cp_bar
+    S_H = 1 + 0.015 * Cp_bar * T
+    R_T = -np.sin(np.radians(2 * d_theta)) * R_C
+
+    return np.sqrt(
+        (dLp / S_L) ** 2
+        + (dCp / S_C) ** 2
+        + (dHp / S_H) ** 2
+        + R_T * (dCp / S_C) * (dHp / S_H)
+    )
+
+
+def _reference_lab_table(candidate_colors: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+    """Names with a known reference color and their Lab coordinates."""
+    names = [c for c in candidate_colors if c in COLOR_REFERENCE_RGB]
+    if not names:
+        return [], np.empty((0, 3))
+    return names, srgb_to_lab(np.array([COLOR_REFERENCE_RGB[c] for c in names]))
+
+
+# Precomputed table for the default palette.
+_DEFAULT_NAMES, _DEFAULT_LAB = _reference_lab_table(COLOR_CANDIDATES)
+
+
+# -------------------------------------------------
+# Detector
+# -------------------------------------------------
+
+
+class LocalColorDetector:
+    """
+    Dominant-color detector that runs entirely on the local CPU.
+
+    Steps:
+    - Downsample the image to at most ``sample_size`` pixels per edge.
+    - Mask out the background, estimated from the image border.
+    - Run vectorized k-means in CIELAB space on the remaining pixels.
+    - Map cluster centroids to the nearest palette entry via a
+      precomputed Lab table.
+
+    Returns the same result shape as :meth:`ClipColorDetector.detect_color`.
+    """
+
+    def __init__(
+        self,
+        n_clusters: int = 4,
+        sample_size: int = 64,
+        max_iter: int = 12,
+        background_distance: float = 12.0,
+        min_foreground_fraction: float = 0.05,
+        multicolor_threshold: float = 0.35,
+        match_distance: float = 15.0,
+        seed: int = 0,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        n_clusters : int
+            Number of k-means clusters.
+        sample_size : int
+            Maximum edge length (pixels) after downsampling.
+        max_iter : int
+            Maximum k-means iterations.
+        background_distance : float
+            Lab distance below which a pixel counts as background.
+        min_foreground_fraction : float
+            If masking leaves fewer pixels than this fraction, the mask is
+            ignored (e.g. a white product on a white background).
+        multicolor_threshold : float
+            If the best color covers less than this share of the product,
+            "multicolor" is reported (when it is a candidate).
+        match_distance : float
+            CIEDE2000 distance at which a centroid's score is halved.
+        seed : int
+            Random seed for k-means initialization (keeps results stable).
+        """
+        self.n_clusters = max(1, n_clusters)
+        self.sample_size = max(8, sample_size)
+        self.max_iter = max(1, max_iter)
+        self.background_distance = background_distance
+        self.min_foreground_fraction = min_foreground_fraction
+        self.multicolor_threshold = multicolor_threshold
+        self.match_distance = match_distance
+        self.seed = seed
+
+    # -------------------------------------------------
+    # Internals
+    # -------------------------------------------------
+
+    def _pixels(self, image: Image.Image) -> np.ndarray:
+        """Downsampled RGB pixel array of shape (H, W, 3)."""
+        if image.format == "JPEG":
+            # Let the JPEG decoder skip most of the work at reduced scale
+            image.draft("RGB", (self.sample_size * 2, self.sample_size * 2))
+        small = image.convert("RGB")
+        small.thumbnail((self.sample_size, self.sample_size), Image.BILINEAR)
+        return np.asarray(small, dtype=np.float64)
+
+    def _foreground(self, lab: np.ndarray) -> np.ndarray:
+        """Lab pixels of the product, with the border-colored background removed."""
+        border = np.concatenate([lab[0], lab[-1], lab[:, 0], lab[:, -1]])
+        background = np.median(border, axis=0)
+
+        flat = lab.reshape(-1, 3)
+        distance = np.linalg.norm(flat - background, axis=1)
+        foreground = flat[distance > self.background_distance]
+
+        if len(foreground) < self.min_foreground_fraction * len(flat):
+            return flat
+        return foreground
+
+    def _kmeans(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Vectorized k-means (k-means++ init). Returns (centroids, weights)."""
+        rng = np.random.default_rng(self.seed)
+        k = min(self.n_clusters, len(points))
+
+        centroids = np.empty((k, 3))
+        centroids[0] = points[rng.integers(len(points))]
+        closest = np.sum((points - centroids[0]) ** 2, axis=1)
+        for i in range(1, k):
+            total = closest.sum()
+            if total <= 0:
+                centroids[i:] = centroids[0]
+                break
+            centroids[i] = points[rng.choice(len(points), p=closest / total)]
+            closest = np.minimum(closest, np.sum((points - centroids[i]) ** 2, axis=1))
+
+        labels = np.zeros(len(points), dtype=np.int64)
+        for _ in range(self.max_iter):
+            distances = np.sum((points[:, None, :] - centroids[None, :, :]) ** 2, axis=2)
+            new_labels = distances.argmin(axis=1)
+            counts = np.bincount(new_labels, minlength=k)
+            sums = np.zeros((k, 3))
+            np.add.at(sums, new_labels, points)
+            nonempty = counts > 0
+            centroids[nonempty] = sums[nonempty] / counts[nonempty, None]
+            if np.array_equal(new_labels, labels):
+                break
+            labels = new_labels
+
+        weights = np.bincount(labels, minlength=k) / len(points)
+        return centroids, weights
+
+    # -------------------------------------------------
+    # Public API
+    # -------------------------------------------------
+
+    def detect_color(
+        self,
+        image: Image.Image,
+        candidate_colors: Optional[List[str]] = None,
+        top_k: int = 3,
+        **_: Any,
+    ) -> Dict[str, Any]:
+        """
+        Detect the dominant product color without any network call.
+
+        Parameters
+        ----------
+        image : PIL.Image.Image
+            Product image.
+        candidate_colors : list[str], optional
+            Palette to choose from. Defaults to `COLOR_CANDIDATES`.
+        top_k : int
+            Number of ranked candidates to return.
+
+        Returns
+        -------
+        dict
+            ``detected_color``, ``detected_confidence`` (share of the product
+            area explained by that color, discounted by color distance) and
+            ``top_candidates`` as ``(name, score)`` pairs.
+        """
+        if candidate_colors is None or list(candidate_colors) == COLOR_CANDIDATES:
+            names, table = _DEFAULT_NAMES, _DEFAULT_LAB
+        else:
+            names, table = _reference_lab_table(candidate_colors)
+
+        if not names:
+            return {
+                "detected_color": "unknown",
+                "detected_confidence": 0.0,
+                "top_candidates": [],
+                "fallback_model": "local-kmeans",
+                "error": "No candidate color has a reference value.",
+            }
+
+        lab = srgb_to_lab(self._pixels(image))
+        centroids, weights = self._kmeans(self._foreground(lab))
+
+        # Nearest palette entry per centroid (CIEDE2000), scored by cluster
+        # share and how close the centroid is to the reference
+        # (a distance of `match_distance` halves the score).
+        distances = ciede2000(centroids[:, None, :], table[None, :, :])
+        nearest = distances.argmin(axis=1)
+        closeness = 1.0 / (
+            1.0 + (distances[np.arange(len(nearest)), nearest] / self.match_distance) ** 2
+        )
+
+        scores = np.zeros(len(names))
+        np.add.at(scores, nearest, weights * closeness)
+        coverage = np.zeros(len(names))
+        np.add.at(coverage, nearest, weights)
+
+        order = np.argsort(scores)[::-1]
+        top_k = max(1, min(top_k, int(np.count_nonzero(scores)) or 1))
+        top_candidates = [(names[i], float(scores[i])) for i in order[:top_k]]
+
+        detected_color, detected_confidence = top_candidates[0]
+        if (
+            "multicolor" in (candidate_colors or COLOR_CANDIDATES)
+            and coverage[order[0]] < self.multicolor_threshold
+        ):
+            detected_color = "multicolor"
+            detected_confidence = float(1.0 - coverage[order[0]])
+
+        return {
+            "detected_color": detected_color,
+            "detected_confidence": detected_confidence,
+            "top_candidates": top_candidates,
+            "fallback_model": "local-kmeans",
+        }
@@ -0,0 +1,31 @@
+import threading
+from typing import Optional
+
+import httpx
+
+
+# Connection pool shared by every ChatOpenAI instance in the process.
+HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+_lock = threading.Lock()
+_sync_client: Optional[httpx.Client] = None
+_async_client: Optional[httpx.AsyncClient] = None
+
+
+def shared_http_client() -> httpx.Client:
+    """Process-wide keep-alive client for synchronous OpenAI calls."""
+    global _sync_client
+    with _lock:
+        if _sync_client is None:
+            _sync_client = httpx.Client(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+        return _sync_client
+
+
+def shared_async_http_client() -> httpx.AsyncClient:
+    """Process-wide keep-alive client for async OpenAI calls (``ainvoke``)."""
+    global _async_client
+    with _lock:
+        if _async_client is None:
+            _async_client = httpx.AsyncClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+        return _async_client
@@ -0,0 +1,415 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type, TypeVar
+
+
+T = TypeVar("T")
+
+# Default limits (OpenAI usage tier 1 for gpt-4o-mini); override with the
+# OPENAI_RPM / OPENAI_TPM environment variables or configure_shared_limiter().
+DEFAULT_RPM = 500
+DEFAULT_TPM = 200_000
+
+# Rough prompt-size estimates used to reserve tokens before a call.
+CHARS_PER_TOKEN = 4
+IMAGE_TOKEN_ESTIMATE = 765  # one 512x512 high-detail image on gpt-4o(-mini)
+
+
+def estimate_tokens(text: str = "", images: int = 0, max_output_tokens: int = 100) -> int:
+    """Upper-bound-ish token estimate for one chat call."""
+    return len(text) // CHARS_PER_TOKEN + images * IMAGE_TOKEN_ESTIMATE + max_output_tokens
+
+
+def _retryable_errors() -> Tuple[Type[BaseException], ...]:
+    """
+    OpenAI errors worth retrying. Imported on first use:
+    the `openai` package is slow to import and only needed once a call
+    is actually made.
+    """
+    from openai import APIConnectionError, InternalServerError, RateLimitError
+
+    return RateLimitError, APIConnectionError, InternalServerError
+
+
+def _retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Server-requested delay from a 429 response (Retry-After / retry-after-ms)."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return max(0.0, float(value) * scale)
+        except ValueError:
+            continue
+    return None
+
+
+class RateLimitExhausted(RuntimeError):
+    """Raised when a call is still throttled after all retries."""
+
+    def __init__(self, retry_after: float, cause: BaseException) -> None:
+        super().__init__(f"OpenAI rate limit persisted after retries: {cause}")
+        self.retry_after = retry_after
+
+
+class _TokenBucket:
+    """Continuously refilling bucket (not thread-safe; guarded by the limiter)."""
+
+    def __init__(self, per_minute: float, burst_seconds: float) -> None:
+        self.per_minute = float(per_minute)
+        self.burst_seconds = burst_seconds
+        self.rate = self.per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def set_scale(self, scale: float) -> None:
+        self.rate = self.per_minute / 60.0 * scale
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` is available (requests above capacity wait for a full bucket)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / max(self.rate, 1e-9)
+
+    def take(self, amount: float) -> None:
+        self.level -= min(amount, self.capacity)
+
+    def give_back(self, amount: float) -> None:
+        self.level = min(self.capacity, self.level + amount)
+
+
+class OpenAIRateLimiter:
+    """
+    Process-wide requests-per-minute + tokens-per-minute limiter.
+
+    Every OpenAI call reserves one request and its estimated tokens from
+    two token buckets before it is sent, so concurrent workers share one
+    budget. On a 429 the limiter pauses all callers for the server's
+    ``Retry-After`` (or an exponential backoff), halves its effective rate
+    and then recovers it gradually after successful calls.
+
+    Use :meth:`call` to run a request under the limiter with retries.
+    """
+
+    def __init__(
+        self,
+        rpm: float = DEFAULT_RPM,
+        tpm: float = DEFAULT_TPM,
+        burst_seconds: float = 10.0,
+        max_retries: int = 6,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        min_scale: float = 0.1,
+        recovery_step: float = 0.02,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        rpm : float
+            Requests per minute allowed.
+        tpm : float
+            Tokens per minute allowed (prompt + completion, estimated).
+        burst_seconds : float
+            Bucket capacity, as seconds worth of the per-minute limits.
+        max_retries : int
+            Retries per call on 429s and transient connection/server errors.
+        backoff_base, backoff_max : float
+            Exponential backoff (seconds) when no Retry-After is given.
+        min_scale : float
+            Lowest fraction of the configured rate used after throttling.
+        recovery_step : float
+            Rate fraction regained after every successful call.
+        """
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.min_scale = min_scale
+        self.recovery_step = recovery_step
+
+        self._cond = threading.Condition()
+        self._requests = _TokenBucket(rpm, burst_seconds)
+        self._tokens = _TokenBucket(tpm, burst_seconds)
+        self._scale = 1.0
+        self._paused_until = 0.0
+        self._consecutive_throttles = 0
+
+        # Counters
+        self._waiting = 0
+        self._in_flight = 0
+        self.calls = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+
+    # -------------------------------------------------
+    # Internals
+    # -------------------------------------------------
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _set_scale(self, scale: float) -> None:
+        self._scale = scale
+        self._requests.set_scale(scale)
+        self._tokens.set_scale(scale)
+
+    # -------------------------------------------------
+    # Public API
+    # -------------------------------------------------
+
+    def _try_take(self, tokens: int) -> float:
+        """Take budget if available (returns 0) or return seconds to wait. Lock held."""
+        now = time.monotonic()
+        wait = max(
+            self._paused_until - now,
+            self._requests.wait_time(1, now),
+            self._tokens.wait_time(tokens, now),
+        )
+        if wait <= 0:
+            self._requests.take(1)
+            self._tokens.take(tokens)
+            self._in_flight += 1
+        return wait
+
+    def acquire(self, tokens: int = 0) -> None:
+        """Block until one request and `tokens` tokens fit in the budget."""
+        started = time.monotonic()
+        with self._cond:
+            self._waiting += 1
+            try:
+                while True:
+                    wait = self._try_take(tokens)
+                    if wait <= 0:
+                        break
+                    self._cond.wait(timeout=wait)
+            finally:
+                self._waiting -= 1
+                self.wait_seconds += time.monotonic() - started
+
+    async def aacquire(self, tokens: int = 0) -> None:
+        """Async :meth:`acquire`: waits with ``asyncio.sleep`` instead of blocking."""
+        started = time.monotonic()
+        with self._cond:
+            self._waiting += 1
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_take(tokens)
+                if wait <= 0:
+                    return
+                await asyncio.sleep(wait)
+        finally:
+            with self._cond:
+                self._waiting -= 1
+                self.wait_seconds += time.monotonic() - started
+
+    def release(self, estimated_tokens: int = 0, actual_tokens: Optional[int] = None) -> None:
+        """Mark a call finished, refunding over-estimated tokens if usage is known."""
+        with self._cond:
+            self._in_flight = max(0, self._in_flight - 1)
+            if actual_tokens is not None:
+                overestimate = estimated_tokens - actual_tokens
+                if overestimate > 0:
+                    self._tokens.give_back(overestimate)
+                else:
+                    self._tokens.take(-overestimate)
+            self._cond.notify_all()
+
+    def report_success(self) -> None:
+        """Gradually restore the rate after successful calls."""
+        with self._cond:
+            self.calls += 1
+            self._consecutive_throttles = 0
+            if self._scale < 1.0:
+                self._set_scale(min(1.0, self._scale + self.recovery_step))
+
+    def report_throttled(self, retry_after: Optional[float] = None) -> float:
+        """
+        Register a 429: pause every caller and cut the rate in half.
+
+        Returns the pause (seconds) that was applied.
+        """
+        with self._cond:
+            self.throttled += 1
+            if retry_after is None:
+                retry_after = self._backoff(self._consecutive_throttles)
+            self._consecutive_throttles += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            self._set_scale(max(self.min_scale, self._scale * 0.5))
+            self._cond.notify_all()
+        return retry_after
+
+    def call(
+        self,
+        fn: Callable[[], T],
+        estimated_tokens: int = 0,
+        usage: Optional[Callable[[T], Optional[int]]] = None,
+    ) -> T:
+        """
+        Run `fn` under the limiter, retrying 429s and transient errors.
+
+        Parameters
+        ----------
+        fn : callable
+            Zero-argument function performing one OpenAI request.
+        estimated_tokens : int
+            Tokens reserved before the call (see :func:`estimate_tokens`).
+        usage : callable, optional
+            Extracts the actual total token count from the result, used to
+            correct the token bucket.
+
+        Raises
+        ------
+        RateLimitExhausted
+            If the call is still throttled after ``max_retries`` retries.
+        """
+        attempt = -1
+        while True:
+            attempt += 1
+            self.acquire(estimated_tokens)
+            try:
+                result = fn()
+            except _retryable_errors() as exc:
+                time.sleep(self._handle_failure(exc, attempt))
+                continue
+            except BaseException:
+                # Any other error (or cancellation) ends the call: free its slot
+                self.release()
+                raise
+            self._handle_success(result, estimated_tokens, usage)
+            return result
+
+    async def acall(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        estimated_tokens: int = 0,
+        usage: Optional[Callable[[T], Optional[int]]] = None,
+    ) -> T:
+        """
+        Async :meth:`call`: `fn` returns an awaitable (e.g. ``chain.ainvoke``)
+        and waiting never blocks the event loop.
+        """
+        attempt = -1
+        while True:
+            attempt += 1
+            await self.aacquire(estimated_tokens)
+            try:
+                result = await fn()
+            except _retryable_errors() as exc:
+                await asyncio.sleep(self._handle_failure(exc, attempt))
+                continue
+            except BaseException:
+                # Any other error (or cancellation) ends the call: free its slot
+                self.release()
+                raise
+            self._handle_success(result, estimated_tokens, usage)
+            return result
+
+    def _handle_failure(self, exc: BaseException, attempt: int) -> float:
+        """
+        Book-keeping for a failed attempt. Returns the delay before the
+        next attempt, or re-raises once retries are exhausted.
+        """
+        from openai import RateLimitError
+
+        self.release()
+        if isinstance(exc, RateLimitError):
+            # The shared pause (not this delay) holds every caller back
+            delay = self.report_throttled(_retry_after_seconds(exc))
+            print(
+                f"[WARN] OpenAI rate limited (attempt {attempt + 1}), "
+                f"pausing {delay:.1f}s at {self._scale:.0%} of the configured rate."
+            )
+            if attempt >= self.max_retries:
+                raise RateLimitExhausted(delay, exc) from exc
+            return 0.0
+
+        if attempt >= self.max_retries:
+            raise exc
+        delay = self._backoff(attempt)
+        print(
+            f"[WARN] OpenAI transient error (attempt {attempt + 1}): {exc}; "
+            f"retrying in {delay:.1f}s"
+        )
+        return delay
+
+    def _handle_success(
+        self,
+        result: Any,
+        estimated_tokens: int,
+        usage: Optional[Callable[[Any], Optional[int]]],
+    ) -> None:
+        actual = None
+        if usage is not None:
+            try:
+                actual = usage(result)
+            except Exception:  # noqa: BLE001
+                actual = None
+        self.release(estimated_tokens, actual)
+        self.report_success()
+
+    def queue_depth(self) -> int:
+        """Number of callers currently waiting for budget."""
+        with self._cond:
+            return self._waiting
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, effective limits and throttling counters."""
+        with self._cond:
+            return {
+                "queue_depth": self._waiting,
+                "in_flight": self._in_flight,
+                "effective_rpm": round(self._requests.rate * 60, 1),
+                "effective_tpm": round(self._tokens.rate * 60, 1),
+                "rate_scale": round(self._scale, 3),
+                "paused_for": round(max(0.0, self._paused_until - time.monotonic()), 2),
+                "calls": self.calls,
+                "throttled": self.throttled,
+                "wait_seconds": round(self.wait_seconds, 2),
+            }
+
+
+# -------------------------------------------------
+# Process-wide instance
+# -------------------------------------------------
+
+_shared_limiter: Optional[OpenAIRateLimiter] = None
+_shared_lock = threading.RLock()
+
+
+def configure_shared_limiter(
+    rpm: Optional[float] = None,
+    tpm: Optional[float] = None,
+    **kwargs: Any,
+) -> OpenAIRateLimiter:
+    """Replace the process-wide limiter (call before creating detectors/agents)."""
+    global _shared_limiter
+    with _shared_lock:
+        _shared_limiter = OpenAIRateLimiter(
+            rpm=rpm or float(os.getenv("OPENAI_RPM", DEFAULT_RPM)),
+            tpm=tpm or float(os.getenv("OPENAI_TPM", DEFAULT_TPM)),
+            **kwargs,
+        )
+        return _shared_limiter
+
+
+def get_shared_limiter() -> OpenAIRateLimiter:
+    """The process-wide limiter shared by every OpenAI caller."""
+    with _shared_lock:
+        if _shared_limiter is None:
+            return configure_shared_limiter()
+        return _shared_limiter
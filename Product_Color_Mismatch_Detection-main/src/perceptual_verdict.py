@@ -0,0 +1,266 @@
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .color_match_agent import DEFAULT_VERDICT_BATCH_SIZE, ColorMatchAgent, Verdict
+from .color_palette import (
+    CATALOG_COLOR_RGB,
+    COLOR_ALIASES,
+    COLOR_FAMILIES,
+    COLOR_REFERENCE_RGB,
+)
+from .local_color_detector import ciede2000, srgb_to_lab
+
+
+# Values that mean "no color" (missing cells, failed detections).
+_MISSING_NAMES = {"", "nan", "none", "null", "unknown"}
+
+# Where a verdict came from (the `verdict_source` column).
+SOURCE_SAME_NAME = "same-name"
+SOURCE_PERCEPTUAL = "perceptual"
+SOURCE_SAME_FAMILY = "same-family"
+SOURCE_AGENT = "agent"
+SOURCE_UNDECIDED = "undecided"
+
+
+def normalize_color_name(name: object) -> str:
+    """Lower-case, single-spaced canonical spelling of a color name."""
+    text = re.sub(r"[\s_\-/]+", " ", str(name).strip().lower()).strip()
+    if text in COLOR_ALIASES:
+        return COLOR_ALIASES[text]
+    text = re.sub(r"\bgrey\b", "gray", text)
+    return COLOR_ALIASES.get(text, text)
+
+
+class PerceptualVerdictEngine:
+    """
+    Match/Mismatch verdicts from color science, with the LLM as a fallback.
+
+    Color names are resolved to reference CIELAB coordinates and a color
+    family (:data:`COLOR_FAMILIES`). A pair is decided locally when
+
+    - both names are the same after normalization (Match);
+    - they share a family and their CIEDE2000 distance is below
+      ``family_threshold - margin`` (Match);
+    - they belong to different families and the distance is below
+      ``threshold - margin`` (Match) or above ``threshold + margin``
+      (Mismatch).
+
+    Everything else (unknown names, multicolor, distances within
+    ``margin`` of a threshold) is deferred to the :class:`ColorMatchAgent`.
+    Without an agent there is no margin, and same-family pairs farther
+    apart than ``family_threshold`` (e.g. "Light Blue" vs "Navy Blue")
+    are a Match by family, counted as ``same-family`` in :meth:`stats`.
+    All distances are computed in one vectorized pass over the unique
+    names, so whole output columns are scored at once.
+    """
+
+    def __init__(
+        self,
+        agent: Optional[ColorMatchAgent] = None,
+        threshold: float = 12.0,
+        family_threshold: float = 45.0,
+        margin: float = 4.0,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        agent : ColorMatchAgent, optional
+            Resolves the deferred pairs. Without an agent they are decided
+            by the threshold alone (no margin) and by color family.
+        threshold : float
+            CIEDE2000 distance separating Match/Mismatch across families.
+        family_threshold : float
+            Largest distance still a Match within one family.
+        margin : float
+            Half-width of the band around a threshold deferred to the agent.
+        """
+        self.agent = agent
+        self.threshold = threshold
+        self.family_threshold = family_threshold
+        self.margin = margin
+
+        names = list(COLOR_REFERENCE_RGB) + list(CATALOG_COLOR_RGB)
+        rgb = {**COLOR_REFERENCE_RGB, **CATALOG_COLOR_RGB}
+        self._lab_index: Dict[str, int] = {name: i for i, name in enumerate(names)}
+        self._lab = srgb_to_lab(np.array([rgb[n] for n in names], dtype=float))
+        self._resolved: Dict[str, Optional[str]] = {}
+
+        self.counts = {
+            SOURCE_SAME_NAME: 0,
+            SOURCE_PERCEPTUAL: 0,
+            SOURCE_SAME_FAMILY: 0,
+            SOURCE_AGENT: 0,
+        }
+
+    # -------------------------------------------------
+    # Internals
+    # -------------------------------------------------
+
+    def _resolve(self, normalized: str) -> Optional[str]:
+        """Known color name for a normalized name (falling back to its head noun)."""
+        if normalized in self._resolved:
+            return self._resolved[normalized]
+        name: Optional[str] = None
+        if normalized in COLOR_FAMILIES:
+            name = normalized
+        elif normalized:
+            # "Mushroom Brown" -> "brown", "Fluorescent Pink" -> "pink"
+            head = COLOR_ALIASES.get(normalized.split()[-1], normalized.split()[-1])
+            if head in COLOR_FAMILIES:
+                name = head
+        self._resolved[normalized] = name
+        return name
+
+    def _lookup(self, names: pd.Series) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Per row: normalized-name code, Lab row and family code (-1 when
+        unknown), plus the normalized names. Each distinct spelling is
+        normalized and resolved only once.
+        """
+        raw_codes, raw_uniques = pd.factorize(names)
+        normalized = [normalize_color_name(v) for v in raw_uniques]
+        norm_codes, uniques = pd.factorize(
+            pd.Series([None if n in _MISSING_NAMES else n for n in normalized], dtype=object)
+        )
+        # Missing names get code -1, which hits the padding entries below
+        codes = np.append(norm_codes, -1)[raw_codes]
+        resolved = [self._resolve(u) for u in uniques]
+        lab_rows = np.array(
+            [self._lab_index.get(r, -1) if r is not None else -1 for r in resolved]
+            + [-1]
+        )
+        family_names = sorted(set(COLOR_FAMILIES.values()))
+        family_codes = np.array(
+            [
+                family_names.index(COLOR_FAMILIES[r]) if r is not None else -1
+                for r in resolved
+            ]
+            + [-1]
+        )
+        return codes, lab_rows[codes], family_codes[codes], np.append(
+            np.array(uniques, dtype=object), None
+        )
+
+    # -------------------------------------------------
+    # Public API
+    # -------------------------------------------------
+
+    def score(self, expected: Sequence[str], detected: Sequence[str]) -> pd.DataFrame:
+        """
+        Vectorized local decision for aligned columns of color names.
+
+        Returns
+        -------
+        pandas.DataFrame
+            One row per pair (same index as `expected` when it is a
+            Series) with ``delta_e`` (NaN if a name has no reference),
+            ``same_family``, ``Verdict`` ("Match", "Mismatch" or None when
+            deferred) and ``verdict_source`` (see the ``SOURCE_*``
+            constants).
+        """
+        expected = pd.Series(expected) if not isinstance(expected, pd.Series) else expected
+        detected = pd.Series(list(detected), index=expected.index)
+
+        e_codes, e_lab, e_family, e_names = self._lookup(expected)
+        d_codes, d_lab, d_family, d_names = self._lookup(detected)
+
+        same_name = (e_codes >= 0) & (d_codes >= 0) & (e_names[e_codes] == d_names[d_codes])
+
+        has_lab = (e_lab >= 0) & (d_lab >= 0)
+        delta_e = np.full(len(expected), np.nan)
+        if has_lab.any():
+            delta_e[has_lab] = ciede2000(
+                self._lab[e_lab[has_lab]], self._lab[d_lab[has_lab]]
+            )
+        same_family = (e_family >= 0) & (e_family == d_family)
+
+        band = self.margin if self.agent is not None else 0.0
+        limit = np.where(same_family, self.family_threshold, self.threshold)
+        match = has_lab & (delta_e <= limit - band)
+        mismatch = has_lab & ~same_family & (delta_e > self.threshold + band)
+        # Nobody to ask: a shade of the same family is a Match
+        family_match = (
+            same_family & ~match if self.agent is None else np.zeros(len(expected), dtype=bool)
+        )
+
+        verdict = np.full(len(expected), None, dtype=object)
+        verdict[mismatch] = "Mismatch"
+        verdict[match | family_match] = "Match"
+        verdict[same_name] = "Match"
+
+        source = np.full(len(expected), SOURCE_UNDECIDED, dtype=object)
+        source[match | mismatch] = SOURCE_PERCEPTUAL
+        source[family_match] = SOURCE_SAME_FAMILY
+        source[same_name] = SOURCE_SAME_NAME
+
+        return pd.DataFrame(
+            {
+                "delta_e": delta_e,
+                "same_family": same_family,
+                "Verdict": verdict,
+                "verdict_source": source,
+            },
+            index=expected.index,
+        )
+
+    def decide(
+        self,
+        expected: Sequence[str],
+        detected: Sequence[str],
+        batch_size: int = DEFAULT_VERDICT_BATCH_SIZE,
+    ) -> pd.DataFrame:
+        """
+        :meth:`score`, then the deferred pairs resolved by the agent
+        (each unique pair once, in batched calls).
+        """
+        scored = self.score(expected, detected)
+        pending = scored["Verdict"].isna()
+
+        if pending.any() and self.agent is not None:
+            pairs = pd.DataFrame(
+                {
+                    "expected": pd.Series(expected, index=scored.index)[pending]
+                    .astype(str)
+                    .str.strip(),
+                    "detected": pd.Series(list(detected), index=scored.index)[pending]
+                    .astype(str)
+                    .str.strip(),
+                }
+            )
+            unique = pairs.drop_duplicates()
+            verdicts = self.agent.get_verdicts(
+                list(unique.itertuples(index=False, name=None)), batch_size=batch_size
+            )
+            unique = unique.assign(Verdict=verdicts)
+            resolved = pairs.merge(unique, on=["expected", "detected"], how="left")
+            scored.loc[pending, "Verdict"] = resolved["Verdict"].to_numpy()
+            scored.loc[pending, "verdict_source"] = SOURCE_AGENT
+
+        for source in self.counts:
+            self.counts[source] += int((scored["verdict_source"] == source).sum())
+        return scored
+
+    def get_verdicts(
+        self,
+        pairs: Sequence[Tuple[str, str]],
+        batch_size: int = DEFAULT_VERDICT_BATCH_SIZE,
+    ) -> List[Verdict]:
+        """
+        Drop-in for :meth:`ColorMatchAgent.get_verdicts` (one verdict per
+        (expected, detected) pair, in order).
+
+        Pairs left undecided (no agent and no reference color) are
+        reported as "Mismatch", matching the pipelines' default.
+        """
+        if not pairs:
+            return []
+        expected, detected = zip(*pairs)
+        verdicts = self.decide(list(expected), list(detected), batch_size=batch_size)["Verdict"]
+        return [v if pd.notna(v) else "Mismatch" for v in verdicts]
+
+    def stats(self) -> Dict[str, int]:
+        """How many verdicts were decided by name, by color distance, by family and by the agent."""
+        return dict(self.counts)
@@ -1,17 +1,36 @@
 import ast
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 import pandas as pd
-import requests
 from PIL import Image
 from tqdm import tqdm
-from requests.exceptions import Timeout, ConnectionError, RequestException
 
 from .clip_color_detector import ClipColorDetector
-from .color_match_agent import ColorMatchAgent, Verdict
+from .color_match_agent import DEFAULT_VERDICT_BATCH_SIZE, ColorMatchAgent
+from .checkpoint import RunCheckpoint
+from .delta import FINGERPRINT_COLUMN, DeltaBaseline, bytes_digest, row_fingerprint
+from .detector_cascade import DetectorCascade, category_of
+from .perceptual_verdict import PerceptualVerdictEngine
+from .http_cache import HttpImageCache
+from .image_downloader import ImageDownloader
+from .openai_limiter import get_shared_limiter
+from .staged_executor import Stage, StagedExecutor
+
+
+# How many of a row's image URLs are fetched:
+#   "first"            - stop at the first usable image (detection only)
+#   "all"              - download every image before detection
+#   "first+background" - first usable image now, the rest by background workers
+FETCH_POLICIES = ("first", "all", "first+background")
+
+# How downloaded images are written under `image_dir`:
+#   "full"      - the decoded image at full resolution
+#   "thumbnail" - a small JPEG preview (longest edge `thumbnail_size`)
+SAVE_MODES = ("full", "thumbnail")
 
 
 # -------------------------------------------------
@@ -72,10 +91,12 @@ def _load_image_from_url(
     img_idx: int = -1,
     timeout: int = 30,
     max_retries: int = 3,
+    downloader: Optional[ImageDownloader] = None,
+    http_cache: Optional[HttpImageCache] = None,
 ) -> Optional[Image.Image]:
     """
     Load an image from a single HTTP/HTTPS URL using a browser-like User-Agent,
-    with retries and a longer timeout.
+    with retries (exponential backoff with jitter) and a longer timeout.
 
     Parameters
     ----------
@@ -88,81 +109,123 @@ def _load_image_from_url(
     img_idx : int
         Image index within that row (for logging).
     timeout : int
-        Request timeout in seconds.
+        Request timeout in seconds (ignored when `downloader` is given).
     max_retries : int
-        How many times to retry on timeouts / connection errors.
+        How many times to retry on timeouts / connection errors
+        (ignored when `downloader` is given).
+    downloader : ImageDownloader, optional
+        Shared downloader whose pooled session should be reused.
+    http_cache : HttpImageCache, optional
+        Disk cache consulted (with revalidation) before downloading
+        (ignored when `downloader` is given).
 
     Returns
     -------
     PIL.Image.Image or None
         Loaded image (RGB) or None if all attempts fail.
     """
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/122.0 Safari/537.36"
-        ),
-        "Accept": "image/avif,image/webp,image/apng,image/*,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.9",
-    }
-
-    last_error: Optional[Exception] = None
-
-    for attempt in range(1, max_retries + 1):
-        try:
-            if debug and idx < 5:
-                print(
-                    f"[DEBUG] Row {idx} img {img_idx} try {attempt}/{max_retries} "
-                    f"-> {url[:100]}..."
-                )
-
-            resp = requests.get(url, headers=headers, timeout=timeout)
-            if debug and idx < 5:
-                print(
-                    f"[DEBUG] Row {idx} img {img_idx} HTTP {resp.status_code} "
-                    f"(attempt {attempt})"
-                )
-
-            resp.raise_for_status()
-            img = Image.open(BytesIO(resp.content))
-            return img.convert("RGB")
-
-        except (Timeout, ConnectionError) as exc:
-            last_error = exc
-            if debug and idx < 5:
-                print(
-                    f"[DEBUG] Row {idx} img {img_idx} timeout/conn error on attempt "
-                    f"{attempt}: {exc}"
-                )
-            # retry (unless final attempt)
+    if downloader is not None:
+        return downloader.fetch(url, debug=debug, idx=idx, img_idx=img_idx)
+
+    with ImageDownloader(
+        max_workers=1, timeout=timeout, max_retries=max_retries, http_cache=http_cache
+    ) as dl:
+        return dl.fetch(url, debug=debug, idx=idx, img_idx=img_idx)
+
+
+def _is_image(content: Optional[bytes]) -> bool:
+    """Cheap check that a payload has a readable image header (no full decode)."""
+    if not content:
+        return False
+    try:
+        Image.open(BytesIO(content))
+        return True
+    except Exception:  # noqa: BLE001
+        return False
+
+
+def _save_image(img: Image.Image, img_path: str, save_mode: str, thumbnail_size: int) -> None:
+    if save_mode == "thumbnail":
+        thumb = img.copy()
+        thumb.thumbnail((thumbnail_size, thumbnail_size))
+        thumb.save(img_path, quality=85)
+    else:
+        img.save(img_path)
+
+
+def _fetch_and_save_rest(
+    downloader: ImageDownloader,
+    rest: List[Tuple[int, str]],
+    idx: int,
+    row_id: str,
+    image_dir: str,
+    save_mode: str,
+    thumbnail_size: int,
+) -> None:
+    """Background job of "first+background": fetch and save a row's other images."""
+    for j, url in rest:
+        img = downloader.fetch(url, debug=True, idx=idx, img_idx=j)
+        if img is None:
             continue
+        img_path = os.path.join(image_dir, f"{idx:05d}_{row_id}_img{j}.jpg")
+        try:
+            _save_image(img, img_path, save_mode, thumbnail_size)
+        except Exception as exc:  # noqa: BLE001
+            if idx < 5:
+                print(f"[DEBUG] Failed to save image row {idx} img {j}: {exc}")
 
-        except RequestException as exc:
-            last_error = exc
-            if debug and idx < 5:
-                print(
-                    f"[DEBUG] Row {idx} img {img_idx} HTTP error on attempt "
-                    f"{attempt}: {exc}"
-                )
-            # HTTP error like 4xx / 5xx – no point retrying
-            break
 
+def _decode_and_save(task: dict) -> dict:
+    """
+    CPU-bound pipeline stage (runs in a process pool).
+
+    Decodes every downloaded payload of a row, saves each image under
+    ``task["image_dir"]`` and keeps the first successfully decoded one
+    for color detection, downscaled to ``task["detect_max_edge"]`` so only
+    a small image is pickled back to the parent process. Its encoded
+    bytes come back as ``task["image_bytes"]``: detection cache keys and
+    GPT uploads use them, so the downscale does not change either.
+    """
+    idx = task["idx"]
+    detect_max_edge = task.pop("detect_max_edge")
+    first_image: Optional[Image.Image] = None
+    first_bytes: Optional[bytes] = None
+
+    for j, content in enumerate(task.pop("payloads")):
+        if content is None:
+            continue
+        try:
+            img = Image.open(BytesIO(content))
+            if task["save_mode"] == "thumbnail":
+                # Neither the saved preview nor detection needs full
+                # resolution: let the JPEG decoder work at reduced scale
+                edge = max(task["thumbnail_size"], detect_max_edge)
+                img.draft("RGB", (edge, edge))
+            img = img.convert("RGB")
         except Exception as exc:  # noqa: BLE001
-            last_error = exc
-            if debug and idx < 5:
-                print(
-                    f"[DEBUG] Row {idx} img {img_idx} unknown error on attempt "
-                    f"{attempt}: {exc}"
-                )
-            break
+            if idx < 5:
+                print(f"[DEBUG] Row {idx} img {j} decode error: {exc}")
+            continue
 
-    if debug and idx < 5:
-        print(
-            f"[DEBUG] Row {idx} img {img_idx} failed after {max_retries} attempts: "
-            f"{last_error}"
-        )
-    return None
+        # Save image
+        img_filename = f"{idx:05d}_{task['row_id']}_img{j}.jpg"
+        img_path = os.path.join(task["image_dir"], img_filename)
+        try:
+            _save_image(img, img_path, task["save_mode"], task["thumbnail_size"])
+            if idx < 5:
+                print(f"[DEBUG] Saved image row {idx} img {j} -> {img_path}")
+        except Exception as exc:  # noqa: BLE001
+            if idx < 5:
+                print(f"[DEBUG] Failed to save image row {idx} img {j}: {exc}")
+
+        # Use first successful image for CLIP, at the detector's working size
+        if first_image is None:
+            img.thumbnail((detect_max_edge, detect_max_edge), Image.LANCZOS)
+            first_image, first_bytes = img, content
+
+    task["image"] = first_image
+    task["image_bytes"] = first_bytes
+    return task
 
 
 def _pick_color_column(df: pd.DataFrame) -> str:
@@ -213,15 +276,49 @@ def process_dataset(
     color_agent: ColorMatchAgent,
     limit: Optional[int] = None,
     image_dir: str = "data/images",
+    download_workers: int = 16,
+    per_host_limit: int = 8,
+    rate_limit: Optional[float] = None,
+    http_cache: Optional[HttpImageCache] = None,
+    fetch_policy: str = "all",
+    background_workers: int = 2,
+    save_mode: str = "full",
+    thumbnail_size: int = 256,
+    decode_workers: int = 2,
+    detect_workers: int = 1,
+    queue_size: int = 32,
+    verdict_batch_size: int = DEFAULT_VERDICT_BATCH_SIZE,
+    chunk_size: int = 100,
+    resume: bool = False,
+    cascade: Optional[DetectorCascade] = None,
+    verdict_engine: Optional[PerceptualVerdictEngine] = None,
+    baseline: Optional[DeltaBaseline] = None,
+    detect_batch_size: Optional[int] = None,
 ) -> None:
     """
     Process the dataset to detect colors and create a Match/Mismatch verdict.
 
     For each product row:
     - Parse ALL image URLs from the 'images' column.
-    - Download & save each image under `image_dir`.
+    - Download & save each image under `image_dir` (per `fetch_policy`).
     - Use the FIRST successfully loaded image for CLIP color detection.
-    - Use LangChain agent to decide Match/Mismatch vs catalog color.
+    - Use LangChain agent to decide Match/Mismatch vs catalog color
+      (batched: many products per LLM call).
+
+    Rows flow through a :class:`StagedExecutor`: concurrent downloads
+    (shared :class:`ImageDownloader`) -> decode & save (process pool) ->
+    color detection (threads), connected by bounded queues so the stages
+    overlap. With the "clip" backend the detect stage takes queued rows
+    in micro-batches and runs them through the vision tower together.
+    Results come back in row order. Results are appended to
+    `output_csv` every `chunk_size` rows with a progress manifest, so an
+    interrupted run can continue with ``resume=True``.
+
+    Every output row carries a ``row_fingerprint`` (id, content hash of
+    the first usable image, expected color). With a `baseline` (the
+    output of a previous run), unchanged rows skip decoding and detection
+    and reuse their previous result; downloads still run (cheap
+    revalidations with an `http_cache`) to hash the current image.
 
     Parameters
     ----------
@@ -237,7 +334,60 @@ def process_dataset(
         Optional limit on number of rows to process.
     image_dir : str
         Directory where images will be saved.
+    download_workers : int
+        Number of concurrent image downloads.
+    per_host_limit : int
+        Maximum concurrent downloads from a single host.
+    rate_limit : float, optional
+        Global download rate cap in requests/second (None = unlimited).
+    http_cache : HttpImageCache, optional
+        Disk cache of image bodies keyed by normalized URL. Re-runs only
+        pay a conditional request (304) per cached image. Identical URLs
+        within a run are downloaded once either way.
+    fetch_policy : str
+        One of :data:`FETCH_POLICIES`. "first" stops at the first usable
+        image of a row; "first+background" also hands the remaining URLs
+        to `background_workers` threads that save them while detection
+        continues (waited for at the end of the run, not checkpointed).
+    background_workers : int
+        Threads fetching the remaining images for "first+background".
+    save_mode : str
+        One of :data:`SAVE_MODES`: "full" images or "thumbnail" previews.
+    thumbnail_size : int
+        Longest edge in pixels of saved thumbnails.
+    decode_workers : int
+        Processes decoding and saving downloaded images.
+    detect_workers : int
+        Concurrent color detection calls.
+    queue_size : int
+        Capacity of each inter-stage queue (backpressure).
+    verdict_batch_size : int
+        Number of (expected, detected) pairs per batched verdict call.
+    chunk_size : int
+        Rows per durable checkpoint.
+    resume : bool
+        Skip rows already completed by a previous run of the same input.
+    cascade : DetectorCascade, optional
+        Cost-aware tier router used for detection instead of
+        `clip_detector`; adds ``detection_tier`` / ``detection_ms`` columns.
+    verdict_engine : PerceptualVerdictEngine, optional
+        Decides verdicts by color distance, deferring only ambiguous pairs
+        to its agent (instead of sending every pair to `color_agent`).
+    baseline : DeltaBaseline, optional
+        Previous output whose results are reused for unchanged rows.
+    detect_batch_size : int, optional
+        Images per batched CLIP forward pass when the detector's default
+        backend is "clip" (defaults to the CLIP detector's batch size).
     """
+    if fetch_policy not in FETCH_POLICIES:
+        raise ValueError(
+            f"Unknown fetch policy '{fetch_policy}'. Expected one of: {', '.join(FETCH_POLICIES)}."
+        )
+    if save_mode not in SAVE_MODES:
+        raise ValueError(
+            f"Unknown save mode '{save_mode}'. Expected one of: {', '.join(SAVE_MODES)}."
+        )
+
     df = pd.read_csv(input_csv)
 
     if limit is not None:
@@ -255,79 +405,233 @@ def process_dataset(
     # Ensure image directory exists
     os.makedirs(image_dir, exist_ok=True)
 
-    detected_colors: List[Optional[str]] = []
-    detected_confidences: List[Optional[float]] = []
-    verdicts: List[Verdict] = []
-
-    for idx, row in tqdm(df.iterrows(), total=len(df), desc="Processing products"):
-        expected_color = str(row.get(color_col, "")).strip()
-
-        raw_images_cell = row.get("images")
-        urls = _parse_image_urls(raw_images_cell)
-
-        if idx < 5:
-            print(f"[DEBUG] Row {idx} raw images cell: {raw_images_cell!r}")
-            print(f"[DEBUG] Row {idx} parsed URLs ({len(urls)}):")
-            for j, u in enumerate(urls[:5]):
-                print(f"    [{j}] {u}")
-
-        if not urls:
-            detected_colors.append(None)
-            detected_confidences.append(None)
-            verdicts.append("Mismatch")
-            continue
+    columns = list(df.columns) + ["detected_color", "detected_confidence", "Verdict"]
+    if cascade is not None:
+        columns += ["detection_tier", "detection_ms"]
+    columns.append(FINGERPRINT_COLUMN)
+    checkpoint = RunCheckpoint(
+        output_csv, columns=columns, resume=resume, source=os.path.abspath(input_csv)
+    )
+    if checkpoint.complete:
+        print(f"[INFO] Run already complete: {output_csv}")
+        return
+    start_index = checkpoint.next_index
+
+    # Results of the current chunk; verdicts are resolved per chunk
+    chunk_records: List[dict] = []
+    pending_pairs: List[Tuple[int, str, str]] = []
+
+    def _flush(next_index: int) -> None:
+        # LangChain agent for verdicts, many pairs per LLM call
+        if pending_pairs:
+            batch_verdicts = (verdict_engine or color_agent).get_verdicts(
+                [(expected, detected) for _, expected, detected in pending_pairs],
+                batch_size=verdict_batch_size,
+            )
+            for (pos, _, _), verdict in zip(pending_pairs, batch_verdicts):
+                chunk_records[pos]["Verdict"] = verdict
+        checkpoint.append(chunk_records, next_index=next_index)
+        chunk_records.clear()
+        pending_pairs.clear()
+
+    def _row_tasks():
+        for idx, row in df.iloc[start_index:].iterrows():
+            raw_images_cell = row.get("images")
+            urls = _parse_image_urls(raw_images_cell)
+
+            if idx < 5:
+                print(f"[DEBUG] Row {idx} raw images cell: {raw_images_cell!r}")
+                print(f"[DEBUG] Row {idx} parsed URLs ({len(urls)}):")
+                for j, u in enumerate(urls[:5]):
+                    print(f"    [{j}] {u}")
+
+            yield {
+                "idx": idx,
+                "expected_color": row.get(color_col),
+                "category": category_of(row),
+                "row_id": _get_row_identifier(row, idx),
+                "urls": urls,
+                "image_dir": image_dir,
+                "save_mode": save_mode,
+                "thumbnail_size": thumbnail_size,
+                "detect_max_edge": clip_detector.preprocessor.max_edge,
+            }
+
+    downloader = ImageDownloader(
+        max_workers=download_workers,
+        per_host_limit=per_host_limit,
+        rate_limit=rate_limit,
+        http_cache=http_cache,
+    )
 
-        # Download and save all images for this row,
-        # but only use the first successfully loaded image for CLIP
-        first_image: Optional[Image.Image] = None
-        row_id = _get_row_identifier(row, idx)
+    background: Optional[ThreadPoolExecutor] = None
+    if fetch_policy == "first+background":
+        background = ThreadPoolExecutor(
+            max_workers=max(1, background_workers), thread_name_prefix="img-background"
+        )
 
+    def _fingerprint(task: dict) -> dict:
+        first = next((p for p in task["payloads"] if _is_image(p)), None)
+        task["fingerprint"] = row_fingerprint(
+            task["row_id"],
+            bytes_digest(first) if first is not None else None,
+            task.pop("expected_color"),
+        )
+        if baseline is not None and first is not None:
+            task["reused"] = baseline.lookup(task["fingerprint"])
+            if task["reused"] is not None:
+                task["payloads"] = []
+        return task
+
+    def _download(task: dict) -> dict:
+        urls = task.pop("urls")
+        if fetch_policy == "all":
+            task["payloads"] = [
+                downloader.fetch_bytes(url, debug=True, idx=task["idx"], img_idx=j)
+                for j, url in enumerate(urls)
+            ]
+            return _fingerprint(task)
+
+        # Stop at the first payload that looks like an image
+        payloads: List[Optional[bytes]] = []
         for j, url in enumerate(urls):
-            img = _load_image_from_url(url, debug=True, idx=idx, img_idx=j)
-            if img is None:
-                continue
-
-            # Save image
-            img_filename = f"{idx:05d}_{row_id}_img{j}.jpg"
-            img_path = os.path.join(image_dir, img_filename)
-            try:
-                img.save(img_path)
-                if idx < 5:
-                    print(f"[DEBUG] Saved image row {idx} img {j} -> {img_path}")
-            except Exception as exc:  # noqa: BLE001
-                if idx < 5:
-                    print(f"[DEBUG] Failed to save image row {idx} img {j}: {exc}")
-
-            # Use first successful image for CLIP
-            if first_image is None:
-                first_image = img
-
-        if first_image is None:
-            # All downloads failed
-            detected_colors.append(None)
-            detected_confidences.append(None)
-            verdicts.append("Mismatch")
-            continue
-
-        # CLIP color detection using first successful image
-        clip_result = clip_detector.detect_color(image=first_image)
-        detected_color = clip_result["detected_color"]
-        detected_confidence = float(clip_result["detected_confidence"])
-
-        # LangChain agent for verdict
-        verdict: Verdict = color_agent.get_verdict(
-            expected_color=expected_color,
-            detected_color=detected_color,
+            content = downloader.fetch_bytes(url, debug=True, idx=task["idx"], img_idx=j)
+            payloads.append(content)
+            if _is_image(content):
+                break
+        task["payloads"] = payloads
+        task = _fingerprint(task)
+        if task.get("reused") is not None:
+            # Unchanged row: no decoding, saving or detection needed
+            return task
+
+        rest = list(enumerate(urls))[len(payloads):]
+        if background is not None and rest:
+            background.submit(
+                _fetch_and_save_rest,
+                downloader,
+                rest,
+                task["idx"],
+                task["row_id"],
+                image_dir,
+                save_mode,
+                thumbnail_size,
+            )
+        return task
+
+    def _detect(task: dict) -> dict:
+        image = task.pop("image", None)
+        source_bytes = task.pop("image_bytes", None)
+        if image is None:
+            task["detection"] = None
+        elif cascade is not None:
+            # Cheapest tier that is confident enough for this category
+            task["detection"] = cascade.detect_color(
+                image=image, category=task["category"], source_bytes=source_bytes
+            )
+        else:
+            # CLIP color detection using first successful image
+            task["detection"] = clip_detector.detect_color(
+                image=image, source_bytes=source_bytes
+            )
+        return task
+
+    def _detect_batch(batch: List[dict]) -> List[dict]:
+        images = [task.pop("image", None) for task in batch]
+        sources = [task.pop("image_bytes", None) for task in batch]
+        todo = [i for i, image in enumerate(images) if image is not None]
+        for task in batch:
+            task["detection"] = None
+        # CLIP color detection, one forward pass per micro-batch
+        results = clip_detector.detect_colors(
+            [images[i] for i in todo],
+            batch_size=detect_batch_size,
+            source_bytes=[sources[i] for i in todo],
         )
+        for i, result in zip(todo, results):
+            batch[i]["detection"] = result
+        return batch
+
+    if cascade is None and clip_detector.default_backend == "clip":
+        detect_batch_size = detect_batch_size or clip_detector.clip_detector.batch_size
+        detect_stage = Stage(
+            "detect", _detect_batch, workers=detect_workers, batch_size=detect_batch_size
+        )
+    else:
+        detect_stage = Stage("detect", _detect, workers=detect_workers)
+
+    executor = StagedExecutor(
+        [
+            Stage("download", _download, workers=download_workers),
+            Stage("decode", _decode_and_save, workers=decode_workers, kind="process"),
+            detect_stage,
+        ],
+        queue_size=queue_size,
+    )
 
-        detected_colors.append(detected_color)
-        detected_confidences.append(detected_confidence)
-        verdicts.append(verdict)
-
-    df["detected_color"] = detected_colors
-    df["detected_confidence"] = detected_confidences
-    df["Verdict"] = verdicts
+    with downloader:
+        for task in tqdm(
+            executor.run(_row_tasks()),
+            total=len(df),
+            initial=start_index,
+            desc="Processing products",
+        ):
+            idx = task["idx"]
+            row = df.loc[idx]
+            expected_color = str(row.get(color_col, "")).strip()
+            record = row.to_dict()
+            record.update(
+                {"detected_color": None, "detected_confidence": None, "Verdict": "Mismatch"}
+            )
+            record[FINGERPRINT_COLUMN] = task["fingerprint"]
+            chunk_records.append(record)
+
+            clip_result = task["detection"]
+            if task.get("reused") is not None:
+                # Previous detection and verdict of this unchanged row
+                baseline.apply(record, task["reused"], columns)
+                if record["Verdict"] is None:
+                    pending_pairs.append(
+                        (len(chunk_records) - 1, expected_color, record["detected_color"])
+                    )
+            elif clip_result is not None and clip_result.get("fallback_model") == "error":
+                # Detection failed: no color to judge, the row is retried
+                # by the next incremental run
+                if cascade is not None:
+                    record["detection_tier"] = clip_result.get("tier")
+                    record["detection_ms"] = clip_result.get("elapsed_ms")
+            elif clip_result is not None:
+                detected_color = clip_result["detected_color"]
+                record["detected_color"] = detected_color
+                record["detected_confidence"] = float(clip_result["detected_confidence"])
+                if cascade is not None:
+                    record["detection_tier"] = clip_result["tier"]
+                    record["detection_ms"] = clip_result["elapsed_ms"]
+
+                # Verdict is resolved per chunk in batches by the LangChain agent
+                pending_pairs.append((len(chunk_records) - 1, expected_color, detected_color))
+            # else: no URLs or all downloads failed -> Mismatch
+
+            if len(chunk_records) >= chunk_size:
+                _flush(next_index=idx + 1)
+
+        if background is not None:
+            # Remaining images are saved before the downloader closes
+            background.shutdown(wait=True)
+
+    _flush(next_index=len(df))
+    checkpoint.finish()
+    executor.print_stats()
+    print(f"[INFO] Image downloads: {downloader.stats()}")
+    if cascade is not None:
+        print(f"[INFO] Detector cascade: {cascade.stats()}")
+    if verdict_engine is not None:
+        print(f"[INFO] Perceptual verdicts: {verdict_engine.stats()}")
+    if baseline is not None:
+        print(f"[INFO] Incremental run: {baseline.stats()}")
+    if http_cache is not None:
+        print(f"[INFO] HTTP image cache: {http_cache.stats()}")
+    print(f"[INFO] OpenAI rate limiter: {get_shared_limiter().stats()}")
 
-    df.to_csv(output_csv, index=False)
     print(f"Saved output with 'Verdict' column to: {output_csv}")
     print(f"Images saved under: {os.path.abspath(image_dir)}")
@@ -0,0 +1,169 @@
+import json
+import os
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+
+from .color_match_agent import DEFAULT_VERDICT_BATCH_SIZE
+from .dataset_store import COLOR_COLUMN_CANDIDATES
+
+
+# Verdict of rows without a detected color (same default as the pipelines).
+NO_DETECTION_VERDICT = "Mismatch"
+
+
+def diff_path_for(output_csv: str) -> str:
+    """Diff summary stored next to the re-verdicted CSV."""
+    return f"{output_csv}.diff.json"
+
+
+def reverdict_frame(
+    df: pd.DataFrame,
+    resolver: Any,
+    color_column: Optional[str] = None,
+    batch_size: int = DEFAULT_VERDICT_BATCH_SIZE,
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Recompute the ``Verdict`` column of a pipeline output.
+
+    Each distinct (expected, detected) pair is resolved once through
+    ``resolver.get_verdicts`` (a :class:`ColorMatchAgent` or a
+    :class:`PerceptualVerdictEngine`), then broadcast back to all rows
+    with a join.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Pipeline output with a catalog color column and ``detected_color``.
+    resolver : ColorMatchAgent or PerceptualVerdictEngine
+        Anything with ``get_verdicts(pairs, batch_size)``.
+    color_column : str, optional
+        Catalog color column (detected from the usual names if omitted).
+    batch_size : int
+        Pairs per batched LLM call.
+
+    Returns
+    -------
+    (pandas.DataFrame, dict)
+        A copy of `df` with the new ``Verdict`` column, and the diff
+        summary against the previous verdicts.
+
+    Raises
+    ------
+    ValueError
+        If the color or ``detected_color`` column is missing.
+    """
+    if color_column is None:
+        color_column = next((c for c in COLOR_COLUMN_CANDIDATES if c in df.columns), None)
+    if color_column is None or color_column not in df.columns:
+        raise ValueError(
+            "Output CSV must contain one of these color columns: "
+            + ", ".join(f"'{c}'" for c in COLOR_COLUMN_CANDIDATES)
+            + "."
+        )
+    if "detected_color" not in df.columns:
+        raise ValueError("Output CSV must contain a 'detected_color' column.")
+
+    detected_mask = df["detected_color"].notna()
+    names = pd.DataFrame(
+        {
+            "expected": df[color_column].fillna("").astype(str).str.strip(),
+            "detected": df["detected_color"].fillna("").astype(str).str.strip(),
+        },
+        index=df.index,
+    )
+    pairs = names[detected_mask]
+
+    unique = pairs.drop_duplicates(ignore_index=True)
+    print(f"[INFO] Re-verdicting {len(df)} rows: {len(unique)} unique color pairs.")
+    unique["Verdict"] = resolver.get_verdicts(
+        list(unique[["expected", "detected"]].itertuples(index=False, name=None)),
+        batch_size=batch_size,
+    )
+
+    new_verdicts = pd.Series(NO_DETECTION_VERDICT, index=df.index, dtype=object)
+    joined = pairs.merge(unique, on=["expected", "detected"], how="left")
+    new_verdicts[detected_mask] = joined["Verdict"].to_numpy()
+
+    previous = (
+        df["Verdict"].astype(object)
+        if "Verdict" in df.columns
+        else pd.Series(None, index=df.index, dtype=object)
+    )
+    out = df.copy()
+    out["Verdict"] = new_verdicts
+
+    return out, _diff_summary(previous, new_verdicts, names, len(unique))
+
+
+def _diff_summary(
+    previous: pd.Series,
+    current: pd.Series,
+    names: pd.DataFrame,
+    unique_pairs: int,
+) -> Dict[str, Any]:
+    """Counts before/after, per-transition counts and the most affected pairs."""
+    before = previous.fillna("none")
+    changed = before != current
+
+    transitions = (
+        pd.DataFrame({"from": before[changed], "to": current[changed]})
+        .value_counts()
+        .to_dict()
+    )
+    changed_pairs = (
+        names.assign(previous=before, verdict=current)[changed].value_counts().head(20)
+    )
+
+    return {
+        "rows": int(len(current)),
+        "unique_pairs": int(unique_pairs),
+        "changed": int(changed.sum()),
+        "before": {str(k): int(v) for k, v in before.value_counts().items()},
+        "after": {str(k): int(v) for k, v in current.value_counts().items()},
+        "transitions": {f"{a} -> {b}": int(n) for (a, b), n in transitions.items()},
+        "top_changed_pairs": [
+            {
+                "expected": expected,
+                "detected": detected,
+                "previous": prev,
+                "verdict": verdict,
+                "rows": int(n),
+            }
+            for (expected, detected, prev, verdict), n in changed_pairs.items()
+        ],
+    }
+
+
+def reverdict_csv(
+    input_csv: str,
+    resolver: Any,
+    output_csv: Optional[str] = None,
+    color_column: Optional[str] = None,
+    batch_size: int = DEFAULT_VERDICT_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """
+    Re-verdict an existing output CSV without detecting anything again.
+
+    Writes `output_csv` (default: replace `input_csv`) and a diff summary
+    to :func:`diff_path_for` ``(output_csv)``. Returns the summary.
+    """
+    output_csv = output_csv or input_csv
+    df = pd.read_csv(input_csv)
+    out, summary = reverdict_frame(df, resolver, color_column=color_column, batch_size=batch_size)
+
+    # Write next to the target first so replacing the input is atomic
+    tmp_path = f"{output_csv}.tmp"
+    out.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, output_csv)
+    with open(diff_path_for(output_csv), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+    print(
+        f"[INFO] {summary['changed']} of {summary['rows']} verdicts changed "
+        f"({summary['unique_pairs']} unique pairs) -> {output_csv}"
+    )
+    for transition, count in summary["transitions"].items():
+        print(f"    {transition}: {count}")
+    print(f"[INFO] Diff summary: {diff_path_for(output_csv)}")
+    return summary
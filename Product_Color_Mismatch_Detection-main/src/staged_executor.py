@@ -0,0 +1,368 @@
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+
+# Queue sentinel telling stage workers to exit.
+_STOP = object()
+
+# How often blocked feeder/worker threads re-check the stop event (seconds).
+_POLL_SECONDS = 0.1
+
+
+def _put(q: "queue.Queue", entry: Any, stop: threading.Event) -> bool:
+    """Put `entry` on a bounded queue; give up (False) once `stop` is set."""
+    while not stop.is_set():
+        try:
+            q.put(entry, timeout=_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: "queue.Queue", stop: threading.Event) -> Any:
+    """Take the next entry from `q`; returns _STOP once `stop` is set."""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=_POLL_SECONDS)
+        except queue.Empty:
+            continue
+    return _STOP
+
+
+@dataclass
+class Stage:
+    """
+    One step of a :class:`StagedExecutor` pipeline.
+
+    Attributes
+    ----------
+    name : str
+        Label used in utilization reports.
+    fn : callable
+        ``fn(item) -> item``. For ``kind="process"`` it must be a picklable
+        module-level function and the item must be picklable.
+    workers : int
+        Number of concurrent workers for this stage.
+    kind : str
+        "thread" for I/O-bound work, "process" for CPU-bound work.
+    batch_size : int
+        When > 1, a worker takes up to this many queued items at once and
+        calls ``fn(items) -> items`` with the list (same length and
+        order). A worker never waits for a batch to fill: it takes what
+        is queued, so a slow producer gets smaller batches, not latency.
+    """
+
+    name: str
+    fn: Callable[[Any], Any]
+    workers: int = 1
+    kind: str = "thread"
+    batch_size: int = 1
+
+    # Runtime statistics (filled in by the executor)
+    processed: int = field(default=0, init=False)
+    busy_seconds: float = field(default=0.0, init=False)
+
+
+class _Failure:
+    """Carries an exception raised by a stage to the consumer."""
+
+    def __init__(self, stage: str, exc: BaseException) -> None:
+        self.stage = stage
+        self.exc = exc
+
+
+class StagedExecutor:
+    """
+    Runs items through a chain of stages connected by bounded queues.
+
+    Every stage has its own worker pool (threads, or threads feeding a
+    process pool for CPU-bound stages), so downloads, decoding and model
+    calls overlap instead of running back to back. Bounded queues plus a
+    cap on items in flight apply backpressure: a slow stage stalls its
+    producers instead of buffering the whole dataset.
+
+    Results are yielded in input order. An exception raised by any stage
+    is re-raised to the consumer when the failing item's turn comes.
+    """
+
+    def __init__(
+        self,
+        stages: List[Stage],
+        queue_size: int = 32,
+        max_in_flight: Optional[int] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        stages : list[Stage]
+            Pipeline stages, in order.
+        queue_size : int
+            Capacity of each inter-stage queue.
+        max_in_flight : int, optional
+            Maximum items admitted but not yet yielded (bounds the
+            re-ordering buffer). Defaults to ``queue_size * len(stages)``.
+        """
+        if not stages:
+            raise ValueError("StagedExecutor needs at least one stage.")
+        for stage in stages:
+            if stage.kind not in ("thread", "process"):
+                raise ValueError(f"Unknown stage kind '{stage.kind}' for stage '{stage.name}'.")
+            stage.batch_size = max(1, stage.batch_size)
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self.max_in_flight = max_in_flight or self.queue_size * len(stages)
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+        self._stats_lock = threading.Lock()
+
+    # -------------------------------------------------
+    # Internals
+    # -------------------------------------------------
+
+    def _worker(
+        self,
+        stage: Stage,
+        inbox: "queue.Queue",
+        outbox: "queue.Queue",
+        pool: Optional[ProcessPoolExecutor],
+        stop: threading.Event,
+    ) -> None:
+        if stage.batch_size > 1:
+            self._batch_worker(stage, inbox, outbox, pool, stop)
+            return
+        while True:
+            entry = _get(inbox, stop)
+            if entry is _STOP:
+                _put(inbox, _STOP, stop)  # let sibling workers see it too
+                return
+            seq, item = entry
+            if not isinstance(item, _Failure):
+                started = time.perf_counter()
+                try:
+                    if stop.is_set():
+                        return
+                    if pool is not None:
+                        item = pool.submit(stage.fn, item).result()
+                    else:
+                        item = stage.fn(item)
+                except Exception as exc:  # noqa: BLE001
+                    item = _Failure(stage.name, exc)
+                elapsed = time.perf_counter() - started
+                with self._stats_lock:
+                    stage.processed += 1
+                    stage.busy_seconds += elapsed
+            if not _put(outbox, (seq, item), stop):
+                return
+
+    def _batch_worker(
+        self,
+        stage: Stage,
+        inbox: "queue.Queue",
+        outbox: "queue.Queue",
+        pool: Optional[ProcessPoolExecutor],
+        stop: threading.Event,
+    ) -> None:
+        stopped = False
+        while not stopped:
+            entry = _get(inbox, stop)
+            if entry is _STOP:
+                _put(inbox, _STOP, stop)
+                return
+            entries = [entry]
+            # Take whatever else is already queued, up to the batch size
+            while len(entries) < stage.batch_size:
+                try:
+                    entry = inbox.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    _put(inbox, _STOP, stop)
+                    stopped = True
+                    break
+                entries.append(entry)
+
+            # Failures from earlier stages pass through untouched
+            batch = [(seq, item) for seq, item in entries if not isinstance(item, _Failure)]
+            for seq, item in entries:
+                if isinstance(item, _Failure) and not _put(outbox, (seq, item), stop):
+                    return
+            if not batch:
+                continue
+            if stop.is_set():
+                return
+
+            started = time.perf_counter()
+            items = [item for _, item in batch]
+            try:
+                if pool is not None:
+                    results = pool.submit(stage.fn, items).result()
+                else:
+                    results = stage.fn(items)
+                if len(results) != len(items):
+                    raise RuntimeError(
+                        f"Stage '{stage.name}' returned {len(results)} items "
+                        f"for a batch of {len(items)}."
+                    )
+            except Exception as exc:  # noqa: BLE001
+                results = [_Failure(stage.name, exc)] * len(items)
+            elapsed = time.perf_counter() - started
+            with self._stats_lock:
+                stage.processed += len(items)
+                stage.busy_seconds += elapsed
+            for (seq, _), result in zip(batch, results):
+                if not _put(outbox, (seq, result), stop):
+                    return
+
+    # -------------------------------------------------
+    # Public API
+    # -------------------------------------------------
+
+    def run(self, items: Iterable[Any]) -> Iterator[Any]:
+        """
+        Process `items` through all stages, yielding results in input order.
+
+        The run is fail-fast: an exception raised by a stage for any item
+        aborts the whole run and is re-raised here when that item's turn
+        comes. Stages that can fail per item (downloads, decoding) are
+        expected to return an error marker instead of raising; callers
+        checkpoint what was yielded so an aborted run can be resumed.
+
+        When the run ends early (a stage failure, or the consumer closing
+        the generator), the feeder and stage threads are stopped and
+        joined before this generator returns.
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        in_flight = threading.Semaphore(self.max_in_flight)
+        stop = threading.Event()
+        pools: List[ProcessPoolExecutor] = []
+        threads: List[threading.Thread] = []
+        feed_error: List[BaseException] = []
+        total = [None]
+
+        for stage in self.stages:
+            stage.processed = 0
+            stage.busy_seconds = 0.0
+        self._started_at = time.perf_counter()
+        self._finished_at = None
+
+        def _feed() -> None:
+            count = 0
+            try:
+                for item in items:
+                    while not in_flight.acquire(timeout=_POLL_SECONDS):
+                        if stop.is_set():
+                            return
+                    if not _put(queues[0], (count, item), stop):
+                        return
+                    count += 1
+            except Exception as exc:  # noqa: BLE001
+                feed_error.append(exc)
+            finally:
+                total[0] = count
+                _put(queues[0], _STOP, stop)
+
+        for i, stage in enumerate(self.stages):
+            pool = None
+            if stage.kind == "process":
+                # Not "fork": forking while the stage threads run can
+                # copy a held lock into the child and deadlock it
+                pool = ProcessPoolExecutor(
+                    max_workers=max(1, stage.workers),
+                    mp_context=multiprocessing.get_context("forkserver"),
+                )
+                pools.append(pool)
+            stage_threads = [
+                threading.Thread(
+                    target=self._worker,
+                    args=(stage, queues[i], queues[i + 1], pool, stop),
+                    name=f"stage-{stage.name}-{w}",
+                    daemon=True,
+                )
+                for w in range(max(1, stage.workers))
+            ]
+            threads.extend(stage_threads)
+
+            # Forward the stop signal once every worker of this stage exited
+            def _closer(ts=stage_threads, out=queues[i + 1]) -> None:
+                for t in ts:
+                    t.join()
+                _put(out, _STOP, stop)
+
+            threads.append(threading.Thread(target=_closer, daemon=True))
+
+        feeder = threading.Thread(target=_feed, name="stage-feeder", daemon=True)
+        threads.append(feeder)
+        for t in threads:
+            t.start()
+
+        try:
+            pending: Dict[int, Any] = {}
+            next_seq = 0
+            outbox = queues[-1]
+            while True:
+                entry = outbox.get()
+                if entry is _STOP:
+                    break
+                seq, item = entry
+                pending[seq] = item
+                while next_seq in pending:
+                    result = pending.pop(next_seq)
+                    next_seq += 1
+                    in_flight.release()
+                    if isinstance(result, _Failure):
+                        raise result.exc
+                    yield result
+            if feed_error:
+                raise feed_error[0]
+        finally:
+            self._finished_at = time.perf_counter()
+            stop.set()
+            for pool in pools:
+                pool.shutdown(wait=False, cancel_futures=True)
+            # Unblock anything still waiting on a queue or the in-flight cap
+            for q in queues:
+                while True:
+                    try:
+                        q.get_nowait()
+                    except queue.Empty:
+                        break
+            for _ in range(self.max_in_flight):
+                in_flight.release()
+            for t in threads:
+                t.join()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Per-stage counters and utilization.
+
+        Utilization is busy worker-seconds divided by available
+        worker-seconds (wall time x workers) for the last run.
+        """
+        if self._started_at is None:
+            return {}
+        end = self._finished_at or time.perf_counter()
+        wall = max(end - self._started_at, 1e-9)
+        report: Dict[str, Dict[str, float]] = {}
+        for stage in self.stages:
+            workers = max(1, stage.workers)
+            report[stage.name] = {
+                "workers": workers,
+                "processed": stage.processed,
+                "busy_seconds": round(stage.busy_seconds, 3),
+                "utilization": round(stage.busy_seconds / (wall * workers), 3),
+            }
+        return report
+
+    def print_stats(self) -> None:
+        """Print a one-line utilization summary per stage."""
+        for name, s in self.stats().items():
+            print(
+                f"[INFO] Stage '{name}': {s['processed']} items, "
+                f"{s['workers']} workers, utilization {s['utilization']:.0%}"
+            )
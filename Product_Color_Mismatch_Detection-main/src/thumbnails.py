@@ -0,0 +1,150 @@
+import hashlib
+import os
+import threading
+from typing import Dict, Optional, Sequence, Tuple
+
+
+DEFAULT_THUMBNAIL_DIR = "data/cache/thumbnails"
+
+# Longest edge (px) of the generated thumbnails; requests snap to these.
+THUMBNAIL_SIZES = (128, 256, 512)
+DEFAULT_THUMBNAIL_SIZE = 256
+
+
+def file_digest(path: str) -> str:
+    """Content hash of an image file (thumbnails are keyed by it)."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class ThumbnailStore:
+    """
+    On-disk WebP thumbnails of the saved product images.
+
+    Thumbnails are generated in a few fixed sizes and keyed by the hash
+    of the source file, so each (image, size) is built exactly once, even
+    if the same picture is saved under several product ids, and a
+    replaced image gets new thumbnails. Source hashes are memoized by
+    (path, mtime, size) so serving a thumbnail does not re-read the
+    original.
+    """
+
+    def __init__(
+        self,
+        thumb_dir: str = DEFAULT_THUMBNAIL_DIR,
+        sizes: Sequence[int] = THUMBNAIL_SIZES,
+        quality: int = 80,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        thumb_dir : str
+            Directory the thumbnails are written to (created on first build).
+        sizes : list[int]
+            Allowed longest-edge sizes in pixels.
+        quality : int
+            WebP quality (0-100).
+        """
+        if not sizes:
+            raise ValueError("At least one thumbnail size is required.")
+        self.thumb_dir = thumb_dir
+        self.sizes = tuple(sorted(int(s) for s in sizes))
+        self.quality = quality
+        self.built = 0
+        self.served = 0
+
+        # The directory is created by the first thumbnail built
+        self._lock = threading.Lock()
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+        # (digest, size) -> lock held while that thumbnail is being built
+        self._building: Dict[Tuple[str, int], threading.Lock] = {}
+
+    # -------------------------------------------------
+    # Internals
+    # -------------------------------------------------
+
+    def _digest(self, image_path: str) -> str:
+        st = os.stat(image_path)
+        key = (image_path, st.st_mtime_ns, st.st_size)
+        with self._lock:
+            digest = self._digests.get(key)
+        if digest is None:
+            digest = file_digest(image_path)
+            with self._lock:
+                self._digests[key] = digest
+        return digest
+
+    def _path(self, digest: str, size: int) -> str:
+        return os.path.join(self.thumb_dir, digest[:2], f"{digest}_{size}.webp")
+
+    def _build(self, image_path: str, target: str, size: int) -> None:
+        # PIL is imported here so the API can import the constants cheaply
+        from PIL import Image, ImageOps
+
+        with Image.open(image_path) as img:
+            # JPEG draft mode decodes at a reduced scale directly
+            img.draft("RGB", (size, size))
+            img = ImageOps.exif_transpose(img).convert("RGB")
+            img.thumbnail((size, size), Image.LANCZOS)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            tmp_path = f"{target}.{threading.get_ident()}.tmp"
+            img.save(tmp_path, format="WEBP", quality=self.quality, method=4)
+        os.replace(tmp_path, target)
+
+    # -------------------------------------------------
+    # Public API
+    # -------------------------------------------------
+
+    def snap_size(self, requested: Optional[int]) -> int:
+        """Smallest allowed size >= `requested` (the largest if none is)."""
+        if requested is None:
+            return DEFAULT_THUMBNAIL_SIZE if DEFAULT_THUMBNAIL_SIZE in self.sizes else self.sizes[0]
+        for size in self.sizes:
+            if size >= requested:
+                return size
+        return self.sizes[-1]
+
+    def get(self, image_path: str, size: Optional[int] = None) -> Tuple[str, str]:
+        """
+        Thumbnail of `image_path`, built on first use.
+
+        Parameters
+        ----------
+        image_path : str
+            Saved product image.
+        size : int, optional
+            Requested longest edge; snapped with :meth:`snap_size`.
+
+        Returns
+        -------
+        (str, str)
+            Path of the WebP file and a validator (source hash and size)
+            usable as an ``ETag``.
+        """
+        size = self.snap_size(size)
+        digest = self._digest(image_path)
+        target = self._path(digest, size)
+
+        if not os.path.exists(target):
+            with self._lock:
+                build_lock = self._building.setdefault((digest, size), threading.Lock())
+            with build_lock:
+                # Concurrent requests for the same thumbnail build it once
+                if not os.path.exists(target):
+                    self._build(image_path, target, size)
+                    with self._lock:
+                        self.built += 1
+            with self._lock:
+                self._building.pop((digest, size), None)
+
+        with self._lock:
+            self.served += 1
+        return target, f"{digest}-{size}"
+
+    def stats(self) -> Dict[str, int]:
+        """Thumbnails built and served by this process."""
+        with self._lock:
+            return {"built": self.built, "served": self.served}
@@ -0,0 +1,258 @@
+import argparse
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+DEFAULT_VERDICT_CACHE_PATH = "data/cache/verdicts.sqlite"
+
+
+def normalize_color(color: str) -> str:
+    """Lowercase and collapse whitespace so "Navy  Blue" == "navy blue"."""
+    return re.sub(r"\s+", " ", str(color)).strip().lower()
+
+
+class VerdictCache:
+    """
+    Persistent memoization cache for Match/Mismatch verdicts.
+
+    Verdicts are keyed by the normalized (expected, detected) pair plus the
+    model name and prompt version, so changing either invalidates old
+    entries. A small in-memory LRU sits in front of the SQLite file.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_VERDICT_CACHE_PATH,
+        memory_size: int = 4096,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        path : str
+            SQLite file path (parent directories are created).
+            Use ":memory:" for a non-persistent cache.
+        memory_size : int
+            Maximum number of entries kept in the in-memory LRU.
+        """
+        self.path = path
+        self.memory_size = max(0, memory_size)
+        self.hits = 0
+        self.misses = 0
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[Tuple[str, str, str, str], str]" = OrderedDict()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS verdicts (
+                expected TEXT NOT NULL,
+                detected TEXT NOT NULL,
+                model TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                verdict TEXT NOT NULL,
+                PRIMARY KEY (expected, detected, model, prompt_version)
+            )
+            """
+        )
+        self._conn.commit()
+
+    # -------------------------------------------------
+    # Internals
+    # -------------------------------------------------
+
+    @staticmethod
+    def _key(
+        expected: str, detected: str, model: str, prompt_version: str
+    ) -> Tuple[str, str, str, str]:
+        return (normalize_color(expected), normalize_color(detected), model, prompt_version)
+
+    def _remember(self, key: Tuple[str, str, str, str], verdict: str) -> None:
+        if not self.memory_size:
+            return
+        self._memory[key] = verdict
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    # -------------------------------------------------
+    # Public API
+    # -------------------------------------------------
+
+    def get(
+        self, expected: str, detected: str, model: str, prompt_version: str
+    ) -> Optional[str]:
+        """Return the cached verdict for a pair, or None on a miss."""
+        key = self._key(expected, detected, model, prompt_version)
+        with self._lock:
+            verdict = self._memory.get(key)
+            if verdict is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return verdict
+
+            row = self._conn.execute(
+                "SELECT verdict FROM verdicts WHERE expected = ? AND detected = ? "
+                "AND model = ? AND prompt_version = ?",
+                key,
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._remember(key, row[0])
+            self.hits += 1
+            return row[0]
+
+    def set_many(
+        self,
+        items: Iterable[Tuple[str, str, str]],
+        model: str,
+        prompt_version: str,
+    ) -> None:
+        """Store many (expected, detected, verdict) triples in one transaction."""
+        rows = [
+            self._key(expected, detected, model, prompt_version) + (verdict,)
+            for expected, detected, verdict in items
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO verdicts "
+                "(expected, detected, model, prompt_version, verdict) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+            for row in rows:
+                self._remember(row[:4], row[4])
+
+    def set(
+        self,
+        expected: str,
+        detected: str,
+        model: str,
+        prompt_version: str,
+        verdict: str,
+    ) -> None:
+        """Store a single verdict."""
+        self.set_many([(expected, detected, verdict)], model, prompt_version)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and the number of persisted entries."""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_entries": len(self._memory),
+            "persisted_entries": size,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def warm_up(
+    agent,
+    expected_colors: Sequence[str],
+    detected_colors: Optional[Sequence[str]] = None,
+    batch_size: Optional[int] = None,
+) -> int:
+    """
+    Pre-fill the agent's verdict cache for the cartesian product of
+    expected catalog colors and detectable colors.
+
+    Parameters
+    ----------
+    agent : ColorMatchAgent
+        Agent constructed with a `cache`.
+    expected_colors : sequence of str
+        Catalog color vocabulary (e.g. unique `baseColour` values).
+    detected_colors : sequence of str, optional
+        Detector vocabulary. Defaults to `COLOR_CANDIDATES`.
+    batch_size : int, optional
+        Pairs per batched LLM call (agent default if omitted).
+
+    Returns
+    -------
+    int
+        Number of distinct pairs covered.
+    """
+    if detected_colors is None:
+        from .color_palette import COLOR_CANDIDATES
+
+        detected_colors = COLOR_CANDIDATES
+
+    expected_unique = list(dict.fromkeys(normalize_color(c) for c in expected_colors if str(c).strip()))
+    detected_unique = list(dict.fromkeys(normalize_color(c) for c in detected_colors if str(c).strip()))
+    pairs: List[Tuple[str, str]] = [(e, d) for e in expected_unique for d in detected_unique]
+
+    kwargs = {} if batch_size is None else {"batch_size": batch_size}
+    agent.get_verdicts(pairs, **kwargs)
+    return len(pairs)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Warm up the persistent verdict cache for all (expected, detected) color pairs."
+    )
+    parser.add_argument(
+        "--colors-csv",
+        type=str,
+        required=True,
+        help="CSV whose color column provides the catalog (expected) color vocabulary.",
+    )
+    parser.add_argument(
+        "--cache-path",
+        type=str,
+        default=DEFAULT_VERDICT_CACHE_PATH,
+        help="SQLite verdict cache file.",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help="Optional: pairs per batched LLM call.",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    import pandas as pd
+
+    from .color_match_agent import ColorMatchAgent
+    from .config_loader import load_settings
+
+    args = parse_args()
+    settings = load_settings("config.yml")
+
+    df = pd.read_csv(args.colors_csv)
+    color_col = next(
+        (c for c in ["baseColour", "base_colour", "color", "colour"] if c in df.columns),
+        None,
+    )
+    if color_col is None:
+        raise ValueError(
+            "Colors CSV must contain one of these color columns: "
+            "'baseColour', 'base_colour', 'color', or 'colour'."
+        )
+
+    cache = VerdictCache(args.cache_path)
+    agent = ColorMatchAgent(openai_api_key=settings.openai_api_key, cache=cache)
+
+    total = warm_up(agent, df[color_col].dropna().astype(str).tolist(), batch_size=args.batch_size)
+    print(f"[INFO] Warmed verdict cache with {total} pairs -> {args.cache_path}")
+    print(f"[INFO] Cache stats: {cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
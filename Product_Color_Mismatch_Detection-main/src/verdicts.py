@@ -0,0 +1,20 @@
+from typing import Literal, Optional
+
+
+Verdict = Literal["Match", "Mismatch"]
+
+
+def parse_verdict(raw: str) -> Optional[Verdict]:
+    """Parse model output as "Match" / "Mismatch"; None if it is neither."""
+    normalized = str(raw).strip().lower()
+    if "match" in normalized and "mis" not in normalized:
+        return "Match"
+    if "mismatch" in normalized:
+        return "Mismatch"
+    return None
+
+
+def normalize_verdict(raw: str) -> Verdict:
+    """Normalize free-form model output to exactly "Match" or "Mismatch"."""
+    # Fallback: be conservative and mark as mismatch
+    return parse_verdict(raw) or "Mismatch"
@@ -0,0 +1,251 @@
+import base64
+import io
+import math
+from typing import Any, Dict, Optional
+
+import numpy as np
+from PIL import Image, ImageChops
+
+
+# Vision detail levels accepted by the OpenAI image_url content part.
+VISION_DETAILS = ("low", "high", "auto")
+
+# Formats that can be sent to the API unchanged.
+_PASSTHROUGH_FORMATS = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}
+
+# Edge length of the reduced copy used to locate the product box.
+_TRIM_ANALYSIS_EDGE = 256
+
+
+def decode_image(data: bytes, max_edge: Optional[int] = None) -> Image.Image:
+    """
+    Decode image bytes to RGB, letting the JPEG decoder work at reduced
+    scale (draft mode) when only ``max_edge`` pixels per edge are needed.
+    """
+    image = Image.open(io.BytesIO(data))
+    if max_edge and image.format == "JPEG":
+        # draft() picks the smallest 1/2, 1/4, 1/8 scale still >= the request
+        image.draft("RGB", (max_edge, max_edge))
+    return image.convert("RGB")
+
+
+def vision_image_tokens(width: int, height: int, detail: str) -> int:
+    """
+    Input tokens OpenAI bills for one image (gpt-4o / gpt-4o-mini tiling).
+
+    "low" is a flat 85 tokens. Otherwise the image is fitted into
+    2048x2048, its short side scaled to 768, and billed 85 + 170 per
+    512px tile.
+    """
+    if detail == "low":
+        return 85
+    scale = min(1.0, 2048 / max(width, height))
+    w, h = width * scale, height * scale
+    scale = min(1.0, 768 / min(w, h))
+    w, h = w * scale, h * scale
+    return 85 + 170 * math.ceil(w / 512) * math.ceil(h / 512)
+
+
+class VisionPreprocessor:
+    """
+    Shrinks product images before they are sent to GPT Vision.
+
+    Steps:
+    - Crop to the product bounding box (background estimated from the
+      image border).
+    - Downscale so the longest edge is at most ``max_edge``.
+    - Encode as JPEG/WebP, lowering quality (then size) until the payload
+      fits ``max_bytes``. The original upload bytes are sent unchanged when
+      they already fit and no crop/resize was needed.
+
+    :meth:`prepare` returns the data URL plus a report of bytes sent.
+    """
+
+    def __init__(
+        self,
+        max_edge: int = 512,
+        max_bytes: int = 150_000,
+        image_format: str = "JPEG",
+        quality: int = 85,
+        min_quality: int = 40,
+        trim_background: bool = True,
+        background_tolerance: int = 12,
+        trim_padding: float = 0.02,
+        detail: str = "low",
+    ) -> None:
+        """
+        Parameters
+        ----------
+        max_edge : int
+            Longest edge (pixels) of the image sent to the model.
+        max_bytes : int
+            Byte budget of the encoded image (before base64).
+        image_format : str
+            "JPEG" or "WEBP".
+        quality : int
+            Starting encoder quality.
+        min_quality : int
+            Lowest quality tried before the image is downscaled further.
+        trim_background : bool
+            Crop away the uniform background around the product.
+        background_tolerance : int
+            Per-channel difference from the border color still counted as
+            background.
+        trim_padding : float
+            Margin kept around the product box, as a fraction of its size.
+        detail : str
+            OpenAI image detail level ("low", "high" or "auto"). "low"
+            bills a flat 85 tokens per image.
+        """
+        image_format = image_format.upper()
+        if image_format not in ("JPEG", "WEBP"):
+            raise ValueError(f"Unsupported vision payload format '{image_format}'.")
+        if detail not in VISION_DETAILS:
+            raise ValueError(
+                f"Unknown vision detail '{detail}'. Expected one of: {', '.join(VISION_DETAILS)}."
+            )
+        self.max_edge = max(32, max_edge)
+        self.max_bytes = max(1024, max_bytes)
+        self.image_format = image_format
+        self.quality = quality
+        self.min_quality = min(min_quality, quality)
+        self.trim_background = trim_background
+        self.background_tolerance = background_tolerance
+        self.trim_padding = trim_padding
+        self.detail = detail
+
+    def signature(self) -> str:
+        """Settings that can change what the model sees (part of cache keys)."""
+        return (
+            f"{self.max_edge}px-{self.image_format.lower()}-"
+            f"{'trim' if self.trim_background else 'full'}-{self.detail}"
+        )
+
+    # -------------------------------------------------
+    # Internals
+    # -------------------------------------------------
+
+    def _trim(self, image: Image.Image) -> Image.Image:
+        """Crop to the bounding box of pixels that differ from the border color."""
+        width, height = image.size
+        if width < 8 or height < 8:
+            return image
+
+        # Find the box on a small copy; only the final crop touches full resolution
+        small = image.copy()
+        small.thumbnail((_TRIM_ANALYSIS_EDGE, _TRIM_ANALYSIS_EDGE), Image.BILINEAR)
+        pixels = np.asarray(small)
+        border = np.concatenate([pixels[0], pixels[-1], pixels[:, 0], pixels[:, -1]])
+        background = tuple(int(v) for v in np.median(border, axis=0))
+
+        diff = ImageChops.difference(small, Image.new("RGB", small.size, background))
+        mask = diff.convert("L").point(lambda p: 255 if p > self.background_tolerance else 0)
+        bbox = mask.getbbox()
+        if bbox is None:
+            return image
+
+        left, top, right, bottom = bbox
+        # Tiny boxes are usually noise (or a product matching the background)
+        if (right - left) * (bottom - top) < 0.01 * small.width * small.height:
+            return image
+
+        pad_x = (right - left) * self.trim_padding
+        pad_y = (bottom - top) * self.trim_padding
+        sx, sy = width / small.width, height / small.height
+        box = (
+            max(0, int((left - pad_x) * sx)),
+            max(0, int((top - pad_y) * sy)),
+            min(width, int(math.ceil((right + pad_x) * sx))),
+            min(height, int(math.ceil((bottom + pad_y) * sy))),
+        )
+        if box == (0, 0, width, height):
+            return image
+        return image.crop(box)
+
+    def _encode(self, image: Image.Image) -> bytes:
+        """Encode under the byte budget: lower quality first, then size."""
+        while True:
+            quality = self.quality
+            while True:
+                buffered = io.BytesIO()
+                image.save(buffered, format=self.image_format, quality=quality)
+                data = buffered.getvalue()
+                if len(data) <= self.max_bytes or quality <= self.min_quality:
+                    break
+                quality = max(self.min_quality, quality - 10)
+            if len(data) <= self.max_bytes or max(image.size) <= 64:
+                return data
+            image = image.resize(
+                (max(1, int(image.width * 0.75)), max(1, int(image.height * 0.75))),
+                Image.BILINEAR,
+            )
+
+    # -------------------------------------------------
+    # Public API
+    # -------------------------------------------------
+
+    def prepare(
+        self,
+        image: Image.Image,
+        source_bytes: Optional[bytes] = None,
+    ) -> Dict[str, Any]:
+        """
+        Build the image payload for one vision request.
+
+        Parameters
+        ----------
+        image : PIL.Image.Image
+            Decoded product image.
+        source_bytes : bytes, optional
+            The original encoded upload, sent unchanged if it already fits
+            the budget and needs no crop or resize.
+
+        Returns
+        -------
+        dict
+            ``url`` (data URL), ``detail``, ``bytes_sent``,
+            ``original_bytes`` (None if unknown), ``width``, ``height``,
+            ``format`` and ``image_tokens`` (billed input tokens).
+        """
+        original_size = image.size
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+
+        prepared = self._trim(image) if self.trim_background else image
+        if max(prepared.size) > self.max_edge:
+            prepared = prepared.copy()
+            prepared.thumbnail((self.max_edge, self.max_edge), Image.BICUBIC)
+
+        source_format, source_size = None, None
+        if source_bytes is not None:
+            try:
+                # Header only: no pixel decoding
+                with Image.open(io.BytesIO(source_bytes)) as source:
+                    source_format, source_size = source.format, source.size
+            except Exception:  # noqa: BLE001
+                source_format = None
+
+        if (
+            source_format in _PASSTHROUGH_FORMATS
+            and len(source_bytes) <= self.max_bytes
+            and prepared.size == original_size == source_size
+        ):
+            data, mime = source_bytes, _PASSTHROUGH_FORMATS[source_format]
+            sent_format = source_format
+        else:
+            data = self._encode(prepared)
+            mime = _PASSTHROUGH_FORMATS[self.image_format]
+            sent_format = self.image_format
+            # The encoder may have shrunk the image further to fit the budget
+            prepared = Image.open(io.BytesIO(data))
+
+        return {
+            "url": f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}",
+            "detail": self.detail,
+            "bytes_sent": len(data),
+            "original_bytes": len(source_bytes) if source_bytes is not None else None,
+            "width": prepared.width,
+            "height": prepared.height,
+            "format": sent_format,
+            "image_tokens": vision_image_tokens(prepared.width, prepared.height, self.detail),
+        }
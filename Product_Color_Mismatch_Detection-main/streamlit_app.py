@@ -1,12 +1,16 @@
+import math
 import os
-import re
 from typing import Optional
+from urllib.parse import quote
 
 import pandas as pd
 from PIL import Image
 import streamlit as st
 import requests
 
+from src.image_index import ImageIndex
+from src.thumbnails import ThumbnailStore
+
 
 # --------------------------
 # Config
@@ -16,6 +20,12 @@ IMAGE_DIR = "data/images"
 
 FASTAPI_URL = "http://localhost:8020"
 
+# Gallery: thumbnails per row and selectable page sizes
+GALLERY_COLUMNS = 6
+GALLERY_PAGE_SIZES = [12, 24, 48, 96]
+GALLERY_THUMBNAIL_SIZE = 256
+DETAIL_THUMBNAIL_SIZE = 512
+
 
 # --------------------------
 # Helpers
@@ -34,31 +44,94 @@ def pick_color_column(df: pd.DataFrame) -> Optional[str]:
     return None
 
 
-def sanitize_id(raw: str) -> str:
-    safe = re.sub(r"[^A-Za-z0-9_-]+", "_", raw)
-    return safe or "unknown"
+@st.cache_resource
+def get_image_index(image_dir: str = IMAGE_DIR) -> ImageIndex:
+    # Built once per session; refreshes itself when the directory changes
+    index = ImageIndex(image_dir)
+    index.refresh(force=True)
+    return index
+
+
+def product_id_of(row: pd.Series, idx: int) -> str:
+    if "id" in row.index and pd.notna(row["id"]):
+        return str(row["id"])
+    return str(idx)
 
 
 def get_image_path(row: pd.Series, idx: int, image_dir: str = IMAGE_DIR) -> Optional[str]:
+    return get_image_index(image_dir).lookup(product_id_of(row, idx), idx)
 
-    if "id" in row.index and pd.notna(row["id"]):
-        raw_id = str(row["id"])
-    else:
-        raw_id = str(idx)
 
-    safe_id = sanitize_id(raw_id)
-    expected_name = f"{idx:05d}_{safe_id}.jpg"
-    path = os.path.join(image_dir, expected_name)
+@st.cache_resource
+def get_thumbnail_store() -> ThumbnailStore:
+    return ThumbnailStore()
 
-    if os.path.exists(path):
-        return path
 
-    prefix = f"{idx:05d}_"
-    for fname in os.listdir(image_dir):
-        if fname.startswith(prefix) and fname.lower().endswith((".jpg", ".jpeg", ".png")):
-            return os.path.join(image_dir, fname)
+def thumbnail_source(row: pd.Series, idx: int, size: int, use_api: bool) -> Optional[str]:
+    """
+    Image source for a product thumbnail.
 
-    return None
+    With `use_api`, the `/thumbnail` URL: the browser downloads (and
+    caches) only the thumbnails that are rendered. Otherwise the WebP
+    thumbnail is built locally, into the same on-disk store.
+    """
+    if use_api:
+        product_id = quote(product_id_of(row, idx), safe="")
+        return f"{FASTAPI_URL}/thumbnail/{product_id}?index={idx}&size={size}"
+
+    img_path = get_image_path(row, idx, image_dir=IMAGE_DIR)
+    if not img_path or not os.path.exists(img_path):
+        return None
+    return get_thumbnail_store().get(img_path, size)[0]
+
+
+def select_product(position: int) -> None:
+    st.session_state["product_pos"] = position
+
+
+def render_gallery(
+    df: pd.DataFrame,
+    filtered_indices: list,
+    color_col: str,
+    use_api: bool,
+) -> None:
+    """One page of product thumbnails; only that page's images are requested."""
+    page_size = st.sidebar.selectbox("Thumbnails per page", GALLERY_PAGE_SIZES, index=1)
+    num_pages = max(1, math.ceil(len(filtered_indices) / page_size))
+    page = st.sidebar.number_input(
+        "Gallery page", min_value=1, max_value=num_pages, value=1, step=1
+    )
+
+    start = (int(page) - 1) * page_size
+    page_indices = filtered_indices[start:start + page_size]
+    st.caption(
+        f"Products {start + 1}-{start + len(page_indices)} of {len(filtered_indices)} "
+        f"(page {int(page)} of {num_pages})"
+    )
+
+    for row_start in range(0, len(page_indices), GALLERY_COLUMNS):
+        cols = st.columns(GALLERY_COLUMNS)
+        for offset, (col, row_idx) in enumerate(
+            zip(cols, page_indices[row_start:row_start + GALLERY_COLUMNS])
+        ):
+            row = df.loc[row_idx]
+            position = start + row_start + offset
+            with col:
+                src = thumbnail_source(row, row_idx, GALLERY_THUMBNAIL_SIZE, use_api)
+                if src:
+                    st.image(src, use_container_width=True)
+                else:
+                    st.caption("No image")
+                st.caption(
+                    f"{row.get(color_col, 'N/A')} / {row.get('detected_color', 'N/A')} - "
+                    f"{row.get('Verdict', 'N/A')}"
+                )
+                st.button(
+                    "Details",
+                    key=f"gallery_{row_idx}",
+                    on_click=select_product,
+                    args=(position,),
+                )
 
 
 # --------------------------
@@ -219,6 +292,19 @@ def main() -> None:
     filtered_indices = filtered_df.index.tolist()
     num_products = len(filtered_indices)
 
+    use_api_thumbnails = st.sidebar.checkbox(
+        "Load thumbnails from FastAPI",
+        value=True,
+        help="Off: thumbnails are generated locally (no API needed).",
+    )
+
+    st.subheader("Gallery")
+    render_gallery(df, filtered_indices, color_col, use_api_thumbnails)
+    st.divider()
+
+    if st.session_state.get("product_pos", 0) > num_products - 1:
+        st.session_state["product_pos"] = 0
+
     if num_products == 1:
         st.sidebar.write("Only one product matches the current filters.")
         selected_pos = 0
@@ -227,7 +313,7 @@ def main() -> None:
             "Select product position",
             min_value=0,
             max_value=num_products - 1,
-            value=0,
+            key="product_pos",
         )
 
     row_idx = filtered_indices[selected_pos]
@@ -239,9 +325,14 @@ def main() -> None:
         st.subheader("Product Image")
         img_path = get_image_path(row, row_idx, image_dir=IMAGE_DIR)
         if img_path and os.path.exists(img_path):
-            image = Image.open(img_path)
-            st.image(image, use_container_width=True)
-            st.caption(f"Image file: `{os.path.basename(img_path)}`")
+            st.image(
+                thumbnail_source(row, row_idx, DETAIL_THUMBNAIL_SIZE, use_api_thumbnails),
+                use_container_width=True,
+            )
+            st.caption(
+                f"Image file: `{os.path.basename(img_path)}` "
+                f"([full size]({FASTAPI_URL}/image/{quote(product_id_of(row, row_idx), safe='')}?index={row_idx}))"
+            )
         else:
             st.warning("No local image found for this product.")
 
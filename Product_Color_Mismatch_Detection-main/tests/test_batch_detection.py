@@ -0,0 +1,80 @@
+import io
+import zipfile
+
+import pytest
+
+from src import batch_detection
+from src.batch_detection import collect_batch_items
+
+
+def _zip(members):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+
+def test_collects_files_archive_and_urls_in_order():
+    items = collect_batch_items(
+        files=[("a.jpg", b"aa")],
+        archive=_zip({"dir/b.png": b"bb", "notes.txt": b"skip me"}),
+        url_items=[
+            "http://example.com/c.jpg",
+            {"url": "http://example.com/d.jpg", "id": "d", "expected_color": " Red "},
+        ],
+        expected_colors={"a.jpg": "Blue", "b.png": "Green"},
+    )
+    assert [item["index"] for item in items] == [0, 1, 2, 3]
+    assert [item["name"] for item in items] == [
+        "a.jpg",
+        "dir/b.png",
+        "http://example.com/c.jpg",
+        "d",
+    ]
+    assert [item["expected_color"] for item in items] == ["Blue", "Green", None, "Red"]
+    assert items[1]["data"] == b"bb"
+    assert items[3]["url"] == "http://example.com/d.jpg"
+
+
+def test_positional_expected_colors():
+    items = collect_batch_items(files=[("a.jpg", b"1"), ("b.jpg", b"2")], expected_colors=["Red"])
+    assert [item["expected_color"] for item in items] == ["Red", None]
+
+
+def test_item_limit(monkeypatch):
+    monkeypatch.setattr(batch_detection, "MAX_BATCH_ITEMS", 2)
+    with pytest.raises(ValueError, match="2 images"):
+        collect_batch_items(url_items=["http://a/1", "http://a/2", "http://a/3"])
+
+
+def test_uploaded_bytes_limit(monkeypatch):
+    monkeypatch.setattr(batch_detection, "MAX_BATCH_BYTES", 10)
+    collect_batch_items(files=[("a.jpg", b"x" * 10)])
+    with pytest.raises(ValueError, match="10 bytes"):
+        collect_batch_items(files=[("a.jpg", b"x" * 6), ("b.jpg", b"x" * 5)])
+
+
+def test_zip_limits_use_declared_sizes(monkeypatch):
+    monkeypatch.setattr(batch_detection, "MAX_ZIP_MEMBER_BYTES", 8)
+    with pytest.raises(ValueError, match="too large: big.jpg"):
+        collect_batch_items(archive=_zip({"big.jpg": b"x" * 9}))
+
+    monkeypatch.setattr(batch_detection, "MAX_BATCH_BYTES", 12)
+    with pytest.raises(ValueError, match="12 bytes"):
+        # Uploaded files and zip members share the byte budget
+        collect_batch_items(files=[("a.jpg", b"x" * 6)], archive=_zip({"b.jpg": b"x" * 7}))
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {},
+        {"archive": b"not a zip"},
+        {"url_items": [{"id": "no-url"}]},
+        {"url_items": [42]},
+    ],
+)
+def test_malformed_batches(kwargs):
+    with pytest.raises(ValueError):
+        collect_batch_items(**kwargs)
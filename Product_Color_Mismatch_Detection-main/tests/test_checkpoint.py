@@ -0,0 +1,72 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from src.checkpoint import RunCheckpoint, manifest_path_for
+
+
+COLUMNS = ["id", "Verdict"]
+
+
+def _output(tmp_path):
+    return str(tmp_path / "out.csv")
+
+
+def test_resume_truncates_rows_after_the_last_checkpoint(tmp_path):
+    output = _output(tmp_path)
+    checkpoint = RunCheckpoint(output, COLUMNS, source="data.csv")
+    checkpoint.append([{"id": 1, "Verdict": "Match"}], next_index=1)
+    checkpoint.append([{"id": 2, "Verdict": "Mismatch"}], next_index=2)
+    # A crash after rows were appended but before the manifest was updated
+    with open(output, "a", encoding="utf-8") as f:
+        f.write("3,Match\n4,Mism")
+
+    resumed = RunCheckpoint(output, COLUMNS, resume=True, source="data.csv")
+    assert resumed.next_index == 2
+    assert resumed.rows_written == 2
+    assert pd.read_csv(output).to_dict("records") == [
+        {"id": 1, "Verdict": "Match"},
+        {"id": 2, "Verdict": "Mismatch"},
+    ]
+
+    resumed.append([{"id": 3, "Verdict": "Match"}], next_index=3)
+    resumed.finish()
+    assert list(pd.read_csv(output)["id"]) == [1, 2, 3]
+    with open(manifest_path_for(output), encoding="utf-8") as f:
+        manifest = json.load(f)
+    assert manifest["complete"] is True
+    assert manifest["output_bytes"] == os.path.getsize(output)
+
+
+def test_fresh_run_replaces_previous_output(tmp_path):
+    output = _output(tmp_path)
+    RunCheckpoint(output, COLUMNS).append([{"id": 1, "Verdict": "Match"}], next_index=1)
+
+    checkpoint = RunCheckpoint(output, COLUMNS)
+    assert checkpoint.next_index == 0
+    assert not os.path.exists(output)
+    assert not os.path.exists(manifest_path_for(output))
+
+
+def test_resume_without_manifest_starts_fresh(tmp_path):
+    output = _output(tmp_path)
+    with open(output, "w", encoding="utf-8") as f:
+        f.write("id,Verdict\n1,Match\n")
+    checkpoint = RunCheckpoint(output, COLUMNS, resume=True)
+    assert checkpoint.next_index == 0
+    assert not os.path.exists(output)
+
+
+@pytest.mark.parametrize(
+    "columns, source",
+    [(COLUMNS, "other.csv"), (["id", "Verdict", "extra"], "data.csv")],
+)
+def test_resume_refuses_a_different_run(tmp_path, columns, source):
+    output = _output(tmp_path)
+    RunCheckpoint(output, COLUMNS, source="data.csv").append(
+        [{"id": 1, "Verdict": "Match"}], next_index=1
+    )
+    with pytest.raises(ValueError, match="Cannot resume"):
+        RunCheckpoint(output, columns, resume=True, source=source)
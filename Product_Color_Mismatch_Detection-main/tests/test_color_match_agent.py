@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from src.color_match_agent import ColorMatchAgent
+from src.openai_limiter import OpenAIRateLimiter
+
+
+class _StubChain:
+    """Stands in for a LangChain pipeline; `respond(inputs)` returns the raw output."""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.calls = []
+
+    def invoke(self, inputs):
+        self.calls.append(inputs)
+        return self.respond(inputs)
+
+
+def _pairs(inputs):
+    return json.loads(inputs["pairs"])
+
+
+@pytest.fixture
+def agent():
+    return ColorMatchAgent(openai_api_key="sk-test", rate_limiter=OpenAIRateLimiter())
+
+
+def test_invoke_batch_maps_verdicts_by_index(agent):
+    raw = '[{"i": 1, "verdict": "Mismatch"}, {"i": 0, "verdict": "match"}]'
+    agent._batch_chain = _StubChain(lambda inputs: f"```json\n{raw}\n```")
+    verdicts = agent._invoke_batch([("blue", "navy"), ("red", "green")])
+    assert verdicts == ["Match", "Mismatch"]
+    assert _pairs(agent._batch_chain.calls[0]) == [
+        {"i": 0, "expected": "blue", "detected": "navy"},
+        {"i": 1, "expected": "red", "detected": "green"},
+    ]
+
+
+def test_invoke_batch_accepts_plain_strings_and_unparseable_items(agent):
+    agent._batch_chain = _StubChain(lambda inputs: '["Match", "maybe"]')
+    assert agent._invoke_batch([("a", "b"), ("c", "d")]) == ["Match", None]
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        '[{"i": 0, "verdict": "Match"}]',
+        '[{"i": 0, "verdict": "Match"}, {"i": 0, "verdict": "Match"}]',
+        '[{"i": 5, "verdict": "Match"}, {"i": 0, "verdict": "Match"}]',
+        '{"verdicts": []}',
+        "not json",
+    ],
+)
+def test_invoke_batch_rejects_malformed_output(agent, raw):
+    agent._batch_chain = _StubChain(lambda inputs: raw)
+    with pytest.raises(ValueError):
+        agent._invoke_batch([("a", "b"), ("c", "d")])
+
+
+def test_resolve_batch_splits_until_output_parses(agent):
+    def respond(inputs):
+        pairs = _pairs(inputs)
+        if len(pairs) > 2:
+            return "[]"  # wrong length: the batch is split
+        return json.dumps([{"i": p["i"], "verdict": "Match"} for p in pairs])
+
+    agent._batch_chain = _StubChain(respond)
+    agent._chain = _StubChain(lambda inputs: "Mismatch")
+
+    pairs = [(f"e{i}", f"d{i}") for i in range(5)]
+    assert agent._resolve_batch(pairs) == ["Match", "Match", "Mismatch", "Match", "Match"]
+    # 5 -> 2 + 3, 3 -> 1 (single-pair chain) + 2
+    assert [len(_pairs(c)) for c in agent._batch_chain.calls] == [5, 2, 3, 2]
+    assert agent._chain.calls == [{"expected_color": "e2", "detected_color": "d2"}]
+
+
+def test_get_verdicts_deduplicates_and_defaults_to_mismatch(agent):
+    def respond(inputs):
+        return json.dumps(
+            [
+                {"i": p["i"], "verdict": "Match" if p["detected"] == "navy" else "??"}
+                for p in _pairs(inputs)
+            ]
+        )
+
+    agent._batch_chain = _StubChain(respond)
+    verdicts = agent.get_verdicts([("Blue", "navy"), (" blue ", "Navy"), ("red", "green")])
+    assert verdicts == ["Match", "Match", "Mismatch"]
+    assert len(_pairs(agent._batch_chain.calls[0])) == 2
@@ -0,0 +1,82 @@
+import pandas as pd
+import pytest
+
+from src.delta import FINGERPRINT_COLUMN, DeltaBaseline, row_fingerprint
+
+
+def _write(tmp_path, rows):
+    path = tmp_path / "previous.csv"
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return str(path)
+
+
+def test_row_fingerprint_normalizes_expected_color():
+    assert row_fingerprint("1", "h", " Navy  Blue") == row_fingerprint("1", "h", "navy blue")
+    assert row_fingerprint("1", "h", "blue") != row_fingerprint("1", "h2", "blue")
+    assert row_fingerprint("1", "h", "blue") != row_fingerprint("2", "h", "blue")
+
+
+def test_unchanged_rows_are_reused(tmp_path):
+    path = _write(
+        tmp_path,
+        [
+            {
+                "id": 1,
+                FINGERPRINT_COLUMN: "fp1",
+                "detected_color": "navy blue",
+                "detected_confidence": 0.9,
+                "Verdict": "Match",
+            }
+        ],
+    )
+    baseline = DeltaBaseline(path)
+
+    result = baseline.lookup("fp1")
+    assert result == {
+        "detected_color": "navy blue",
+        "detected_confidence": 0.9,
+        "Verdict": "Match",
+    }
+    assert baseline.lookup("new") is None
+    assert baseline.lookup(None) is None
+    assert baseline.stats() == {"baseline_rows": 1, "reused": 1, "processed": 2}
+
+
+@pytest.mark.parametrize("detected", [None, "", "unknown", " Unknown ", "error", "nan"])
+def test_failed_detections_are_processed_again(tmp_path, detected):
+    path = _write(
+        tmp_path,
+        [{FINGERPRINT_COLUMN: "fp1", "detected_color": detected, "Verdict": "Mismatch"}],
+    )
+    assert DeltaBaseline(path).lookup("fp1") is None
+
+
+def test_last_duplicate_wins_and_missing_values_become_none(tmp_path):
+    path = _write(
+        tmp_path,
+        [
+            {FINGERPRINT_COLUMN: "fp1", "detected_color": "red", "detection_tier": "gpt"},
+            {FINGERPRINT_COLUMN: "fp1", "detected_color": "blue", "detection_tier": None},
+            {FINGERPRINT_COLUMN: None, "detected_color": "green", "detection_tier": "local"},
+        ],
+    )
+    result = DeltaBaseline(path).lookup("fp1")
+    assert result == {"detected_color": "blue", "detection_tier": None}
+
+
+def test_baseline_without_fingerprints_reuses_nothing(tmp_path):
+    path = _write(tmp_path, [{"id": 1, "detected_color": "red", "Verdict": "Match"}])
+    baseline = DeltaBaseline(path)
+    assert baseline.lookup("anything") is None
+
+
+def test_apply_copies_known_columns_only(tmp_path):
+    baseline = DeltaBaseline(_write(tmp_path, [{"id": 1}]))
+    record = {"id": 1, "Verdict": None}
+    baseline.apply(record, {"Verdict": "Match", "detected_color": "red"}, columns=["id", "Verdict"])
+    assert record == {"id": 1, "Verdict": "Match"}
+
+
+def test_missing_baseline_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        DeltaBaseline(str(tmp_path / "nope.csv"))
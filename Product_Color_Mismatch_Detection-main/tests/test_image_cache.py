@@ -0,0 +1,79 @@
+import pytest
+
+from src.image_cache import http_date, is_not_modified, parse_range
+
+
+# -------------------------------------------------
+# parse_range
+# -------------------------------------------------
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("bytes=0-99", (0, 99)),
+        ("bytes=100-", (100, 999)),
+        ("bytes=-100", (900, 999)),
+        ("bytes=-5000", (0, 999)),
+        ("bytes=990-5000", (990, 999)),
+        ("bytes = 5-5", (5, 5)),
+    ],
+)
+def test_parse_range_single_ranges(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", [None, "", "items=0-10", "bytes=0-10,20-30"])
+def test_parse_range_whole_body(header):
+    assert parse_range(header, 1000) is None
+
+
+@pytest.mark.parametrize(
+    "header, size",
+    [
+        ("bytes=1000-", 1000),
+        ("bytes=50-10", 1000),
+        ("bytes=-0", 1000),
+        ("bytes=-10", 0),
+        ("bytes=a-b", 1000),
+        ("bytes=-", 1000),
+    ],
+)
+def test_parse_range_unsatisfiable(header, size):
+    with pytest.raises(ValueError):
+        parse_range(header, size)
+
+
+# -------------------------------------------------
+# is_not_modified
+# -------------------------------------------------
+
+ETAG = '"abc123"'
+MTIME = 1_700_000_000.0
+
+
+@pytest.mark.parametrize(
+    "if_none_match",
+    [ETAG, f"W/{ETAG}", f'"other", {ETAG}', "*"],
+)
+def test_is_not_modified_matching_etag(if_none_match):
+    assert is_not_modified({"if-none-match": if_none_match}, ETAG, MTIME)
+
+
+def test_is_not_modified_other_etag():
+    assert not is_not_modified({"if-none-match": '"other"'}, ETAG, MTIME)
+
+
+def test_is_not_modified_etag_wins_over_date():
+    headers = {"if-none-match": '"other"', "if-modified-since": http_date(MTIME)}
+    assert not is_not_modified(headers, ETAG, MTIME)
+
+
+def test_is_not_modified_by_date():
+    assert is_not_modified({"if-modified-since": http_date(MTIME)}, ETAG, MTIME)
+    assert is_not_modified({"if-modified-since": http_date(MTIME + 60)}, ETAG, MTIME)
+    assert not is_not_modified({"if-modified-since": http_date(MTIME - 60)}, ETAG, MTIME)
+
+
+def test_is_not_modified_ignores_bad_dates_and_no_validators():
+    assert not is_not_modified({"if-modified-since": "yesterday"}, ETAG, MTIME)
+    assert not is_not_modified({}, ETAG, MTIME)
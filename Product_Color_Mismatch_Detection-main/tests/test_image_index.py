@@ -0,0 +1,64 @@
+import os
+
+from src.image_index import ImageIndex, _parse_name, sanitize_id
+
+
+def test_parse_name_hf_and_csv_layouts():
+    assert _parse_name("00012_15970.jpg") == (12, "15970", (0, 0, "00012_15970.jpg"))
+    assert _parse_name("00003_ab_c_img2.png") == (3, "ab_c", (2, 2, "00003_ab_c_img2.png"))
+
+
+def test_parse_name_without_row_prefix():
+    assert _parse_name("product.jpeg") == (None, "product", (0, 1, "product.jpeg"))
+
+
+def test_parse_name_skips_other_files():
+    assert _parse_name("notes.txt") is None
+    assert _parse_name("00001_x.webp") is None
+
+
+def test_sanitize_id():
+    assert sanitize_id("ab/c d") == "ab_c_d"
+    assert sanitize_id("") == "unknown"
+
+
+def _touch(directory, *names):
+    for name in names:
+        with open(os.path.join(directory, name), "wb") as f:
+            f.write(b"x")
+
+
+def test_lookup_prefers_row_then_first_image_then_extension(tmp_path):
+    _touch(
+        tmp_path,
+        "00001_p1_img2.jpg",
+        "00001_p1_img1.png",
+        "00001_p1_img1.jpg",
+        "00005_p1.jpg",
+        "00007_other.jpg",
+    )
+    index = ImageIndex(str(tmp_path))
+    index.refresh(force=True)
+
+    assert len(index) == 5
+    assert index.lookup("p1", 1) == str(tmp_path / "00001_p1_img1.jpg")
+    assert index.lookup("p1", 5) == str(tmp_path / "00005_p1.jpg")
+    # Without a row (or an unknown one) the earliest row wins
+    assert index.lookup("p1") == str(tmp_path / "00001_p1_img1.jpg")
+    assert index.lookup("p1", 99) == str(tmp_path / "00001_p1_img1.jpg")
+    # A row index alone still finds the row's file
+    assert index.lookup("renamed", 7) == str(tmp_path / "00007_other.jpg")
+    assert index.lookup("missing") is None
+
+
+def test_refresh_applies_added_and_removed_files(tmp_path):
+    _touch(tmp_path, "00001_a.jpg")
+    index = ImageIndex(str(tmp_path))
+    index.refresh(force=True)
+    assert index.lookup("a") is not None
+
+    os.remove(tmp_path / "00001_a.jpg")
+    _touch(tmp_path, "00002_b.jpg")
+    index.refresh(force=True)
+    assert index.lookup("a") is None
+    assert index.lookup("b") == str(tmp_path / "00002_b.jpg")
@@ -0,0 +1,79 @@
+import pandas as pd
+import pytest
+
+from src.perceptual_verdict import (
+    SOURCE_PERCEPTUAL,
+    SOURCE_SAME_FAMILY,
+    SOURCE_SAME_NAME,
+    SOURCE_UNDECIDED,
+    PerceptualVerdictEngine,
+    normalize_color_name,
+)
+
+
+class _StubAgent:
+    """Records the pairs deferred to it; answers "Match"."""
+
+    def __init__(self):
+        self.calls = []
+
+    def get_verdicts(self, pairs, batch_size=40):
+        self.calls.append(list(pairs))
+        return ["Match"] * len(pairs)
+
+
+def _row(scored, i):
+    row = scored.iloc[i]
+    return (None if pd.isna(row["Verdict"]) else row["Verdict"]), row["verdict_source"]
+
+
+def test_normalize_color_name():
+    assert normalize_color_name("  Navy_Blue ") == "navy blue"
+    assert normalize_color_name("Grey-Melange") == "gray melange"
+
+
+def test_score_without_agent():
+    engine = PerceptualVerdictEngine()
+    scored = engine.score(
+        ["Navy Blue", "Grey", "Red", "Blue", "Light Blue", "Blue"],
+        ["navy blue", "gray", "green", "royal blue", "Navy Blue", "unknown"],
+    )
+    assert _row(scored, 0) == ("Match", SOURCE_SAME_NAME)
+    assert _row(scored, 1) == ("Match", SOURCE_SAME_NAME)
+    assert _row(scored, 2) == ("Mismatch", SOURCE_PERCEPTUAL)
+    assert _row(scored, 3) == ("Match", SOURCE_PERCEPTUAL)
+    # Far apart but one family: a Match by family when nobody can be asked
+    assert _row(scored, 4) == ("Match", SOURCE_SAME_FAMILY)
+    assert _row(scored, 5) == (None, SOURCE_UNDECIDED)
+    assert scored["delta_e"].iloc[0] == pytest.approx(0.0)
+    assert pd.isna(scored["delta_e"].iloc[5])
+
+
+def test_score_with_agent_defers_family_and_margin_cases():
+    engine = PerceptualVerdictEngine(agent=_StubAgent())
+    scored = engine.score(["Light Blue", "Red", "Black"], ["Navy Blue", "green", "charcoal"])
+    assert _row(scored, 0) == (None, SOURCE_UNDECIDED)
+    assert _row(scored, 1) == ("Mismatch", SOURCE_PERCEPTUAL)
+    # ~12 CIEDE2000 apart: inside the margin around the threshold
+    assert _row(scored, 2) == (None, SOURCE_UNDECIDED)
+
+
+def test_score_keeps_the_series_index():
+    engine = PerceptualVerdictEngine()
+    expected = pd.Series(["red", "blue"], index=[10, 20])
+    assert list(engine.score(expected, ["red", "blue"]).index) == [10, 20]
+
+
+def test_decide_sends_each_deferred_pair_once():
+    agent = _StubAgent()
+    engine = PerceptualVerdictEngine(agent=agent)
+    scored = engine.decide(["Light Blue", "Light Blue", "red"], ["Navy Blue", "Navy Blue", "red"])
+    assert agent.calls == [[("Light Blue", "Navy Blue")]]
+    assert list(scored["Verdict"]) == ["Match", "Match", "Match"]
+    assert engine.stats()["agent"] == 2
+
+
+def test_get_verdicts_reports_undecided_as_mismatch():
+    engine = PerceptualVerdictEngine()
+    assert engine.get_verdicts([("blue", "unknown"), ("red", "red")]) == ["Mismatch", "Match"]
+    assert engine.get_verdicts([]) == []